@@ -1,24 +1,169 @@
 # agents/dqn.py
-import random, collections
+import numpy as np
 import torch, torch.nn as nn
 
 class ReplayBuffer:
-    def __init__(self, capacity=100_000):
-        self.buffer = collections.deque(maxlen=capacity)
+    """
+    Ring buffer over preallocated arrays. Observations are stored compactly (lane index as
+    uint8, the remaining features as float32) in 2 * capacity rows: row i is the obs of slot
+    i and row capacity + i its next_obs. next_ref[i] points at the row holding slot i's
+    next_obs: row i + 1 whenever the episode continued (stored once), its own tail row
+    otherwise (episode ends, or the newest transition). A sample is one gather over both.
+    """
+    _ARRAYS = ("lanes", "feats", "actions", "rewards", "dones", "next_ref")
+
+    def __init__(self, capacity=100_000, obs_dim=6, n_lanes=3):
+        self.capacity, self.obs_dim, self.n_lanes = capacity, obs_dim, n_lanes
+        self.lanes = np.zeros(2 * capacity, dtype=np.uint8)
+        self.feats = np.zeros((2 * capacity, obs_dim - n_lanes), dtype=np.float32)
+        self.actions = np.zeros(capacity, dtype=np.uint8)
+        self.rewards = np.zeros(capacity, dtype=np.float32)
+        self.dones = np.zeros(capacity, dtype=bool)
+        self.next_ref = np.arange(capacity, 2 * capacity, dtype=np.int32)
+        self._onehot = np.eye(n_lanes, dtype=np.float32)
+        self.pos = 0
+        self.size = 0
+
+    def _encode(self, obs):
+        o = np.asarray(obs, dtype=np.float32)
+        return int(o[:self.n_lanes].argmax()), o[self.n_lanes:]
+
     def push(self, obs, action, reward, next_obs, done):
-        self.buffer.append((obs, action, reward, next_obs, done))
-    def sample(self, batch_size):
-        batch = random.sample(self.buffer, batch_size)
-        obs, acts, rews, next_obs, dones = zip(*batch)
-        import torch
+        i, cap = self.pos, self.capacity
+        lane, feats = self._encode(obs)
+        prev = (i - 1) % cap
+        if self.size and self.lanes[cap + prev] == lane and np.array_equal(self.feats[cap + prev], feats):
+            self.next_ref[prev] = i
+
+        self.lanes[i], self.feats[i] = lane, feats
+        self.actions[i], self.rewards[i], self.dones[i] = action, reward, done
+        self.next_ref[i] = cap + i
+        self.lanes[cap + i], self.feats[cap + i] = self._encode(next_obs)
+        self.pos = (i + 1) % cap
+        self.size = min(self.size + 1, cap)
+
+    def _gather(self, idx):
+        n, k = len(idx), self.n_lanes
+        rows = np.concatenate((idx, self.next_ref[idx]))
+        out = np.empty((2 * n, self.obs_dim), dtype=np.float32)
+        out[:, :k] = self._onehot[self.lanes[rows]]
+        out[:, k:] = self.feats[rows]
         return (
-            torch.tensor(obs, dtype=torch.float32),
-            torch.tensor(acts, dtype=torch.long),
-            torch.tensor(rews, dtype=torch.float32),
-            torch.tensor(next_obs, dtype=torch.float32),
-            torch.tensor(dones, dtype=torch.float32),
+            torch.from_numpy(out[:n]),
+            torch.from_numpy(self.actions[idx].astype(np.int64)),
+            torch.from_numpy(self.rewards[idx]),
+            torch.from_numpy(out[n:]),
+            torch.from_numpy(self.dones[idx].astype(np.float32)),
         )
-    def __len__(self): return len(self.buffer)
+
+    def sample(self, batch_size):
+        idx = (np.random.random_sample(batch_size) * self.size).astype(np.int64)
+        return self._gather(idx)
+
+    def state_dict(self):
+        """Copy of the contents, for checkpoints"""
+        return {**{k: getattr(self, k).copy() for k in self._ARRAYS}, "pos": self.pos, "size": self.size}
+
+    def load_state_dict(self, state):
+        self.pos, self.size = state["pos"], state["size"]
+        if "next_ref" in state:
+            for k in self._ARRAYS:
+                getattr(self, k)[...] = state[k]
+            return
+        # checkpoints from the linked / tail-dict layout
+        cap = self.capacity
+        for k in ("actions", "rewards", "dones"):
+            getattr(self, k)[...] = state[k]
+        self.lanes[:cap], self.feats[:cap] = state["lanes"], state["feats"]
+        slots = np.arange(cap)
+        self.next_ref[...] = np.where(state["linked"], (slots + 1) % cap, cap + slots)
+        for slot, (lane, feats) in state["tail"].items():
+            self.lanes[cap + slot], self.feats[cap + slot] = lane, feats
+
+    def nbytes(self):
+        return sum(getattr(self, k).nbytes for k in self._ARRAYS)
+
+    def __len__(self): return self.size
+
+class SumTree:
+    """Array-backed binary sum tree over per-slot priorities (leaves padded to a power of two)"""
+    def __init__(self, capacity):
+        self.n_leaves = 1 << max(0, capacity - 1).bit_length()
+        self.depth = self.n_leaves.bit_length() - 1
+        self.tree = np.zeros(2 * self.n_leaves, dtype=np.float64)
+
+    def total(self): return float(self.tree[1])
+
+    def set(self, i, priority):
+        t = self.tree
+        pos = i + self.n_leaves
+        t[pos] = priority
+        pos >>= 1
+        while pos:
+            t[pos] = t[2 * pos] + t[2 * pos + 1]
+            pos >>= 1
+
+    def update(self, idx, priorities):
+        """Batched set; parents are recomputed from their children level by level"""
+        pos = np.asarray(idx, dtype=np.int64) + self.n_leaves
+        self.tree[pos] = priorities
+        for _ in range(self.depth):
+            pos = np.unique(pos >> 1)
+            self.tree[pos] = self.tree[2 * pos] + self.tree[2 * pos + 1]
+
+    def find(self, values):
+        """Leaf index whose prefix-sum interval contains each value"""
+        pos = np.ones(len(values), dtype=np.int64)
+        values = np.array(values, dtype=np.float64)
+        for _ in range(self.depth):
+            left = 2 * pos
+            left_sum = self.tree[left]
+            go_right = values >= left_sum
+            values -= np.where(go_right, left_sum, 0.0)
+            pos = left + go_right
+        return pos - self.n_leaves
+
+class PrioritizedReplayBuffer(ReplayBuffer):
+    """
+    Proportional prioritized replay (Schaul et al.): slot i is sampled with probability
+    p_i^alpha / sum_k p_k^alpha using stratified draws from a SumTree. New transitions get
+    the largest priority seen so far.
+    """
+    def __init__(self, capacity=100_000, obs_dim=6, n_lanes=3, alpha=0.6, eps=1e-3):
+        super().__init__(capacity, obs_dim, n_lanes)
+        self.alpha, self.eps = alpha, eps
+        self.tree = SumTree(capacity)
+        self.max_priority = 1.0
+
+    def push(self, obs, action, reward, next_obs, done):
+        self.tree.set(self.pos, self.max_priority)
+        super().push(obs, action, reward, next_obs, done)
+
+    def sample(self, batch_size, beta=0.4):
+        """Returns the uniform sample tuple plus importance-sampling weights and slot indices"""
+        total = self.tree.total()
+        bounds = (np.arange(batch_size) + np.random.random_sample(batch_size)) * (total / batch_size)
+        idx = np.minimum(self.tree.find(bounds), self.size - 1)
+        probs = self.tree.tree[idx + self.tree.n_leaves] / total
+        weights = (self.size * np.maximum(probs, 1e-12)) ** -beta
+        weights /= weights.max()
+        return (*self._gather(idx), torch.from_numpy(weights.astype(np.float32)), idx)
+
+    def update_priorities(self, idx, td_errors):
+        priorities = (np.abs(td_errors) + self.eps) ** self.alpha
+        self.tree.update(idx, priorities)
+        self.max_priority = max(self.max_priority, float(priorities.max()))
+
+    def state_dict(self):
+        return {**super().state_dict(), "tree": self.tree.tree.copy(), "max_priority": self.max_priority}
+
+    def load_state_dict(self, state):
+        super().load_state_dict(state)
+        self.tree.tree[...] = state["tree"]
+        self.max_priority = state["max_priority"]
+
+    def nbytes(self):
+        return super().nbytes() + self.tree.tree.nbytes
 
 class QNetwork(nn.Module):
     def __init__(self, obs_dim, n_actions, hidden=128):
@@ -1,17 +1,19 @@
 # agents/heuristic.py
+import numpy as np
 
 # All TTCs are normalized 0..1 where 1.0 is "far" (>= ~5s)
 MIN_SAFE_TTC   = 0.55   # destination must be at least this safe
 SAFETY_MARGIN  = 0.10   # destination must beat current by this much
 CRASH_TTC      = 0.20   # panic threshold: if current is about to crash, pick the best available anyway
 
-def heuristic_policy(obs):
+def heuristic_policy(obs, lanes=3):
     """
-    obs: [onehot(3), lane0_ttc, lane1_ttc, lane2_ttc]
+    obs: [onehot(lanes), lane0_ttc, ..., lane{lanes-1}_ttc, ...]; anything after the nearest
+    TTCs (further lookahead ranks, lengths) is ignored
     returns: 0=stay, 1=left, 2=right
     """
-    lane_oh = obs[:3]
-    ttcs = obs[3:]
+    lane_oh = obs[:lanes]
+    ttcs = obs[lanes:2 * lanes]
     cur_lane = lane_oh.index(1)
     cur_ttc = ttcs[cur_lane]
 
@@ -31,9 +33,35 @@ def heuristic_policy(obs):
     # 3) Panic logic: if collision is imminent, pick the best lane even if it's not great
     if cur_ttc < CRASH_TTC:
         # pick the lane with the largest TTC (could still be small, but it's the least bad)
-        best_lane = max([0,1,2], key=lambda i: ttcs[i])
+        best_lane = max(range(lanes), key=lambda i: ttcs[i])
         if best_lane < cur_lane: return 1
         if best_lane > cur_lane: return 2
 
     # 4) Otherwise, stay and reassess next step
     return 0
+
+def heuristic_policy_batch(obs, lanes=3):
+    """
+    heuristic_policy over an (N, obs_dim) batch with NumPy ops; returns N actions (int64).
+    Float32 batches are widened to float64 first, so every row decides exactly like
+    heuristic_policy(list(row)).
+    """
+    obs = np.asarray(obs, dtype=np.float64)
+    rows = np.arange(len(obs))
+    cur_lane = obs[:, :lanes].argmax(axis=1)
+    ttcs = obs[:, lanes:2 * lanes]
+    cur_ttc = ttcs[rows, cur_lane]
+
+    # 2) meaningfully safer lanes that meet the minimum safety bar; ties go to the lowest lane like max()
+    candidates = ttcs >= np.maximum(cur_ttc + SAFETY_MARGIN, MIN_SAFE_TTC)[:, None]
+    candidates[rows, cur_lane] = False
+    best_lane = np.where(candidates, ttcs, -np.inf).argmax(axis=1)
+
+    # 3) panic: best lane overall, otherwise stay
+    panic_lane = np.where(cur_ttc < CRASH_TTC, ttcs.argmax(axis=1), cur_lane)
+    best_lane = np.where(candidates.any(axis=1), best_lane, panic_lane)
+
+    actions = np.where(best_lane < cur_lane, 1, np.where(best_lane > cur_lane, 2, 0))
+    # 1) already safe enough
+    actions[cur_ttc >= MIN_SAFE_TTC] = 0
+    return actions
@@ -0,0 +1,69 @@
+# agents/planner.py
+import random, time
+from surfer.env import SurferEnv
+
+class LookaheadPlanner:
+    """
+    Search agent over SurferEnv snapshots. Each decision holds an action for
+    `frames_per_decision` frames; every action sequence `depth` decisions deep is played out
+    on a private simulator restored from env.get_state(). Spawns are unknown to the agent, so
+    each pass reseeds the simulator's spawn RNG to sample a future (peek=True keeps the real
+    RNG, i.e. a clairvoyant upper bound). Passes repeat until the per-decision time budget is
+    spent, and the first action with the best average outcome wins.
+    """
+    def __init__(self, depth=3, frames_per_decision=10, time_budget=0.005, max_samples=64, peek=False, seed=0):
+        self.depth, self.frames_per_decision = depth, frames_per_decision
+        self.time_budget, self.max_samples, self.peek = time_budget, max_samples, peek
+        self.rand = random.Random(seed)
+        self.sim, self._sim_key = None, None
+        self.rollouts = 0
+
+    def _simulator(self, env):
+        """The private simulator, rebuilt whenever env plays a different game"""
+        key = (env.target_fps, env.obstacle_length, env.config)
+        if self.sim is None or key != self._sim_key:
+            self.sim = SurferEnv(seed=0, target_fps=env.target_fps, obstacle_length=env.obstacle_length,
+                                 config=env.config)
+            self._sim_key = key
+        return self.sim
+
+    def _value(self, reward, done, depth):
+        """Value of the decision just played on the simulator: its reward plus the best of the remaining
+        depth - 1 decisions, or at a leaf a bonus for the current lane's TTC"""
+        if done:
+            return reward
+        if depth == 1:
+            return reward + self.frames_per_decision * self.sim.lane_ttc()
+        return reward + self._best_return(self.sim.get_state(), depth - 1)
+
+    def _best_return(self, state, depth):
+        """Best total reward over all action sequences from `state` (a get_state snapshot)"""
+        sim = self.sim
+        best = -1e9
+        for action in (0, 1, 2):
+            sim.set_state(state)
+            _, reward, done, _ = sim.step(action, repeat=self.frames_per_decision)
+            self.rollouts += 1
+            best = max(best, self._value(reward, done, depth))
+        return best
+
+    def act(self, env):
+        """Returns the action to hold for the next frames_per_decision frames"""
+        sim = self._simulator(env)
+        root = env.get_state()
+        deadline = time.perf_counter() + self.time_budget
+        totals, samples = [0.0, 0.0, 0.0], 0
+        while samples < self.max_samples and (samples == 0 or time.perf_counter() < deadline):
+            if not self.peek:
+                sim.set_state(root)
+                sim.rand.seed(self.rand.getrandbits(64))
+                root_sample = sim.get_state()
+            else:
+                root_sample = root
+            for action in (0, 1, 2):
+                sim.set_state(root_sample)
+                _, reward, done, _ = sim.step(action, repeat=self.frames_per_decision)
+                self.rollouts += 1
+                totals[action] += self._value(reward, done, self.depth)
+            samples += 1
+        return max((0, 1, 2), key=lambda a: totals[a])
@@ -0,0 +1,70 @@
+# agents/qcache.py
+from collections import OrderedDict
+import numpy as np
+
+class QValueCache:
+    """
+    Bounded LRU cache of Q-values in front of a network. Observations are keyed on their
+    values rounded to multiples of `quantum` (None keys on the exact values), so repeated or
+    nearly identical inputs (e.g. every lane "far" at 1.0) skip the forward pass.
+    q_fn maps one observation to its Q-values; call invalidate() whenever its weights change.
+    """
+    def __init__(self, q_fn, quantum=1e-3, max_size=65_536):
+        self.q_fn, self.quantum, self.max_size = q_fn, quantum, max_size
+        self._cache = OrderedDict()
+        self.hits = self.misses = self.invalidations = 0
+
+    def key(self, obs):
+        if self.quantum is None:
+            return tuple(obs)
+        inv = 1.0 / self.quantum
+        return tuple(int(round(v * inv)) for v in obs)
+
+    def q_values(self, obs):
+        key = self.key(obs)
+        q = self._cache.get(key)
+        if q is not None:
+            self.hits += 1
+            self._cache.move_to_end(key)
+            return q
+        self.misses += 1
+        q = np.array(self.q_fn(obs), dtype=np.float32).reshape(-1)
+        self._cache[key] = q
+        if len(self._cache) > self.max_size:
+            self._cache.popitem(last=False)
+        return q
+
+    def act(self, obs):
+        return int(self.q_values(obs).argmax())
+
+    def invalidate(self):
+        """Drops every entry; hook this to weight updates"""
+        self._cache.clear()
+        self.invalidations += 1
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def state_dict(self):
+        """Entries (oldest first) and counters, for checkpoints; cached arrays are never written in place"""
+        return {"entries": list(self._cache.items()), "hits": self.hits, "misses": self.misses,
+                "invalidations": self.invalidations}
+
+    def load_state_dict(self, state):
+        self._cache = OrderedDict(state["entries"])
+        self.hits, self.misses, self.invalidations = state["hits"], state["misses"], state["invalidations"]
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hit_rate,
+                "size": len(self._cache), "invalidations": self.invalidations}
+
+def torch_q_fn(model):
+    """Single-observation Q-values from a torch QNetwork, as a NumPy array"""
+    import torch
+
+    def q_fn(obs):
+        with torch.no_grad():
+            return model(torch.tensor(obs, dtype=torch.float32)).numpy()
+    return q_fn
@@ -0,0 +1,79 @@
+# agents/qnet_numpy.py
+import numpy as np
+
+def state_dict_to_arrays(state):
+    """QNetwork state dict -> float32 w{i} (in, out) / b{i} arrays, one pair per Linear layer"""
+    layers = sorted({int(k.split(".")[1]) for k in state if k.startswith("net.") and k.endswith(".weight")})
+    arrays = {}
+    for i, idx in enumerate(layers):
+        arrays[f"w{i}"] = state[f"net.{idx}.weight"].detach().cpu().numpy().T.astype(np.float32)
+        arrays[f"b{i}"] = state[f"net.{idx}.bias"].detach().cpu().numpy().astype(np.float32)
+    return arrays
+
+def export_qnetwork(state_dict_or_path, out_path="dqn_agent.npz"):
+    """Converts a QNetwork state dict (or a torch.save'd one) into a .npz. Only this needs torch."""
+    state = state_dict_or_path
+    if isinstance(state, str):
+        import torch
+        state = torch.load(state, map_location="cpu")
+    np.savez(out_path, **state_dict_to_arrays(state))
+    return out_path
+
+class NumpyQNetwork:
+    """
+    Torch-free forward pass of a QNetwork MLP (Linear-ReLU-...-Linear) from an exported
+    .npz. Activations live in buffers preallocated per batch size, so repeated calls at the
+    same size do not allocate.
+    """
+    def __init__(self, path_or_arrays="dqn_agent.npz"):
+        arrays = np.load(path_or_arrays) if isinstance(path_or_arrays, str) else path_or_arrays
+        self._buffers = {}
+        self.load_arrays(arrays)
+
+    @classmethod
+    def from_state_dict(cls, state):
+        return cls(state_dict_to_arrays(state))
+
+    def load_arrays(self, arrays):
+        n = len([k for k in arrays.keys() if k.startswith("w")])
+        self.weights = [np.ascontiguousarray(arrays[f"w{i}"], dtype=np.float32) for i in range(n)]
+        self.biases = [np.ascontiguousarray(arrays[f"b{i}"], dtype=np.float32) for i in range(n)]
+        self.obs_dim, self.n_actions = self.weights[0].shape[0], self.weights[-1].shape[1]
+        self._buffers.clear()
+
+    def load_state_dict(self, state):
+        """Swaps in new weights from a QNetwork state dict (e.g. after a learner update)"""
+        self.load_arrays(state_dict_to_arrays(state))
+
+    def _buffers_for(self, batch):
+        bufs = self._buffers.get(batch)
+        if bufs is None:
+            bufs = [np.empty((batch, self.obs_dim), dtype=np.float32)]
+            bufs += [np.empty((batch, w.shape[1]), dtype=np.float32) for w in self.weights]
+            self._buffers[batch] = bufs
+        return bufs
+
+    def q_values(self, obs):
+        """(N, obs_dim) -> (N, n_actions) Q-values. The result is a reused buffer; copy to keep it."""
+        obs = np.asarray(obs)
+        if obs.ndim == 1:
+            obs = obs[None, :]
+        bufs = self._buffers_for(len(obs))
+        x = bufs[0]
+        x[...] = obs
+        last = len(self.weights) - 1
+        for i, (w, b) in enumerate(zip(self.weights, self.biases)):
+            out = bufs[i + 1]
+            np.matmul(x, w, out=out)
+            out += b
+            if i < last:
+                np.maximum(out, 0.0, out=out)
+            x = out
+        return x
+
+    def act(self, obs):
+        """Greedy action for a single observation"""
+        return int(self.q_values(obs)[0].argmax())
+
+    def act_batch(self, obs):
+        return self.q_values(obs).argmax(axis=1)
@@ -0,0 +1,94 @@
+# scripts/background_eval.py
+import os, time, queue, multiprocessing as mp
+from agents.qnet_numpy import NumpyQNetwork, state_dict_to_arrays
+from scripts.eval_engine import run_episodes, summarize
+
+HELD_OUT_SEED = 1_000_000  # eval episodes use seeds from here on, away from training seeds
+
+class _ArrayPolicy:
+    batched = True
+
+    def __init__(self, arrays):
+        self.model = NumpyQNetwork(arrays)
+
+    def __call__(self, obs_batch):
+        return self.model.act_batch(obs_batch).tolist()
+
+def _worker(requests, results, seeds, obstacle_length, concurrent, niceness):
+    if niceness:
+        os.nice(niceness)  # the learner wins any contention for cores
+    episode_seeds = list(enumerate(seeds))
+    while True:
+        job = requests.get()
+        if job is None:
+            return
+        tag, arrays = job
+        start = time.perf_counter()
+        try:
+            records = run_episodes(_ArrayPolicy(arrays), episode_seeds, concurrent, obstacle_length)
+            results.put({"tag": tag, **summarize(records),
+                         "seconds": time.perf_counter() - start})
+        except Exception as e:
+            results.put({"tag": tag, "error": repr(e)})
+
+class BackgroundEvaluator:
+    """
+    Greedy evaluation of QNetwork snapshots in a separate process, on a fixed set of held-out
+    seeds, so the trainer never waits for it. submit() converts a state dict to NumPy arrays
+    and returns at once; one snapshot is evaluated at a time and, while one runs, a newer
+    submission replaces any still waiting. poll() returns the finished results (eval_engine.summarize
+    plus tag and seconds). The worker is torch-free and niced.
+    """
+    def __init__(self, seeds=None, episodes=20, obstacle_length=None, concurrent=64, niceness=10):
+        self.seeds = list(seeds) if seeds is not None else list(range(HELD_OUT_SEED, HELD_OUT_SEED + episodes))
+        ctx = mp.get_context("spawn")
+        self._requests, self._results = ctx.Queue(), ctx.Queue()
+        self._process = ctx.Process(target=_worker, daemon=True, args=(
+            self._requests, self._results, self.seeds, obstacle_length, concurrent, niceness))
+        self._process.start()
+        self._in_flight = None
+        self._waiting = None
+        self.submitted = self.dropped = 0
+
+    def submit(self, state_dict, tag):
+        self.submitted += 1
+        if self._waiting is not None:
+            self.dropped += 1
+        self._waiting = (tag, state_dict_to_arrays(state_dict))
+        self._dispatch()
+
+    def _dispatch(self):
+        if self._in_flight is None and self._waiting is not None:
+            self._in_flight = self._waiting[0]
+            self._requests.put(self._waiting)
+            self._waiting = None
+
+    def poll(self, timeout=None):
+        """Finished results; with a timeout, waits that long for the first one"""
+        out = []
+        while self._in_flight is not None:
+            try:
+                result = self._results.get(timeout=timeout) if timeout and not out else self._results.get_nowait()
+            except queue.Empty:
+                break
+            if "error" in result:
+                raise RuntimeError(f"evaluation of {result['tag']} failed: {result['error']}")
+            self._in_flight = None
+            out.append(result)
+            self._dispatch()
+        return out
+
+    def drain(self):
+        """Blocks until every submitted snapshot that was not replaced has been evaluated"""
+        out = []
+        while self._in_flight is not None:
+            out += self.poll(timeout=1.0)
+            if not self._process.is_alive() and self._in_flight is not None:
+                raise RuntimeError("evaluation worker exited")
+        return out
+
+    def close(self):
+        self._requests.put(None)
+        self._process.join(timeout=10)
+        if self._process.is_alive():
+            self._process.terminate()
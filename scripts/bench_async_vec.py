@@ -0,0 +1,50 @@
+# scripts/bench_async_vec.py
+import os, time
+import numpy as np
+from surfer.env import SurferEnv
+from surfer.async_vec_env import AsyncSurferVecEnv
+
+def serial_rate(n_envs, steps, seed=0):
+    """Steps/s of n_envs SurferEnv stepped in this process, the baseline a worker competes with"""
+    envs = [SurferEnv(seed=seed + i) for i in range(n_envs)]
+    for env in envs:
+        env.reset()
+    actions = np.random.default_rng(seed).integers(0, 3, (steps, n_envs)).tolist()
+    start = time.perf_counter()
+    for row in actions:
+        for env, a in zip(envs, row):
+            if env.step(a)[2]:
+                env.reset()
+    return steps * n_envs / (time.perf_counter() - start)
+
+def bench_async_vec(envs_per_worker=16, steps=2000, max_workers=None, seed=0):
+    """Aggregate steps/s of AsyncSurferVecEnv for 1, 2, 4, ... workers against linear scaling of one worker"""
+    max_workers = max_workers or os.cpu_count() or 1
+    base = serial_rate(envs_per_worker, steps, seed)
+    print(f"serial, {envs_per_worker} envs in-process: {base:10.0f} steps/s")
+    counts = sorted({1, max_workers} | {w for w in (2, 4, 8, 16, 32, 64) if w < max_workers})
+    results, one = {}, None
+    for w in counts:
+        env = AsyncSurferVecEnv(w * envs_per_worker, seed=seed, n_workers=w)
+        try:
+            env.reset()
+            actions = np.random.default_rng(seed).integers(0, 3, (steps, env.n_envs))
+            start = time.perf_counter()
+            for a in actions:
+                env.step_async(a)
+                env.step_wait()
+            elapsed = time.perf_counter() - start
+            stats = env.latency_stats()
+        finally:
+            env.close()
+        rate = steps * w * envs_per_worker / elapsed
+        one = one or rate
+        inside = np.mean([s["mean_ms"] for s in stats])
+        results[w] = rate
+        print(f"{w:3d} workers x {envs_per_worker} envs: {rate:10.0f} steps/s  scaling {rate / one:5.2f}x "
+              f"(linear {w}x)  worker {inside:.3f} ms/step, round trip {1e3 * elapsed / steps:.3f} ms")
+    return base, results
+
+if __name__ == "__main__":
+    print(f"{os.cpu_count()} logical CPUs")
+    bench_async_vec()
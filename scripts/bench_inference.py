@@ -0,0 +1,60 @@
+# scripts/bench_inference.py
+import os, tempfile, time
+import numpy as np
+import torch
+from agents.dqn import QNetwork
+from agents.qnet_numpy import export_qnetwork, NumpyQNetwork
+
+BATCH_SIZES = (1, 4, 16, 64, 256, 1024, 4096)
+
+def _latencies(fn, obs, n):
+    times = np.empty(n)
+    for i in range(n):
+        t = time.perf_counter()
+        fn(obs)
+        times[i] = time.perf_counter() - t
+    return times * 1e6
+
+def bench_inference(model_path="dqn_agent.pt", n=20_000, seed=0):
+    torch.set_num_threads(1)
+    model = QNetwork(6, 3)
+    model.load_state_dict(torch.load(model_path, map_location="cpu"))
+    model.eval()
+    npz = export_qnetwork(model.state_dict(), os.path.join(tempfile.gettempdir(), "bench_qnet.npz"))
+    engine = NumpyQNetwork(npz)
+
+    rng = np.random.default_rng(seed)
+    obs = np.zeros((4096, 6), dtype=np.float32)
+    obs[np.arange(4096), rng.integers(0, 3, 4096)] = 1.0
+    obs[:, 3:] = rng.random((4096, 3))
+    with torch.no_grad():
+        ref = model(torch.from_numpy(obs)).numpy()
+    err = np.abs(engine.q_values(obs) - ref).max()
+    assert np.allclose(engine.q_values(obs), ref, atol=1e-4), err
+    print(f"max |numpy - torch| = {err:.2e}, argmax agreement {np.mean(engine.act_batch(obs) == ref.argmax(1)):.6f}")
+
+    single = obs[0].tolist()
+    def torch_act(o):
+        with torch.no_grad():
+            return model(torch.tensor(o, dtype=torch.float32)).argmax().item()
+    for name, fn in (("torch", torch_act), ("numpy", engine.act)):
+        lat = _latencies(fn, single, n)
+        print(f"{name:5s} single decision: p50 {np.percentile(lat, 50):6.1f}us  p99 {np.percentile(lat, 99):6.1f}us")
+
+    print("batch    torch obs/s    numpy obs/s")
+    for b in BATCH_SIZES:
+        x, xt = obs[:b], torch.from_numpy(obs[:b])
+        reps = max(5, 20_000 // b)
+        t = time.perf_counter()
+        with torch.no_grad():
+            for _ in range(reps):
+                model(xt).argmax(dim=1)
+        torch_rate = reps * b / (time.perf_counter() - t)
+        t = time.perf_counter()
+        for _ in range(reps):
+            engine.act_batch(x)
+        numpy_rate = reps * b / (time.perf_counter() - t)
+        print(f"{b:5d} {torch_rate:14.0f} {numpy_rate:14.0f}")
+
+if __name__ == "__main__":
+    bench_inference()
@@ -0,0 +1,95 @@
+# scripts/bench_inference_server.py
+import os, time, multiprocessing as mp
+from surfer.core import OBSTACLE_LENGTH
+from surfer.env import SurferEnv
+from scripts.inference_server import InferenceServer
+
+def _play(act, seed, steps, obstacle_length, go, results):
+    env = SurferEnv(seed=seed, obstacle_length=obstacle_length)
+    obs = env.reset()
+    act(obs)  # warm up (attach shared memory / first forward) before the clock starts
+    results.put("ready")
+    go.wait()
+    for _ in range(steps):
+        obs, _, done, _ = env.step(act(obs))
+        if done:
+            obs = env.reset()
+    env.close()
+    results.put("done")
+
+def _served_worker(client, seed, steps, obstacle_length, go, results):
+    _play(client.act, seed, steps, obstacle_length, go, results)
+    client.close()
+
+def _local_worker(state_dict, seed, steps, obstacle_length, go, results):
+    """Baseline: a private QNetwork and a batch-1 forward per step in every env process"""
+    import torch
+    from agents.dqn import QNetwork
+    torch.set_num_threads(1)
+    qnet = QNetwork(6, 3)
+    qnet.load_state_dict(state_dict)
+    qnet.eval()
+    def act(obs):
+        with torch.no_grad():
+            return int(qnet(torch.tensor([obs], dtype=torch.float32)).argmax(dim=1))
+    _play(act, seed, steps, obstacle_length, go, results)
+
+def _run(ctx, target, args_for, n_clients, during=None):
+    """Starts n_clients env processes, releases them together once all are set up, returns the wall time (s)"""
+    results, go = ctx.Queue(), ctx.Event()
+    procs = [ctx.Process(target=target, args=(*args_for(i), go, results)) for i in range(n_clients)]
+    for p in procs:
+        p.start()
+    for _ in procs:
+        results.get()
+    start = time.perf_counter()
+    go.set()
+    if during is not None:
+        during()
+    for _ in procs:
+        results.get()
+    wall = time.perf_counter() - start
+    for p in procs:
+        p.join()
+    return wall
+
+def bench_inference_server(n_clients=8, steps=2000, delays_ms=(0.0, 0.5, 2.0), max_batch=64, seed=0):
+    """
+    Actions/s of n_clients env processes acting through one InferenceServer, for several
+    batching windows, against the same processes each running their own batch-1 forward.
+    Weights are republished halfway through every run to exercise hot swaps.
+    """
+    import torch
+    from agents.dqn import QNetwork
+    torch.manual_seed(seed)
+    state = QNetwork(6, 3).state_dict()
+    ctx = mp.get_context("spawn")
+    total = n_clients * steps
+
+    wall = _run(ctx, _local_worker, lambda i: (state, seed + i, steps, OBSTACLE_LENGTH), n_clients)
+    print(f"{n_clients} clients, local batch-1 forwards: {total / wall:9.0f} actions/s")
+    results = {"local": total / wall}
+    for delay in delays_ms:
+        server = InferenceServer(n_clients, state_dict=state, max_batch=max_batch, max_delay_ms=delay)
+        try:
+            def swap():
+                server.metrics(reset=True)  # count only the timed loops
+                time.sleep(0.05)
+                server.publish(QNetwork(6, 3))  # hot swap mid-run
+            wall = _run(ctx, _served_worker, lambda i: (server.client(i), seed + i, steps, OBSTACLE_LENGTH),
+                        n_clients, during=swap)
+        finally:
+            m = server.close()
+        results[delay] = m
+        print(f"max_delay {delay:4.1f} ms: {total / wall:9.0f} actions/s  "
+              f"mean batch {m['mean_batch']:5.2f}  weight swaps {m['weight_swaps']}")
+        for size, b in m["by_batch_size"].items():
+            lat = b["latency_us"]
+            print(f"    batch <={size:3d}: {b['batches']:6d} batches  latency p50 {lat['p50']:7.0f} p90 {lat['p90']:7.0f} "
+                  f"p99 {lat['p99']:7.0f} us  wait {b['wait_mean_us']:6.0f} us  forward {b['forward_mean_us']:6.0f} us "
+                  f"({b['forward_us_per_request']:5.1f} us/request)")
+    return results
+
+if __name__ == "__main__":
+    print(f"{os.cpu_count()} logical CPUs")
+    bench_inference_server()
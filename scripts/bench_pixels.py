@@ -0,0 +1,69 @@
+# scripts/bench_pixels.py
+import os, time
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+import numpy as np
+from surfer.config import WIDTH, HEIGHT, LANES, LANE_WIDTH
+from surfer.core import compute_lane_centers, draw_lanes
+from surfer.env import SurferEnv
+from surfer.pixels import PixelRenderer, PixelVecEnv
+
+def reference_frame(env, height, width):
+    """The pygame drawing of a SurferEnv state (lanes, obstacles, player) as luma, box-filtered to (height, width)"""
+    import pygame
+    surface = pygame.Surface((WIDTH, HEIGHT))
+    surface.fill((20, 20, 20))
+    draw_lanes(surface, compute_lane_centers(WIDTH, LANES, LANE_WIDTH), LANE_WIDTH, HEIGHT)
+    for obs, _ in env.obstacles:
+        pygame.draw.rect(surface, "WHITE", tuple(obs))
+    pygame.draw.rect(surface, "RED", tuple(env.player))
+    rgb = pygame.surfarray.array3d(surface).transpose(1, 0, 2).astype(np.float32)
+    luma = rgb @ np.array([0.299, 0.587, 0.114], dtype=np.float32)
+    ys = np.arange(height + 1) * HEIGHT // height
+    xs = np.arange(width + 1) * WIDTH // width
+    rows = np.add.reduceat(luma, ys[:-1], axis=0) / np.diff(ys)[:, None]
+    return np.add.reduceat(rows, xs[:-1], axis=1) / np.diff(xs)
+
+def check_against_pygame(height=84, width=56, steps=400, seed=0):
+    """Mean / 99th percentile absolute error of PixelRenderer vs the downscaled pygame frame"""
+    env = SurferEnv(seed=seed)
+    env.reset()
+    renderer = PixelRenderer(1, height, width)
+    rng = np.random.default_rng(seed)
+    errors = []
+    for _ in range(steps):
+        if env.step(int(rng.integers(3)))[2]:
+            env.reset()
+        errors.append(np.abs(renderer.render_envs([env])[0].astype(np.float32) - reference_frame(env, height, width)))
+    errors = np.stack(errors)
+    print(f"vs pygame at {height}x{width}: mean |err| {errors.mean():.2f}, p99 {np.percentile(errors, 99):.1f} "
+          f"(of 255; edges only differ by partial coverage)")
+    return errors
+
+def bench_pixels(sizes=(1, 64, 256, 1024), height=84, width=56, frame_stack=4, min_time=1.0, seed=0):
+    """Frames/s of rasterizing a VecSurferEnv batch alone, and of stepping + rendering with stacking"""
+    results = {}
+    for n in sizes:
+        env = PixelVecEnv(n, seed=seed, height=height, width=width, frame_stack=frame_stack)
+        env.reset()
+        rng = np.random.default_rng(seed)
+        actions = rng.integers(0, 3, (64, n))
+        for a in actions:  # populate the screen
+            env.step(a)
+        render = env.renderer.render_vec
+        calls, t = 0, time.perf_counter()
+        while time.perf_counter() - t < min_time:
+            render(env.env)
+            calls += 1
+        render_fps = calls * n / (time.perf_counter() - t)
+        calls, t = 0, time.perf_counter()
+        while time.perf_counter() - t < min_time:
+            env.step(actions[calls % len(actions)])
+            calls += 1
+        step_fps = calls * n / (time.perf_counter() - t)
+        results[n] = (render_fps, step_fps)
+        print(f"N={n:5d}  render {render_fps:10.0f} frames/s   step+render+stack({frame_stack}) {step_fps:10.0f} frames/s")
+    return results
+
+if __name__ == "__main__":
+    check_against_pygame()
+    bench_pixels()
@@ -0,0 +1,52 @@
+# scripts/bench_planner.py
+import copy, time
+from statistics import mean, median
+from surfer.env import SurferEnv
+from agents.heuristic import heuristic_policy
+from agents.planner import LookaheadPlanner
+
+def bench_snapshots(n=20_000, seed=0):
+    """get_state/set_state round trips per second on a mid-episode env, vs copy.deepcopy"""
+    env = SurferEnv(seed=seed)
+    obs = env.reset()
+    for _ in range(600):
+        obs, _, done, _ = env.step(heuristic_policy(obs))
+        if done:
+            obs = env.reset()
+    state = env.get_state()
+    t = time.perf_counter()
+    for _ in range(n):
+        env.set_state(env.get_state())
+    clones = n / (time.perf_counter() - t)
+    t = time.perf_counter()
+    for _ in range(n // 20):
+        copy.deepcopy(env)
+    deep = (n // 20) / (time.perf_counter() - t)
+    env.set_state(state)
+    print(f"snapshot round trips/sec {clones:10.0f} | deepcopy/sec {deep:8.0f}")
+    return clones
+
+def eval_planner(planner, episodes=5, seed=0, max_frames=20_000):
+    """Plays planner episodes; returns (scores, decisions/sec)"""
+    env = SurferEnv(seed=seed)
+    scores, decisions, spent = [], 0, 0.0
+    for _ in range(episodes):
+        env.reset()
+        done = False
+        while not done and env.steps < max_frames:
+            t = time.perf_counter()
+            action = planner.act(env)
+            spent += time.perf_counter() - t
+            decisions += 1
+            _, _, done, info = env.step(action, repeat=planner.frames_per_decision)
+        scores.append(env.score)
+    env.close()
+    return scores, decisions / spent
+
+if __name__ == "__main__":
+    bench_snapshots()
+    for budget in (0.001, 0.005):
+        planner = LookaheadPlanner(time_budget=budget)
+        scores, dps = eval_planner(planner, episodes=5)
+        print(f"planner budget={budget * 1000:.0f}ms | decisions/sec {dps:7.1f} | rollouts {planner.rollouts} | "
+              f"mean={mean(scores):.1f} median={median(scores)} best={max(scores)} worst={min(scores)}")
@@ -0,0 +1,58 @@
+# scripts/bench_qcache.py
+import time
+import numpy as np
+from surfer.env import SurferEnv
+from agents.qnet_numpy import NumpyQNetwork
+from agents.qcache import QValueCache
+
+QUANTA = (None, 1e-4, 1e-3, 1e-2, 5e-2)
+
+def _play(act, episodes, seed):
+    """Decision throughput, actions and scores over `episodes` serial games"""
+    actions, scores, decide = [], [], 0.0
+    for e in range(episodes):
+        env = SurferEnv(seed=seed + e)
+        obs, done = env.reset(), False
+        while not done:
+            t = time.perf_counter()
+            a = act(obs)
+            decide += time.perf_counter() - t
+            actions.append(a)
+            obs, _, done, info = env.step(a)
+        scores.append(info["score"])
+        env.close()
+    return np.array(actions), scores, decide
+
+def bench_qcache(model_path="dqn_agent.pt", episodes=10, seed=0):
+    """
+    Hit rate, decisions/sec and agreement with the uncached policy for several key quanta.
+    Agreement is measured on the uncached trajectories, so it isolates rounding error from
+    the drift that a single flipped action causes downstream.
+    """
+    if model_path.endswith(".npz"):
+        engine = NumpyQNetwork(model_path)
+    else:
+        import torch
+        engine = NumpyQNetwork.from_state_dict(torch.load(model_path, map_location="cpu"))
+    q_fn = lambda obs: engine.q_values(obs)[0]
+
+    ref_actions, ref_scores, ref_time = _play(engine.act, episodes, seed)
+    observations = []
+    for e in range(episodes):
+        env = SurferEnv(seed=seed + e)
+        obs, done = env.reset(), False
+        while not done:
+            observations.append(obs)
+            obs, _, done, _ = env.step(engine.act(obs))
+    print(f"uncached: {len(ref_actions) / ref_time:10.0f} decisions/s | mean score {np.mean(ref_scores):.1f}")
+
+    print("quantum    hit rate   decisions/s   agreement   mean score")
+    for quantum in QUANTA:
+        cache = QValueCache(q_fn, quantum=quantum)
+        agree = np.mean([cache.act(o) == a for o, a in zip(observations, ref_actions)])
+        cache = QValueCache(q_fn, quantum=quantum)
+        actions, scores, decide = _play(cache.act, episodes, seed)
+        print(f"{str(quantum):8s} {cache.hit_rate:10.3f} {len(actions) / decide:13.0f} {agree:11.4f} {np.mean(scores):12.1f}")
+
+if __name__ == "__main__":
+    bench_qcache()
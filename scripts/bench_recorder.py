@@ -0,0 +1,70 @@
+# scripts/bench_recorder.py
+import os, shutil, tempfile, time, random
+import numpy as np
+from surfer.env import SurferEnv
+from surfer.vec_env import VecSurferEnv
+from surfer.trajectory import TrajectoryWriter, TrajectoryDataset
+from agents.heuristic import heuristic_policy
+
+def _steps_per_sec(env, actions, policy=None):
+    obs = env.reset()
+    t = time.perf_counter()
+    for a in actions:
+        obs, _, done, _ = env.step(a if policy is None else policy(obs))
+        if done:
+            obs = env.reset()
+    return len(actions) / (time.perf_counter() - t)
+
+class _NullRecorder:
+    """Recorder that stores nothing: the cost of the env's recording hook alone"""
+    def new_episode(self):
+        return 0
+
+    def record(self, obs, action, reward, done, episode):
+        pass
+
+def bench_recorder(steps=300_000, n_envs=256, vec_steps=2_000, seed=0):
+    """Recording overhead on SurferEnv / VecSurferEnv, and memory-mapped dataset access"""
+    root = tempfile.mkdtemp(prefix="bench_traj_")
+    try:
+        rng = random.Random(seed)
+        actions = [rng.randrange(3) for _ in range(steps)]
+        plain = _steps_per_sec(SurferEnv(seed=seed), actions)
+        hook = _steps_per_sec(SurferEnv(seed=seed, recorder=_NullRecorder()), actions)
+        print(f"hook only     {hook:10.0f} steps/s ({100 * (plain / hook - 1):.1f}% overhead, the floor for any recorder)")
+        for name, policy in (("SurferEnv", None), ("+heuristic", heuristic_policy)):
+            plain = _steps_per_sec(SurferEnv(seed=seed), actions, policy)
+            with TrajectoryWriter(os.path.join(root, name)) as writer:
+                recorded = _steps_per_sec(SurferEnv(seed=seed, recorder=writer), actions, policy)
+            print(f"{name:13s} {plain:10.0f} steps/s | recording {recorded:10.0f} steps/s "
+                  f"({100 * (plain / recorded - 1):.1f}% overhead, {1e9 * (1 / recorded - 1 / plain):.0f} ns/step)")
+
+        vec_actions = np.random.default_rng(seed).integers(0, 3, (vec_steps, n_envs))
+        rates = []
+        for recorder in (None, TrajectoryWriter(os.path.join(root, "vec"), stride=n_envs)):
+            env = VecSurferEnv(n_envs, seed=seed, recorder=recorder)
+            t = time.perf_counter()
+            for a in vec_actions:
+                env.step(a)
+            rates.append(vec_steps * n_envs / (time.perf_counter() - t))
+            if recorder is not None:
+                recorder.close()
+        print(f"VecSurferEnv  {rates[0]:10.0f} steps/s | recording {rates[1]:10.0f} steps/s "
+              f"({100 * (rates[0] / rates[1] - 1):.1f}% overhead)")
+
+        t = time.perf_counter()
+        ds = TrajectoryDataset(os.path.join(root, "vec"))
+        opened = time.perf_counter() - t
+        size = sum(os.path.getsize(os.path.join(ds.path, f)) for f in os.listdir(ds.path))
+        gen = np.random.default_rng(seed)
+        t = time.perf_counter()
+        for _ in range(1000):
+            ds.sample(64, gen)
+        sample_us = (time.perf_counter() - t) / 1000 * 1e6
+        print(f"dataset: {len(ds)} transitions, {size / 1e6:.1f} MB ({size / len(ds):.1f} B/transition), "
+              f"open {opened * 1e3:.2f} ms, sample(64) {sample_us:.0f} us")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+if __name__ == "__main__":
+    bench_recorder()
@@ -0,0 +1,84 @@
+# scripts/bench_render.py
+import os, time, random
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+import pygame
+from surfer.config import WIDTH, HEIGHT, LANES, LANE_WIDTH, PLAYER_WIDTH, PLAYER_HEIGHT, GROUND_Y, make_fonts
+from surfer.core import compute_lane_centers, draw_lanes, make_obstacle
+from surfer.render import GlyphCache, Label, Renderer
+
+def _scenes(frames, n_obstacles, seed):
+    """Per-frame obstacle rects scrolling down their lanes, like the game at a fixed speed"""
+    rng = random.Random(seed)
+    centers = compute_lane_centers(WIDTH, LANES, LANE_WIDTH)
+    obs = [(rng.randrange(LANES), rng.randrange(-600, HEIGHT)) for _ in range(n_obstacles)]
+    for f in range(frames):
+        yield [pygame.Rect(tuple(make_obstacle(centers, LANE_WIDTH, lane, (y + 8 * f) % (HEIGHT + 600) - 600, 120)))
+               for lane, y in obs], f
+
+def bench_render(frames=600, n_obstacles=6, seed=0):
+    """Per-frame work of the old full redraw vs the cached, dirty-rect Renderer (headless)"""
+    pygame.init()
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    _, small = make_fonts()
+    centers = compute_lane_centers(WIDTH, LANES, LANE_WIDTH)
+    player = pygame.Rect(0, 0, PLAYER_WIDTH, PLAYER_HEIGHT)
+    player.center = (centers[1], GROUND_Y)
+    red, white = pygame.Color("RED"), pygame.Color("WHITE")
+
+    def full(rects, f):
+        screen.fill((20, 20, 20))
+        draw_lanes(screen, centers, LANE_WIDTH, HEIGHT)
+        pygame.draw.rect(screen, "RED", player)
+        for r in rects:
+            pygame.draw.rect(screen, "WHITE", r)
+        score = small.render(f"Score: {f * 7}", True, (220, 220, 220))
+        diff = small.render(f"diff: {round(1 + f / 1000, 2)}", True, (220, 220, 220))
+        screen.blit(score, (WIDTH * 0.8 - score.get_width() // 2, HEIGHT * 0.1))
+        screen.blit(diff, (WIDTH * 0.8 - diff.get_width() // 2, HEIGHT * 0.1 + 20))
+        pygame.display.flip()
+
+    renderer = Renderer(screen, centers, LANE_WIDTH)
+    glyphs = GlyphCache(small, (220, 220, 220))
+    score_label = Label(glyphs, "Score: {}", int(WIDTH * 0.8), int(HEIGHT * 0.1))
+    diff_label = Label(glyphs, "diff: {}", int(WIDTH * 0.8), int(HEIGHT * 0.1 + 20))
+    pushed = []
+    update = pygame.display.update
+
+    def counting_update(rects):
+        pushed.append(sum(r.w * r.h for r in rects))
+        update(rects)
+
+    def dirty(rects, f):
+        renderer.draw([(player, red)] + [(r, white) for r in rects],
+                      [score_label.set(f * 7), diff_label.set(round(1 + f / 1000, 2))])
+
+    results = {}
+    for name, draw in (("full redraw", full), ("dirty rects", dirty)):
+        pygame.display.update = counting_update
+        t = time.perf_counter()
+        for rects, f in _scenes(frames, n_obstacles, seed):
+            draw(rects, f)
+        results[name] = (time.perf_counter() - t) / frames * 1000
+        pygame.display.update = update
+        print(f"{name:12s} {results[name]:6.3f} ms/frame")
+    print(f"dirty rects push {sum(pushed) / len(pushed) / (WIDTH * HEIGHT):.1%} of the screen per frame on average")
+
+    # without text the two paths must produce the same pixels
+    def no_text_full(rects):
+        screen.fill((20, 20, 20))
+        draw_lanes(screen, centers, LANE_WIDTH, HEIGHT)
+        pygame.draw.rect(screen, "RED", player)
+        for r in rects:
+            pygame.draw.rect(screen, "WHITE", r)
+    renderer.invalidate()
+    for rects, f in _scenes(50, n_obstacles, seed + 1):
+        renderer.draw([(player, red)] + [(r, white) for r in rects])
+    expected = screen.copy()
+    no_text_full(rects)
+    same = pygame.image.tobytes(expected, "RGB") == pygame.image.tobytes(screen, "RGB")
+    print(f"pixel-identical to full redraw: {same}")
+    pygame.quit()
+    return results
+
+if __name__ == "__main__":
+    bench_render()
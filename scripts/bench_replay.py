@@ -0,0 +1,51 @@
+# scripts/bench_replay.py
+import time, random, collections
+import numpy as np
+import torch
+from surfer.env import SurferEnv
+from agents.dqn import ReplayBuffer
+
+class DequeReplay:
+    """The original list-of-tuples buffer, as the baseline"""
+    def __init__(self, capacity=100_000):
+        self.buffer = collections.deque(maxlen=capacity)
+
+    def push(self, obs, action, reward, next_obs, done):
+        self.buffer.append((obs, action, reward, next_obs, done))
+
+    def sample(self, batch_size):
+        obs, acts, rews, next_obs, dones = zip(*random.sample(self.buffer, batch_size))
+        return (torch.tensor(obs, dtype=torch.float32), torch.tensor(acts, dtype=torch.long),
+                torch.tensor(rews, dtype=torch.float32), torch.tensor(next_obs, dtype=torch.float32),
+                torch.tensor(dones, dtype=torch.float32))
+
+def fill(buffers, n, seed=0):
+    """Pushes n SurferEnv transitions under random actions into every buffer"""
+    env, rng = SurferEnv(seed=seed), random.Random(seed)
+    obs = env.reset()
+    for _ in range(n):
+        action = rng.randrange(3)
+        next_obs, reward, done, _ = env.step(action)
+        for b in buffers:
+            b.push(obs, action, reward, next_obs, done)
+        obs = env.reset() if done else next_obs
+
+def bench_replay(capacity=100_000, batch_size=64, calls=2000, seed=0):
+    """sample(batch_size) time of the deque baseline and ReplayBuffer, filled from SurferEnv"""
+    base, buf = DequeReplay(capacity), ReplayBuffer(capacity)
+    fill((base, buf), capacity, seed)
+    results = {}
+    for name, b in (("deque", base), ("ReplayBuffer", buf)):
+        best = float("inf")
+        for _ in range(5):
+            t = time.perf_counter()
+            for _ in range(calls):
+                b.sample(batch_size)
+            best = min(best, (time.perf_counter() - t) / calls)
+        results[name] = best * 1e6
+        print(f"{name:13s} sample({batch_size}) {best * 1e6:7.1f} us")
+    print(f"speedup {results['deque'] / results['ReplayBuffer']:.1f}x | ReplayBuffer {buf.nbytes() / 2**20:.1f} MB")
+    return results
+
+if __name__ == "__main__":
+    bench_replay()
@@ -0,0 +1,263 @@
+# scripts/bench_suite.py
+import os, sys, io, json, time, random, fnmatch, platform, argparse, subprocess, contextlib, tempfile
+from collections import deque
+import numpy as np
+import torch
+
+from surfer.config import WIDTH, LANES, LANE_WIDTH, PLAYER_WIDTH, PLAYER_HEIGHT, GROUND_Y, MIN_SPAWN_INTERVAL, EnvConfig
+from surfer.core import Box, OBSTACLE_LENGTH, compute_lane_centers, make_obstacle
+from surfer.env import SurferEnv, extract_state, extract_state_lanes
+from agents.heuristic import heuristic_policy, heuristic_policy_batch
+from agents.dqn import ReplayBuffer, QNetwork
+
+# Every result is a rate (higher is better), so one regression rule covers the whole suite.
+BENCHMARKS = {}
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_THRESHOLDS = os.path.join(HERE, "bench_thresholds.json")
+# metadata that has to match for a baseline's numbers to mean anything on this machine
+COMPARABLE_META = ("processor", "cpu_count", "python", "numpy", "torch", "torch_threads")
+
+def benchmark(name):
+    def register(fn):
+        BENCHMARKS[name] = fn
+        return fn
+    return register
+
+def measure(fn, ops_per_call=1, min_time=0.2, repeat=3):
+    """Best-of-`repeat` rate of fn(), each run calling it until min_time has elapsed"""
+    best = 0.0
+    for _ in range(repeat):
+        calls, start = 0, time.perf_counter()
+        while True:
+            fn()
+            calls += 1
+            elapsed = time.perf_counter() - start
+            if elapsed >= min_time:
+                break
+        best = max(best, calls * ops_per_call / elapsed)
+    return best
+
+@benchmark("env")
+def bench_env(min_time):
+    """SurferEnv.reset, and step from snapshots at increasing elapsed time (obstacle speed)"""
+    env = SurferEnv(seed=0)
+    out = {"env.reset": (measure(env.reset, min_time=min_time), "resets/s")}
+    rng = random.Random(0)
+    actions = [rng.randrange(3) for _ in range(4096)]
+    for seconds in (0, 20, 60):
+        env.reset()
+        env.set_state((seconds * env.target_fps, 0, MIN_SPAWN_INTERVAL, 1, False, env.rand.getstate()))
+        snapshot = env.get_state()
+        def run():
+            for a in actions:
+                if env.step(a)[2]:
+                    env.set_state(snapshot)
+        speed = env.obstacle_speed
+        out[f"env.step[t={seconds}s]"] = (measure(run, len(actions), min_time), f"steps/s @ speed {speed:.0f}")
+    return out
+
+@benchmark("obs")
+def bench_obs(min_time):
+    """extract_state / extract_state_lanes with 0..16 obstacles on screen"""
+    lane_centers = compute_lane_centers(WIDTH, LANES, LANE_WIDTH)
+    player = Box(0, 0, PLAYER_WIDTH, PLAYER_HEIGHT)
+    player.centerx, player.centery = lane_centers[1], GROUND_Y
+    rng = random.Random(0)
+    out = {}
+    for n in (0, 1, 4, 16):
+        obstacles = [(make_obstacle(lane_centers, LANE_WIDTH, lane, y, OBSTACLE_LENGTH), lane)
+                     for lane, y in sorted(((rng.randrange(LANES), rng.randrange(-560, 700)) for _ in range(n)),
+                                           key=lambda o: -o[1])]
+        lanes = [deque() for _ in range(LANES)]
+        for box, lane in obstacles:
+            lanes[lane].append(box)
+        out[f"obs.extract_state[n={n}]"] = (
+            measure(lambda: extract_state(player, 1, obstacles, 500.0), min_time=min_time), "calls/s")
+        out[f"obs.extract_state_lanes[n={n}]"] = (
+            measure(lambda: extract_state_lanes(player, 1, lanes, 500.0), min_time=min_time), "calls/s")
+    return out
+
+@benchmark("lanes")
+def bench_lanes(min_time):
+    """SurferEnv.step (stay, one frame) across EnvConfig lane counts and lookahead K, with lengths in the obs"""
+    out = {}
+    for lanes in (3, 5, 9):
+        for k in (1, 2, 4, 8):
+            config = EnvConfig(width=(lanes + 1) * LANE_WIDTH, lanes=lanes, lookahead=k, obs_lengths=True)
+            env = SurferEnv(seed=0, obstacle_length=OBSTACLE_LENGTH, config=config)
+            env.reset()
+            env.set_state((30 * env.target_fps, 0, MIN_SPAWN_INTERVAL, lanes // 2, False, env.rand.getstate()))
+            for _ in range(300):  # fill the screen
+                env.step(0)
+            snapshot = env.get_state()
+            def run():
+                for _ in range(1024):
+                    if env.step(0)[2]:
+                        env.set_state(snapshot)
+            out[f"lanes.step[L={lanes},K={k}]"] = (measure(run, 1024, min_time), f"steps/s, obs_dim {config.obs_dim}")
+    return out
+
+@benchmark("heuristic")
+def bench_heuristic(min_time):
+    rng = np.random.default_rng(0)
+    batch = np.zeros((4096, 6), dtype=np.float32)
+    batch[np.arange(4096), rng.integers(0, 3, 4096)] = 1.0
+    batch[:, 3:] = rng.random((4096, 3))
+    rows = batch.tolist()
+    def single():
+        for o in rows:
+            heuristic_policy(o)
+    return {
+        "heuristic.policy": (measure(single, len(rows), min_time), "decisions/s"),
+        "heuristic.policy_batch[4096]": (measure(lambda: heuristic_policy_batch(batch), 4096, min_time), "decisions/s"),
+    }
+
+@benchmark("replay")
+def bench_replay(min_time):
+    """ReplayBuffer.push (episode-linked transitions) and sample(64) at several capacities"""
+    rng = np.random.default_rng(0)
+    obs = np.zeros((1024, 6), dtype=np.float32)
+    obs[np.arange(1024), rng.integers(0, 3, 1024)] = 1.0
+    obs[:, 3:] = rng.random((1024, 3))
+    rows = [o.tolist() for o in obs]
+    out = {}
+    for capacity in (10_000, 100_000, 1_000_000):
+        buf = ReplayBuffer(capacity=capacity)
+        def push():
+            for i in range(len(rows) - 1):
+                buf.push(rows[i], i % 3, 1.0, rows[i + 1], i % 200 == 199)
+        out[f"replay.push[cap={capacity}]"] = (measure(push, len(rows) - 1, min_time), "transitions/s")
+        while len(buf) < min(capacity, 50_000):
+            push()
+        out[f"replay.sample64[cap={capacity}]"] = (measure(lambda: buf.sample(64), 1, min_time), "batches/s")
+    return out
+
+@benchmark("qnet")
+def bench_qnet(min_time):
+    """QNetwork forward (no_grad) and forward+backward, in samples/s"""
+    torch.manual_seed(0)
+    model = QNetwork(6, 3)
+    out = {}
+    for b in (1, 64, 256, 1024):
+        x = torch.rand(b, 6)
+        def forward():
+            with torch.no_grad():
+                model(x)
+        def backward():
+            model.zero_grad()
+            model(x).sum().backward()
+        out[f"qnet.forward[b={b}]"] = (measure(forward, b, min_time), "samples/s")
+        out[f"qnet.backward[b={b}]"] = (measure(backward, b, min_time), "samples/s")
+    return out
+
+@benchmark("train")
+def bench_train(min_time):
+    """End-to-end train_dqn: env steps with one Double-DQN update each, after a short warmup (both rates over the whole run)"""
+    from scripts.train_dqn import train_dqn
+    episodes = max(2, int(10 * min_time))
+    with contextlib.redirect_stdout(io.StringIO()):
+        r = train_dqn(episodes=episodes, warmup_steps=64, epsilon_decay_steps=1,
+                      save_path=os.path.join(tempfile.gettempdir(), "bench_suite_dqn.pt"))
+    return {"train.steps": (r["steps"] / r["seconds"], "steps/s"),
+            "train.updates": (r["updates"] / r["seconds"], "updates/s")}
+
+def environment_metadata():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=HERE).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "torch": torch.__version__,
+        "torch_threads": torch.get_num_threads(),
+        "git_commit": commit,
+    }
+
+def run_suite(only=None, min_time=0.2):
+    """Runs the benchmarks whose group name contains `only` (all by default)"""
+    results = {}
+    for group, fn in BENCHMARKS.items():
+        if only and only not in group:
+            continue
+        for name, (value, unit) in fn(min_time).items():
+            results[name] = {"value": value, "unit": unit}
+            print(f"{name:36s} {value:14.0f} {unit}")
+    return {"meta": environment_metadata(), "results": results}
+
+def threshold_for(name, thresholds, default):
+    """A benchmark's exact entry in `thresholds`, else the first matching glob pattern (e.g. "qnet.*")"""
+    if name in thresholds:
+        return thresholds[name]
+    for pattern, limit in thresholds.items():
+        if fnmatch.fnmatchcase(name, pattern):
+            return limit
+    return default
+
+def meta_mismatches(report, baseline):
+    """COMPARABLE_META fields that differ between two reports"""
+    mine, theirs = report["meta"], baseline.get("meta", {})
+    return {k: (theirs.get(k), mine.get(k)) for k in COMPARABLE_META if theirs.get(k) != mine.get(k)}
+
+def compare(report, baseline, threshold=0.10, thresholds=None):
+    """
+    Lists benchmarks whose rate dropped more than `threshold` (a fraction) below the
+    baseline; `thresholds` overrides it per benchmark name or glob pattern. Returns the
+    regressions.
+    """
+    thresholds = thresholds or {}
+    regressions = []
+    for name, base in baseline["results"].items():
+        cur = report["results"].get(name)
+        if cur is None:
+            continue
+        change = cur["value"] / base["value"] - 1.0
+        limit = threshold_for(name, thresholds, threshold)
+        flag = "REGRESSION" if change < -limit else ""
+        print(f"{name:36s} {base['value']:14.0f} -> {cur['value']:14.0f} {100 * change:+7.1f}% {flag}")
+        if flag:
+            regressions.append({"name": name, "baseline": base["value"], "value": cur["value"],
+                                "change": change, "threshold": limit})
+    return regressions
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Headless hot-path benchmarks")
+    p.add_argument("--out", default="bench_results.json")
+    p.add_argument("--baseline", help="earlier --out file to compare against")
+    p.add_argument("--save-baseline", help="also write the results here")
+    p.add_argument("--threshold", type=float, default=0.10, help="allowed fractional slowdown")
+    p.add_argument("--thresholds", default=DEFAULT_THRESHOLDS,
+                   help="JSON file of per-benchmark thresholds (names or glob patterns); '' for none")
+    p.add_argument("--only", help="run groups containing this string: " + ", ".join(BENCHMARKS))
+    p.add_argument("--min-time", type=float, default=0.2, help="seconds per timed run")
+    args = p.parse_args(argv)
+
+    report = run_suite(args.only, args.min_time)
+    for path in filter(None, (args.out, args.save_baseline)):
+        with open(path, "w") as f:
+            json.dump(report, f, indent=2)
+    if not args.baseline:
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    for k, (theirs, mine) in meta_mismatches(report, baseline).items():
+        print(f"warning: baseline {k} is {theirs!r}, this machine has {mine!r}; rates may not be comparable")
+    thresholds = None
+    if args.thresholds:
+        with open(args.thresholds) as f:
+            thresholds = json.load(f)
+    regressions = compare(report, baseline, args.threshold, thresholds)
+    report["regressions"] = regressions
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"{len(regressions)} regression(s) beyond threshold" if regressions else "no regressions")
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
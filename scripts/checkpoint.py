@@ -0,0 +1,82 @@
+# scripts/checkpoint.py
+import os, copy, threading
+import torch
+
+def atomic_save(obj, path):
+    """torch.save to a temp file next to path, then rename over it (readers never see a partial file)"""
+    tmp = f"{path}.tmp.{os.getpid()}.{threading.get_ident()}"
+    torch.save(obj, tmp)
+    os.replace(tmp, path)
+
+def snapshot(obj):
+    """Deep copy of a state dict / nested structure so the live objects can keep changing"""
+    if isinstance(obj, torch.Tensor):
+        return obj.detach().clone()
+    if isinstance(obj, dict):
+        return {k: snapshot(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return type(obj)(snapshot(v) for v in obj)
+    return copy.deepcopy(obj)
+
+class AsyncCheckpointer:
+    """
+    Writes checkpoints on a background thread. save() takes an in-memory snapshot that the
+    caller will not mutate and returns immediately; if a write to the same path is still
+    queued, the newer snapshot replaces it, so a slow disk costs checkpoints, not learner time.
+    Errors are re-raised on the next save()/flush()/close().
+    """
+    def __init__(self):
+        self._pending = {}  # path -> object, in submission order
+        self._cond = threading.Condition()
+        self._busy = False
+        self._closed = False
+        self._error = None
+        self.written = self.dropped = 0
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed:
+                    self._cond.wait()
+                if not self._pending:
+                    return
+                path = next(iter(self._pending))
+                obj = self._pending.pop(path)
+                self._busy = True
+            try:
+                atomic_save(obj, path)
+                self.written += 1
+            except Exception as e:
+                self._error = e
+            with self._cond:
+                self._busy = False
+                self._cond.notify_all()
+
+    def _raise(self):
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    def save(self, obj, path):
+        self._raise()
+        with self._cond:
+            if path in self._pending:
+                self.dropped += 1
+            self._pending[path] = obj
+            self._cond.notify_all()
+
+    def flush(self):
+        """Blocks until everything queued so far is on disk"""
+        with self._cond:
+            while self._pending or self._busy:
+                self._cond.wait()
+        self._raise()
+
+    def close(self):
+        self.flush()
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join()
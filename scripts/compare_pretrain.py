@@ -0,0 +1,60 @@
+# scripts/compare_pretrain.py
+import os, shutil, tempfile, time
+from statistics import mean
+from surfer.env import SurferEnv
+from agents.heuristic import heuristic_policy
+from scripts.train_dqn import train_dqn
+from scripts.pretrain import generate_heuristic_dataset, pretrain_qnetwork
+
+def heuristic_mean_reward(episodes=20, seed=10_000):
+    """Mean episode reward of heuristic_policy, the same quantity train_dqn's avg20 tracks"""
+    rewards = []
+    for e in range(episodes):
+        env = SurferEnv(seed=seed + e)
+        obs, done, total = env.reset(), False, 0.0
+        while not done:
+            obs, r, done, _ = env.step(heuristic_policy(obs))
+            total += r
+        rewards.append(total)
+    return mean(rewards)
+
+def compare_pretrain(seeds=(0, 1, 2), max_episodes=300, dataset_steps=2_000, pretrain_steps=20_000,
+                     target_frac=0.8, target_avg20=None):
+    """
+    Wall-clock for train_dqn to reach avg20 >= target_frac * the heuristic's mean episode
+    reward, from scratch vs seeded with pretrained weights and logged transitions. The
+    pretrained runs are charged for generating the dataset and pretraining.
+    """
+    target_avg20 = target_avg20 or target_frac * heuristic_mean_reward()
+    root = tempfile.mkdtemp(prefix="compare_pretrain_")
+    try:
+        t = time.perf_counter()
+        data = generate_heuristic_dataset(os.path.join(root, "heuristic"), steps=dataset_steps)
+        gen_seconds = time.perf_counter() - t
+        pre = pretrain_qnetwork(data, steps=pretrain_steps, save_path=os.path.join(root, "pretrained.pt"))
+        offline_seconds = gen_seconds + pre["seconds"]
+
+        results = {"scratch": [], "pretrained": []}
+        for seed in seeds:
+            results["scratch"].append(train_dqn(
+                episodes=max_episodes, seed=seed, stop_avg20=target_avg20,
+                save_path=os.path.join(root, f"scratch_{seed}.pt")))
+            results["pretrained"].append(train_dqn(
+                episodes=max_episodes, seed=seed, stop_avg20=target_avg20, init_weights=pre["path"],
+                prefill=data, demo_batch=64, epsilon_start=0.01, epsilon_end=0.01, lr=1e-4,
+                save_path=os.path.join(root, f"pretrained_{seed}.pt")))
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+    print(f"\ntarget avg20={target_avg20:.1f} ({target_frac:.0%} of heuristic mean reward) seeds={list(seeds)} | "
+          f"offline cost {offline_seconds:.1f}s (dataset {gen_seconds:.1f}s + pretrain {pre['seconds']:.1f}s)")
+    for name, runs in results.items():
+        extra = offline_seconds if name == "pretrained" else 0.0
+        hit = [r["reached"] for r in runs if r["reached"] is not None]
+        secs = f"{mean(h['seconds'] for h in hit) + extra:8.1f}s" if hit else "       -"
+        print(f"{name:10s} reached {len(hit)}/{len(runs)} | mean wall-clock {secs} | "
+              f"best avg20 {mean(r['best_avg20'] for r in runs):7.1f}")
+    return results
+
+if __name__ == "__main__":
+    compare_pretrain()
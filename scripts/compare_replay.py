@@ -0,0 +1,27 @@
+# scripts/compare_replay.py
+import os, tempfile
+from statistics import mean
+from scripts.train_dqn import train_dqn
+
+def compare_replay(target_avg20=250.0, seeds=(0, 1, 2), max_episodes=500):
+    """Wall-clock and env steps for uniform vs prioritized replay to reach avg20 >= target"""
+    results = {}
+    for prioritized in (False, True):
+        name = "prioritized" if prioritized else "uniform"
+        runs = []
+        for seed in seeds:
+            out = train_dqn(episodes=max_episodes, seed=seed, prioritized=prioritized,
+                            stop_avg20=target_avg20, save_path=os.path.join(tempfile.gettempdir(), f"compare_{name}_{seed}.pt"))
+            runs.append(out)
+        results[name] = runs
+
+    print(f"\ntarget avg20={target_avg20} seeds={list(seeds)}")
+    for name, runs in results.items():
+        hit = [r["reached"] for r in runs if r["reached"] is not None]
+        secs = f"{mean(h['seconds'] for h in hit):8.1f}s" if hit else "       -"
+        steps = f"{mean(h['step'] for h in hit):9.0f}" if hit else "        -"
+        print(f"{name:12s} reached {len(hit)}/{len(runs)} | mean time {secs} | mean steps {steps}")
+    return results
+
+if __name__ == "__main__":
+    compare_replay()
@@ -1,33 +1,72 @@
 # scripts/eval_dqn.py
-import torch
+import time
 from statistics import mean, median
 from surfer.env import SurferEnv
-from agents.dqn import QNetwork
+from agents.qnet_numpy import NumpyQNetwork
+from agents.qcache import QValueCache, torch_q_fn
+from scripts.eval_engine import QNetworkPolicy, evaluate_parallel, evaluate_sequential
 
-def eval_dqn(model_path="dqn_agent.pt", episodes=50, render=False, seed=0):
+def eval_dqn(model_path="dqn_agent.pt", episodes=50, render=False, seed=0, workers=None, concurrent=64,
+             cache_quantum=None, cache_size=65_536, sequential=False, baseline=None, rel_ci=0.05):
+    """
+    Returns the list of episode scores, like scripts.evaluate.evaluate.
+    workers=N runs headless on the parallel engine with batched forwards (episode e uses seed + e).
+    A .npz model_path (agents.qnet_numpy export) runs without torch.
+    cache_quantum puts a QValueCache keyed on observations rounded to that step in front of
+    the network (serial path) and reports its hit rate.
+    sequential=True evaluates headless until the mean is known to rel_ci or the model is
+    significantly better/worse than `baseline` (e.g. heuristic_policy), at most `episodes`
+    episodes; returns the evaluate_sequential summary.
+    """
+    if sequential:
+        return evaluate_sequential(QNetworkPolicy(model_path), baseline, seed, min_episodes=min(32, episodes),
+                                   max_episodes=episodes, rel_ci=rel_ci, workers=workers, concurrent=concurrent)
+    if workers and not render:
+        records, _ = evaluate_parallel(QNetworkPolicy(model_path), episodes=episodes, seed=seed,
+                                       workers=workers, concurrent=concurrent)
+        return [r["score"] for r in records]
     env = SurferEnv(render=render, target_fps=60, seed=seed)
     obs_dim = len(env.reset())
     n_actions = 3
 
-    model = QNetwork(obs_dim, n_actions)
-    model.load_state_dict(torch.load(model_path, map_location="cpu"))
-    model.eval()
+    if model_path.endswith(".npz"):
+        engine = NumpyQNetwork(model_path)
+        q_fn = lambda obs: engine.q_values(obs)[0]
+    else:
+        import torch
+        from agents.dqn import QNetwork
+        model = QNetwork(obs_dim, n_actions)
+        model.load_state_dict(torch.load(model_path, map_location="cpu"))
+        model.eval()
+        q_fn = torch_q_fn(model)
 
-    scores = []
+    cache = None
+    if cache_quantum is not None:
+        cache = QValueCache(q_fn, quantum=cache_quantum, max_size=cache_size)
+        act = cache.act
+    else:
+        act = lambda obs: int(q_fn(obs).argmax())
+
+    scores, steps = [], 0
+    start = time.perf_counter()
     try:
         for _ in range(episodes):
             obs = env.reset()
             done = False
             while not done:
-                with torch.no_grad():
-                    a = model(torch.tensor(obs, dtype=torch.float32)).argmax().item()
-                obs, r, done, info = env.step(a)
+                obs, r, done, info = env.step(act(obs))
+                steps += 1
             scores.append(info["score"])
     finally:
         env.close()
+    elapsed = time.perf_counter() - start
 
     print(f"episodes={episodes} mean={mean(scores):.1f} median={median(scores)} "
           f"best={max(scores)} worst={min(scores)}")
+    if cache is not None:
+        print(f"cache hit rate {cache.hit_rate:.3f} ({cache.hits} hits, {cache.misses} misses) | "
+              f"actions/sec {steps / elapsed:.0f}")
+    return scores
 
 if __name__ == "__main__":
     eval_dqn(model_path="dqn_agent.pt", episodes=20, render=False)
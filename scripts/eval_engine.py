@@ -0,0 +1,181 @@
+# scripts/eval_engine.py
+import os, math
+from statistics import NormalDist
+from concurrent.futures import ProcessPoolExecutor
+from surfer.core import OBSTACLE_LENGTH
+from surfer.env import SurferEnv
+from scripts.eval_stats import RunningStats
+
+class QNetworkPolicy:
+    """
+    Greedy batched policy over a saved QNetwork state dict, or over a NumPy export (.npz,
+    see agents.qnet_numpy) without importing torch. The network is loaded lazily, so the
+    policy pickles cheaply into worker processes.
+    """
+    batched = True
+
+    def __init__(self, model_path="dqn_agent.pt", obs_dim=6, n_actions=3):
+        self.model_path, self.obs_dim, self.n_actions = model_path, obs_dim, n_actions
+        self.model = None
+
+    def __getstate__(self):
+        return {**self.__dict__, "model": None}
+
+    def setup(self):
+        if self.model_path.endswith(".npz"):
+            from agents.qnet_numpy import NumpyQNetwork
+            self.model = NumpyQNetwork(self.model_path)
+            return
+        import torch
+        from agents.dqn import QNetwork
+        torch.set_num_threads(1)  # one thread per worker; parallelism comes from the pool
+        self.model = QNetwork(self.obs_dim, self.n_actions)
+        self.model.load_state_dict(torch.load(self.model_path, map_location="cpu"))
+        self.model.eval()
+
+    def __call__(self, obs_batch):
+        if self.model is None:
+            self.setup()
+        if self.model_path.endswith(".npz"):
+            return self.model.act_batch(obs_batch).tolist()
+        import torch
+        with torch.no_grad():
+            q = self.model(torch.tensor(obs_batch, dtype=torch.float32))
+        return q.argmax(dim=1).tolist()
+
+def run_episodes(policy, episode_seeds, concurrent=64, obstacle_length=None):
+    """
+    Plays one episode per (episode, seed) pair; each episode gets a fresh SurferEnv(seed), so
+    its outcome does not depend on which worker runs it or what runs next to it. Batched
+    policies see the observations of up to `concurrent` live episodes per call.
+    """
+    batched = getattr(policy, "batched", False)
+    pending = list(reversed(episode_seeds))
+    live, records = [], []
+    while pending or live:
+        while pending and len(live) < concurrent:
+            episode, seed = pending.pop()
+            env = SurferEnv(seed=seed, obstacle_length=obstacle_length)
+            live.append([episode, seed, env, env.reset(), 0])
+        obs = [ep[3] for ep in live]
+        actions = policy(obs) if batched else [policy(o) for o in obs]
+        still_live = []
+        for ep, action in zip(live, actions):
+            ep[3], _, done, info = ep[2].step(action)
+            ep[4] += 1
+            if done:
+                records.append({"episode": ep[0], "seed": ep[1], "score": info["score"],
+                                "time": info["time"], "length": ep[4]})
+                ep[2].close()
+            else:
+                still_live.append(ep)
+        live = still_live
+    return records
+
+def summarize(records, z=1.96):
+    """RunningStats.summary of the episode scores: the one summary layout every evaluator reports"""
+    return RunningStats().extend(r["score"] for r in records).summary(z)
+
+def evaluate_parallel(policy, episodes=50, seed=0, workers=None, concurrent=64, verbose=True):
+    """
+    Fans episodes seed, seed+1, ... out over a process pool. Returns (records, summary) with
+    records sorted by episode; results are identical for any worker count.
+    """
+    workers = workers or os.cpu_count() or 1
+    episode_seeds = [(e, seed + e) for e in range(episodes)]
+    if workers == 1:
+        records = run_episodes(policy, episode_seeds, concurrent, OBSTACLE_LENGTH)
+    else:
+        size = math.ceil(episodes / workers)
+        chunks = [episode_seeds[i:i + size] for i in range(0, episodes, size)]
+        with ProcessPoolExecutor(max_workers=len(chunks)) as pool:
+            futures = [pool.submit(run_episodes, policy, chunk, concurrent, OBSTACLE_LENGTH) for chunk in chunks]
+            records = [r for f in futures for r in f.result()]
+    records.sort(key=lambda r: r["episode"])
+    summary = summarize(records)
+    if verbose:
+        print(f"episodes={summary['episodes']} mean={summary['mean']:.1f} median={summary['median']:.0f} "
+              f"best={summary['best']} worst={summary['worst']}")
+    return records, summary
+
+def run_episode_stats(policy, episode_seeds, concurrent=64, obstacle_length=None, baseline=None):
+    """
+    run_episodes folded into accumulators: (RunningStats of scores, RunningStats of paired
+    score differences against `baseline` played on the same seeds, or None)
+    """
+    scores = {r["seed"]: r["score"] for r in run_episodes(policy, episode_seeds, concurrent, obstacle_length)}
+    stats = RunningStats().extend(scores[s] for _, s in episode_seeds)
+    if baseline is None:
+        return stats, None
+    base = {r["seed"]: r["score"] for r in run_episodes(baseline, episode_seeds, concurrent, obstacle_length)}
+    return stats, RunningStats().extend(scores[s] - base[s] for _, s in episode_seeds)
+
+def evaluate_sequential(policy, baseline=None, seed=0, min_episodes=32, max_episodes=1000, batch=32,
+                        rel_ci=0.05, ci_halfwidth=None, confidence=0.95, workers=None, concurrent=64, verbose=True):
+    """
+    Plays episodes seed, seed+1, ... in batches (split over `workers` processes, whose
+    accumulators are merged) until one of:
+      - "precision": the CI on the mean score is narrower than ci_halfwidth (absolute) or
+        rel_ci * |mean|;
+      - "better" / "worse": with a baseline policy, the CI of the paired per-seed score
+        difference excludes 0 (a number as baseline compares the mean's CI against it);
+      - "equivalent": with a baseline policy, that CI lies within +/- rel_ci * |mean|;
+      - "max_episodes".
+    Stopping is checked after every batch from min_episodes on; the CI level is Bonferroni-
+    corrected over the possible looks, so repeated checking keeps the error rate under
+    1 - confidence. Returns the score summary with "stopped_by", "verdict" and, with a
+    paired baseline, "diff" (summary of the differences).
+    """
+    looks = max(1, math.ceil((max_episodes - min_episodes) / batch) + 1)
+    z = NormalDist().inv_cdf(1 - (1 - confidence) / (2 * looks))
+    paired = baseline is not None and not isinstance(baseline, (int, float))
+    workers = workers or 1
+    stats, diffs = RunningStats(), RunningStats() if paired else None
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    stopped_by = verdict = None
+    try:
+        while stopped_by is None:
+            start = stats.n
+            n = min(max(batch, min_episodes - start), max_episodes - start)
+            episode_seeds = [(e, seed + e) for e in range(start, start + n)]
+            args = (concurrent, OBSTACLE_LENGTH, baseline if paired else None)
+            if pool is None:
+                results = [run_episode_stats(policy, episode_seeds, *args)]
+            else:
+                size = math.ceil(n / workers)
+                results = [f.result() for f in [pool.submit(run_episode_stats, policy, episode_seeds[i:i + size], *args)
+                                                for i in range(0, n, size)]]
+            for s, d in results:
+                stats.merge(s)
+                if paired:
+                    diffs.merge(d)
+
+            half = stats.ci_halfwidth(z)
+            if paired:
+                d_half = diffs.ci_halfwidth(z)
+                if diffs.mean - d_half > 0 or diffs.mean + d_half < 0:
+                    stopped_by = verdict = "better" if diffs.mean > 0 else "worse"
+                elif abs(diffs.mean) + d_half <= rel_ci * abs(stats.mean):
+                    stopped_by = verdict = "equivalent"
+            elif baseline is not None and (stats.mean - half > baseline or stats.mean + half < baseline):
+                stopped_by = verdict = "better" if stats.mean > baseline else "worse"
+            if stopped_by is None and half <= (ci_halfwidth if ci_halfwidth is not None else rel_ci * abs(stats.mean)):
+                stopped_by = "precision"
+            if stopped_by is None and stats.n >= max_episodes:
+                stopped_by = "max_episodes"
+            if verbose:
+                line = f"episodes={stats.n} mean={stats.mean:.1f} +/- {half:.1f}"
+                if paired:
+                    line += f" | vs baseline {diffs.mean:+.1f} +/- {diffs.ci_halfwidth(z):.1f}"
+                print(line)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    summary = {**stats.summary(z), "stopped_by": stopped_by, "verdict": verdict, "z": z}
+    if paired:
+        summary["diff"] = diffs.summary(z)
+    if verbose:
+        print(f"stopped by {stopped_by} after {stats.n} episodes: mean={summary['mean']:.1f} "
+              f"[{summary['ci_low']:.1f}, {summary['ci_high']:.1f}] median={summary['median']:.0f} "
+              f"p10={summary['p10']:.0f} p90={summary['p90']:.0f}" + (f" verdict={verdict}" if verdict else ""))
+    return summary
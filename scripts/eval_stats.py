@@ -0,0 +1,118 @@
+# scripts/eval_stats.py
+import math
+
+class QuantileSketch:
+    """
+    Mergeable quantile sketch with relative accuracy (DDSketch): values fall into
+    logarithmic buckets of ratio gamma = (1 + a) / (1 - a), so any quantile is returned
+    within a fraction `a` of a true sample value at that rank. Merging adds bucket counts,
+    so sketches built on different workers combine exactly.
+    """
+    def __init__(self, relative_accuracy=0.01):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.positive, self.negative = {}, {}
+        self.zeros = self.count = 0
+
+    def _key(self, x):
+        return math.ceil(math.log(x) / self._log_gamma)
+
+    def _value(self, key):
+        return 2 * self.gamma ** key / (self.gamma + 1)
+
+    def add(self, x):
+        self.count += 1
+        if x > 0:
+            k = self._key(x)
+            self.positive[k] = self.positive.get(k, 0) + 1
+        elif x < 0:
+            k = self._key(-x)
+            self.negative[k] = self.negative.get(k, 0) + 1
+        else:
+            self.zeros += 1
+
+    def merge(self, other):
+        if other.gamma != self.gamma:
+            raise ValueError("cannot merge sketches with different accuracies")
+        for mine, theirs in ((self.positive, other.positive), (self.negative, other.negative)):
+            for k, c in theirs.items():
+                mine[k] = mine.get(k, 0) + c
+        self.zeros += other.zeros
+        self.count += other.count
+        return self
+
+    def quantile(self, q):
+        if not self.count:
+            return float("nan")
+        rank = q * (self.count - 1)
+        seen = 0
+        for k in sorted(self.negative, reverse=True):
+            seen += self.negative[k]
+            if seen > rank:
+                return -self._value(k)
+        seen += self.zeros
+        if seen > rank:
+            return 0.0
+        for k in sorted(self.positive):
+            seen += self.positive[k]
+            if seen > rank:
+                return self._value(k)
+        return self._value(max(self.positive))
+
+class RunningStats:
+    """
+    Streaming count/mean/variance (Welford, merged with Chan et al.'s pairwise update),
+    min/max and a QuantileSketch for median/p10/p90. Nothing per-sample is kept, and
+    merge() combines accumulators from parallel workers.
+    """
+    def __init__(self, relative_accuracy=0.01):
+        self.n, self.mean, self.m2 = 0, 0.0, 0.0
+        self.min, self.max = float("inf"), float("-inf")
+        self.sketch = QuantileSketch(relative_accuracy)
+
+    def add(self, x):
+        self.n += 1
+        delta = x - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (x - self.mean)
+        self.min, self.max = min(self.min, x), max(self.max, x)
+        self.sketch.add(x)
+        return self
+
+    def extend(self, xs):
+        for x in xs:
+            self.add(x)
+        return self
+
+    def merge(self, other):
+        if other.n:
+            n = self.n + other.n
+            delta = other.mean - self.mean
+            self.mean += delta * other.n / n
+            self.m2 += other.m2 + delta * delta * self.n * other.n / n
+            self.n = n
+            self.min, self.max = min(self.min, other.min), max(self.max, other.max)
+            self.sketch.merge(other.sketch)
+        return self
+
+    @property
+    def variance(self):
+        return self.m2 / (self.n - 1) if self.n > 1 else float("nan")
+
+    @property
+    def stdev(self):
+        return math.sqrt(self.variance)
+
+    def ci_halfwidth(self, z=1.96):
+        """Normal-approximation half-width of the CI on the mean (inf below 2 samples)"""
+        return z * self.stdev / math.sqrt(self.n) if self.n > 1 else float("inf")
+
+    def quantile(self, q):
+        return min(max(self.sketch.quantile(q), self.min), self.max)
+
+    def summary(self, z=1.96):
+        half = self.ci_halfwidth(z)
+        return {"episodes": self.n, "mean": self.mean, "stdev": self.stdev if self.n > 1 else float("nan"),
+                "ci_low": self.mean - half, "ci_high": self.mean + half, "median": self.quantile(0.5),
+                "p10": self.quantile(0.1), "p90": self.quantile(0.9), "best": self.max, "worst": self.min}
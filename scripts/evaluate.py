@@ -2,8 +2,21 @@
 from statistics import mean, median
 from surfer.env import SurferEnv
 from agents.heuristic import heuristic_policy
+from scripts.eval_engine import evaluate_parallel, evaluate_sequential
 
-def evaluate(policy_fn, episodes=30, render=False, seed=0):
+def evaluate(policy_fn, episodes=30, render=False, seed=0, workers=None, sequential=False, baseline=None, rel_ci=0.05):
+    """
+    workers=N runs headless on the parallel engine (episode e uses seed + e) instead.
+    sequential=True plays up to `episodes` only until the mean is known to rel_ci, or is
+    significantly better/worse than `baseline` (a policy or a score), and returns the
+    evaluate_sequential summary instead of the score list.
+    """
+    if sequential:
+        return evaluate_sequential(policy_fn, baseline, seed, min_episodes=min(32, episodes), max_episodes=episodes,
+                                   rel_ci=rel_ci, workers=workers)
+    if workers and not render:
+        records, _ = evaluate_parallel(policy_fn, episodes=episodes, seed=seed, workers=workers)
+        return [r["score"] for r in records]
     env = SurferEnv(render=render, seed=seed)
     scores = []
     for _ in range(episodes):
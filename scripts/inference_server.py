@@ -0,0 +1,231 @@
+# scripts/inference_server.py
+import time, multiprocessing as mp
+import numpy as np
+from surfer.shared_arrays import SharedArrays, SharedWeights
+from scripts.eval_stats import RunningStats
+
+# time.monotonic is CLOCK_MONOTONIC on Linux: one clock for every process, so submit times
+# written by clients can be compared with the server's
+_clock = time.monotonic
+
+def _slot_specs(n_slots, obs_dim):
+    return {
+        "obs": ((n_slots, obs_dim), np.float32),
+        "actions": ((n_slots,), np.int64),
+        "req_seq": ((n_slots,), np.int64),    # bumped by the client per request
+        "resp_seq": ((n_slots,), np.int64),   # set to req_seq by the server once the action is written
+        "submit_t": ((n_slots,), np.float64),
+    }
+
+class InferenceClient:
+    """
+    One request slot of an InferenceServer, for one env at a time. Pickles into worker
+    processes (pass it as a Process argument, which is how the semaphores travel) and never
+    imports torch: act() writes the observation into shared memory, wakes the server and
+    blocks until the action is written back. After a TimeoutError the client stays usable: a
+    late answer to the abandoned request is recognised by its sequence number and skipped.
+    """
+    def __init__(self, slot, slots_name, specs, pending, response, timeout=10.0):
+        self.slot, self.slots_name, self.specs = slot, slots_name, specs
+        self.pending, self.response, self.timeout = pending, response, timeout
+        self._slots = None
+
+    def __getstate__(self):
+        return {**self.__dict__, "_slots": None}
+
+    def act(self, obs):
+        slots = self._slots
+        if slots is None:
+            slots = self._slots = SharedArrays(self.specs, name=self.slots_name)
+        s = self.slot
+        slots.obs[s] = obs
+        slots.submit_t[s] = _clock()
+        slots.req_seq[s] += 1
+        self.pending.release()
+        deadline = _clock() + self.timeout
+        while True:
+            remaining = deadline - _clock()
+            if remaining <= 0 or not self.response.acquire(timeout=remaining):
+                raise TimeoutError(f"no action for slot {s} within {self.timeout}s")
+            if slots.resp_seq[s] == slots.req_seq[s]:
+                return int(slots.actions[s])
+            # a permit left by the late answer to a request abandoned after a timeout: keep waiting
+
+    def close(self):
+        if self._slots is not None:
+            self._slots.close()
+            self._slots = None
+
+def _bucket(n):
+    """Batch-size bucket: the next power of two"""
+    return 1 << (n - 1).bit_length()
+
+class BatchMetrics:
+    """Per batch-size bucket: batches, requests, request latency, queueing delay and forward time (us)"""
+    def __init__(self):
+        self.start = _clock()
+        self.requests = self.batches = self.swaps = 0
+        self.buckets = {}
+
+    def record(self, n, latencies_us, waits_us, forward_us):
+        self.requests += n
+        self.batches += 1
+        b = self.buckets.get(_bucket(n))
+        if b is None:
+            b = self.buckets[_bucket(n)] = {"batches": 0, "requests": 0, "latency_us": RunningStats(),
+                                             "wait_us": RunningStats(), "forward_us": RunningStats()}
+        b["batches"] += 1
+        b["requests"] += n
+        b["latency_us"].extend(latencies_us)
+        b["wait_us"].extend(waits_us)
+        b["forward_us"].add(forward_us)
+
+    def summary(self):
+        elapsed = max(_clock() - self.start, 1e-9)
+        out = {"requests": self.requests, "batches": self.batches, "weight_swaps": self.swaps,
+               "seconds": elapsed, "requests_per_sec": self.requests / elapsed,
+               "mean_batch": self.requests / max(1, self.batches), "by_batch_size": {}}
+        for size in sorted(self.buckets):
+            b = self.buckets[size]
+            out["by_batch_size"][size] = {
+                "batches": b["batches"], "requests": b["requests"],
+                "latency_us": {k: b["latency_us"].quantile(q) for k, q in (("p50", 0.5), ("p90", 0.9), ("p99", 0.99))},
+                "latency_mean_us": b["latency_us"].mean, "wait_mean_us": b["wait_us"].mean,
+                "forward_mean_us": b["forward_us"].mean,
+                "forward_us_per_request": b["forward_us"].mean * b["batches"] / b["requests"],
+            }
+        return out
+
+def _batch_loop(slots, weights, qnet, pending, responses, conn, max_batch, max_delay):
+    import torch
+    seen = weights.pull(qnet, -1)
+    metrics = BatchMetrics()
+    full = min(max_batch, len(responses))
+    req_seq, resp_seq, submit_t = slots.req_seq, slots.resp_seq, slots.submit_t
+    while True:
+        if conn.poll():
+            cmd = conn.recv()
+            if cmd == "stop":
+                conn.send(metrics.summary())
+                return
+            if cmd == "metrics":
+                conn.send(metrics.summary())
+            elif cmd == "reset_metrics":
+                metrics = BatchMetrics()
+                conn.send(None)
+        if not pending.acquire(timeout=0.02):
+            continue
+        # dynamic batching: after the first request, take more until max_batch or the deadline;
+        # a slot has at most one request in flight, so the window also closes once all slots wait
+        taken, deadline = 1, _clock() + max_delay
+        while taken < full:
+            remaining = deadline - _clock()
+            if not (pending.acquire(timeout=remaining) if remaining > 0 else pending.acquire(False)):
+                break
+            taken += 1
+        idx = np.flatnonzero(req_seq != resp_seq)
+        if not len(idx):
+            continue  # this wake-up's requests were already answered with an earlier batch
+        if len(idx) > max_batch:
+            idx = idx[np.argsort(submit_t[idx], kind="stable")[:max_batch]]  # oldest first
+        seqs = req_seq[idx]  # before reading obs: a request rewritten meanwhile stays pending
+        version = weights.pull(qnet, seen)
+        if version != seen:
+            seen = version
+            metrics.swaps += 1
+        start = _clock()
+        with torch.no_grad():
+            actions = qnet(torch.from_numpy(slots.obs[idx])).argmax(dim=1).numpy()
+        done = _clock()
+        slots.actions[idx] = actions
+        submitted = submit_t[idx].copy()
+        resp_seq[idx] = seqs
+        for i in idx.tolist():
+            responses[i].release()
+        metrics.record(len(idx), (done - submitted) * 1e6, (start - submitted) * 1e6, (done - start) * 1e6)
+
+def _serve(slots_name, specs, weights_name, n_params, obs_dim, n_actions, hidden, pending, responses, conn,
+           max_batch, max_delay):
+    import torch
+    from agents.dqn import QNetwork
+    torch.set_num_threads(1)
+    slots = SharedArrays(specs, name=slots_name)
+    weights = SharedWeights(n_params, name=weights_name)
+    qnet = QNetwork(obs_dim, n_actions, hidden)
+    qnet.eval()
+    try:
+        _batch_loop(slots, weights, qnet, pending, responses, conn, max_batch, max_delay)  # views die with the loop
+    finally:
+        slots.close()
+        weights.close()
+
+class InferenceServer:
+    """
+    One process running QNetwork forwards for many env workers. Each worker holds an
+    InferenceClient slot; requests are batched dynamically (the first one opens a window of
+    max_delay_ms, closed early at max_batch or once every slot is waiting) and answered with
+    one forward per batch. publish() hot-swaps weights from the trainer through the
+    SharedWeights seqlock; the server picks up a complete new version before its next batch.
+    metrics() reports throughput and, per batch-size bucket (powers of two), request latency
+    p50/p90/p99, queueing delay and forward time, for tuning max_delay_ms.
+    """
+    def __init__(self, n_slots, obs_dim=6, n_actions=3, state_dict=None, max_batch=64, max_delay_ms=1.0,
+                 hidden=128, start_method="spawn"):
+        import torch
+        from agents.dqn import QNetwork
+        self.n_slots = n_slots
+        model = QNetwork(obs_dim, n_actions, hidden)
+        if state_dict is not None:
+            model.load_state_dict(torch.load(state_dict, map_location="cpu") if isinstance(state_dict, str) else state_dict)
+        self._model = model
+        self.specs = _slot_specs(n_slots, obs_dim)
+        self.slots = SharedArrays(self.specs, create=True)
+        self.weights = SharedWeights(sum(p.numel() for p in model.parameters()), create=True)
+        self.weights.publish(model)
+
+        ctx = mp.get_context(start_method)
+        self._pending = ctx.Semaphore(0)
+        self._responses = [ctx.Semaphore(0) for _ in range(n_slots)]
+        self._conn, child = ctx.Pipe()
+        self._process = ctx.Process(target=_serve, daemon=True, args=(
+            self.slots.name, self.specs, self.weights.name, self.weights.params.size, obs_dim, n_actions, hidden,
+            self._pending, self._responses, child, max_batch, max_delay_ms / 1000.0))
+        self._process.start()
+        self._closed = False
+
+    def client(self, slot):
+        return InferenceClient(slot, self.slots.name, self.specs, self._pending, self._responses[slot])
+
+    def publish(self, weights):
+        """Swaps in a QNetwork (or its state dict) for the following batches"""
+        if isinstance(weights, dict):
+            self._model.load_state_dict(weights)
+            weights = self._model
+        self.weights.publish(weights)
+
+    def metrics(self, reset=False):
+        self._conn.send("metrics")
+        out = self._conn.recv()
+        if reset:
+            self._conn.send("reset_metrics")
+            self._conn.recv()
+        return out
+
+    def close(self):
+        """Stops the server and returns its final metrics"""
+        if self._closed:
+            return None
+        self._closed = True
+        out = None
+        try:
+            self._conn.send("stop")
+            if self._conn.poll(10):
+                out = self._conn.recv()
+        except (BrokenPipeError, EOFError, OSError):
+            pass
+        self._process.join(timeout=10)
+        if self._process.is_alive():
+            self._process.terminate()
+        self.slots.close(unlink=True)
+        self.weights.close(unlink=True)
+        return out
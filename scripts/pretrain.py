@@ -0,0 +1,138 @@
+# scripts/pretrain.py
+import os, time, queue, threading
+import numpy as np
+import torch, torch.nn as nn, torch.optim as optim
+
+from surfer.vec_env import VecSurferEnv
+from surfer.trajectory import TrajectoryWriter, TrajectoryDataset
+from agents.dqn import QNetwork
+from agents.heuristic import heuristic_policy_batch
+from scripts.train_dqn import set_seed, learn_step, margin_loss
+
+def generate_heuristic_dataset(out_path="data/heuristic", steps=2_000, n_envs=256, epsilon=0.1, seed=0):
+    """
+    Records `steps` VecSurferEnv steps (steps * n_envs transitions) of the heuristic policy,
+    taking a random action with probability epsilon so the data also covers its mistakes.
+    """
+    rng = np.random.default_rng(seed)
+    with TrajectoryWriter(out_path, stride=n_envs) as writer:
+        env = VecSurferEnv(n_envs, seed=seed, recorder=writer)
+        obs = env.reset()
+        for _ in range(steps):
+            actions = heuristic_policy_batch(obs)
+            explore = rng.random(n_envs) < epsilon
+            actions[explore] = rng.integers(0, 3, int(explore.sum()))
+            obs, _, _, _ = env.step(actions)
+    return out_path
+
+class BatchLoader:
+    """
+    Iterates `steps` uniformly sampled transition batches from a TrajectoryDataset as torch
+    tensors. A background thread samples up to `prefetch` batches ahead, so paging rows in
+    from the memory-mapped columns overlaps with the optimizer step.
+    """
+    def __init__(self, dataset, batch_size=256, steps=10_000, prefetch=8, seed=0):
+        self.dataset, self.batch_size, self.steps = dataset, batch_size, steps
+        self.rng = np.random.default_rng(seed)
+        self._queue = queue.Queue(maxsize=prefetch)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._fill, daemon=True)
+        self._thread.start()
+
+    def _fill(self):
+        try:
+            for _ in range(self.steps):
+                batch = tuple(torch.from_numpy(np.ascontiguousarray(a))
+                              for a in self.dataset.sample(self.batch_size, self.rng))
+                while not self._stop.is_set():
+                    try:
+                        self._queue.put(batch, timeout=0.1)
+                        break
+                    except queue.Full:
+                        pass
+                if self._stop.is_set():
+                    return
+        except Exception as e:  # surface sampling errors in the consuming thread
+            self._queue.put(e)
+            return
+        self._queue.put(None)
+
+    def __iter__(self):
+        while True:
+            batch = self._queue.get()
+            if batch is None:
+                return
+            if isinstance(batch, Exception):
+                raise batch
+            yield batch
+
+    def close(self):
+        self._stop.set()
+        self._thread.join(timeout=1.0)
+
+def pretrain_qnetwork(
+    dataset="data/heuristic",
+    mode="dqfd",                  # "dqfd": Double-DQN TD loss + margin loss; "bc": margin loss only
+    steps=20_000,
+    batch_size=256,
+    lr=1e-3,
+    gamma=0.99,
+    margin=0.8,
+    margin_weight=1.0,
+    target_update_steps=1000,
+    grad_clip_norm=5.0,
+    prefetch=8,
+    seed=0,
+    save_path="dqn_pretrained.pt",
+    log_every=2000,
+):
+    """
+    Offline pretraining of QNetwork on logged transitions. "bc" only needs observations and
+    actions (e.g. the converted data/traj.csv); "dqfd" also learns Q-values from the logged
+    rewards, so the result is a sensible starting point for train_dqn(init_weights=...).
+    """
+    set_seed(seed)
+    if isinstance(dataset, str):
+        dataset = TrajectoryDataset(dataset)
+    qnet = QNetwork(dataset.obs_dim, 3)
+    target = QNetwork(dataset.obs_dim, 3)
+    target.load_state_dict(qnet.state_dict())
+    target.eval()
+    optimizer = optim.Adam(qnet.parameters(), lr=lr)
+    loss_fn = nn.SmoothL1Loss(reduction="none")
+
+    loader = BatchLoader(dataset, batch_size, steps, prefetch, seed)
+    start, step, loss = time.perf_counter(), 0, 0.0
+    try:
+        for batch in loader:
+            step += 1
+            if mode == "bc":
+                q = qnet(batch[0])
+                loss_t = margin_weight * margin_loss(q, batch[1], margin).mean()
+                optimizer.zero_grad()
+                loss_t.backward()
+                nn.utils.clip_grad_norm_(qnet.parameters(), grad_clip_norm)
+                optimizer.step()
+                loss = loss_t.item()
+            else:
+                loss, _ = learn_step(qnet, target, optimizer, loss_fn, batch, gamma, grad_clip_norm,
+                                     margin=margin, margin_weight=margin_weight)
+                if step % target_update_steps == 0:
+                    target.load_state_dict(qnet.state_dict())
+            if log_every and step % log_every == 0:
+                print(f"pretrain {step:6d}/{steps} | loss {loss:.4f} | {step / (time.perf_counter() - start):6.0f} batches/s")
+    finally:
+        loader.close()
+
+    with torch.no_grad():
+        obs, actions = dataset.transitions(np.arange(min(len(dataset), 50_000)))[:2]
+        agreement = (qnet(torch.from_numpy(obs)).argmax(dim=1).numpy() == actions).mean()
+    torch.save(qnet.state_dict(), save_path)
+    elapsed = time.perf_counter() - start
+    print(f"Pretraining done in {elapsed:.1f}s, action agreement {agreement:.3f}. Saved at {save_path}")
+    return {"seconds": elapsed, "steps": step, "agreement": float(agreement), "path": save_path}
+
+if __name__ == "__main__":
+    if not os.path.exists("data/heuristic"):
+        generate_heuristic_dataset("data/heuristic")
+    pretrain_qnetwork("data/heuristic")
@@ -0,0 +1,162 @@
+# scripts/sweep.py
+import os, io, sys, csv, json, math, time, random, argparse, itertools, contextlib, multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from statistics import mean, median
+from surfer.core import OBSTACLE_LENGTH
+
+# A list is a set of choices (grid axis); {"low", "high", "log", "int"} is a range (random search only).
+DEFAULT_SPEC = {
+    "method": "random",
+    "samples": 16,
+    "seeds": [0, 1],
+    "fixed": {"episodes": 300},
+    "params": {
+        "lr": {"low": 1e-4, "high": 3e-3, "log": True},
+        "gamma": [0.97, 0.99, 0.995],
+        "batch_size": [32, 64, 128],
+        "epsilon_decay_steps": {"low": 5_000, "high": 50_000, "log": True, "int": True},
+        "target_update_steps": [250, 1000, 4000],
+        "warmup_steps": [500, 2000],
+        "replay_capacity": [20_000, 100_000],
+    },
+}
+
+def _sample(dist, rng):
+    if isinstance(dist, list):
+        return rng.choice(dist)
+    low, high = dist["low"], dist["high"]
+    x = math.exp(rng.uniform(math.log(low), math.log(high))) if dist.get("log") else rng.uniform(low, high)
+    return int(round(x)) if dist.get("int") else x
+
+def expand(spec, seed=0):
+    """Trial configs of a spec: the grid product (or `samples` random draws), each with every seed"""
+    params = spec["params"]
+    if spec.get("method", "grid") == "grid":
+        ranges = [k for k, v in params.items() if not isinstance(v, list)]
+        if ranges:
+            raise ValueError(f"grid search needs lists of values, got ranges for {ranges}")
+        configs = [dict(zip(params, values)) for values in itertools.product(*params.values())]
+    else:
+        rng = random.Random(seed)
+        configs = [{k: _sample(v, rng) for k, v in params.items()} for _ in range(spec.get("samples", 10))]
+    return [{**spec.get("fixed", {}), **config, "seed": s} for config in configs for s in spec.get("seeds", [0])]
+
+class MedianStopping:
+    """
+    Median stopping rule on avg20: at every `rung_every`-th episode past `grace` episodes, a trial
+    whose avg20 is below the median of the avg20s other trials reported at that episode is
+    stopped, once at least `min_trials` others have reported there. State lives in a Manager
+    dict so all pool workers see it.
+    """
+    def __init__(self, shared, lock, grace=60, rung_every=20, min_trials=4):
+        self.shared, self.lock = shared, lock
+        self.grace, self.rung_every, self.min_trials = grace, rung_every, min_trials
+
+    def report(self, episode, ep_rewards):
+        """train_dqn on_episode hook: True means stop"""
+        if episode < max(self.grace, 20) or episode % self.rung_every:
+            return False
+        avg20 = mean(ep_rewards[-20:])
+        with self.lock:
+            others = self.shared.get(episode, [])
+            self.shared[episode] = others + [avg20]
+        return len(others) >= self.min_trials and avg20 < median(others)
+
+_STOPPING = None
+
+def _init_worker(threads, stopping):
+    """Pins each worker's torch pools so `workers * threads` never exceeds the cores"""
+    global _STOPPING
+    for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS"):
+        os.environ[var] = str(threads)
+    import torch
+    torch.set_num_threads(threads)
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:  # already set in this process
+        pass
+    _STOPPING = stopping
+
+def run_trial(trial, config, out_dir):
+    from scripts.train_dqn import train_dqn
+    hook = _STOPPING.report if _STOPPING is not None else None
+    with contextlib.redirect_stdout(io.StringIO()):
+        r = train_dqn(**config, on_episode=hook, save_path=os.path.join(out_dir, f"trial{trial:04d}.pt"))
+    rewards = r["ep_rewards"]
+    return {
+        "trial": trial, "seed": config["seed"], "obstacle_length": config.get("obstacle_length"),
+        "config": json.dumps({k: v for k, v in config.items() if k not in ("seed", "obstacle_length")}, sort_keys=True),
+        "episodes": len(rewards),
+        "final_avg20": mean(rewards[-20:]) if rewards else float("nan"),
+        "best_avg20": r["best_avg20"] if r["best_avg20"] > -1e9 else float("nan"),
+        "seconds": r["seconds"], "steps": r["steps"], "steps_per_sec": r["steps"] / max(r["seconds"], 1e-9),
+        "stopped": r["stopped"] or "",
+    }
+
+COLUMNS = ["trial", "seed", "obstacle_length", "final_avg20", "best_avg20", "episodes", "steps", "seconds",
+           "steps_per_sec", "stopped", "config"]
+
+def sweep(spec=None, workers=None, threads_per_worker=1, out_dir="sweep", results="sweep_results.csv",
+          median_stop=True, grace=60, rung_every=20, min_trials=4, seed=0):
+    """
+    Runs every trial of `spec` (see DEFAULT_SPEC) in a process pool of `workers` processes,
+    each limited to `threads_per_worker` torch threads (workers default to cores // threads).
+    Rows are appended to the `results` CSV as trials finish; returns them best-first.
+    Every trial plays this process's OBSTACLE_LENGTH unless the spec fixes obstacle_length,
+    since each spawned worker would otherwise draw its own.
+    """
+    spec = spec or DEFAULT_SPEC
+    trials = [{"obstacle_length": OBSTACLE_LENGTH, **config} for config in expand(spec, seed)]
+    workers = workers or max(1, (os.cpu_count() or 1) // threads_per_worker)
+    os.makedirs(out_dir, exist_ok=True)
+    ctx = mp.get_context("spawn")  # fresh interpreters: no forked torch thread pools
+    manager = ctx.Manager() if median_stop else None
+    stopping = MedianStopping(manager.dict(), manager.Lock(), grace, rung_every, min_trials) if manager else None
+    print(f"{len(trials)} trials on {workers} workers x {threads_per_worker} thread(s)")
+
+    rows = []
+    start = time.perf_counter()
+    try:
+        with open(results, "w", newline="") as f, ProcessPoolExecutor(
+                workers, mp_context=ctx, initializer=_init_worker, initargs=(threads_per_worker, stopping)) as pool:
+            out = csv.DictWriter(f, COLUMNS)
+            out.writeheader()
+            futures = [pool.submit(run_trial, i, config, out_dir) for i, config in enumerate(trials)]
+            for fut in as_completed(futures):
+                row = fut.result()
+                rows.append(row)
+                out.writerow({k: round(v, 3) if isinstance(v, float) else v for k, v in row.items()})
+                f.flush()
+                print(f"trial {row['trial']:4d} seed {row['seed']} | avg20 final {row['final_avg20']:7.1f} "
+                      f"best {row['best_avg20']:7.1f} | {row['episodes']:4d} ep {row['steps_per_sec']:6.0f} steps/s"
+                      f"{' | stopped' if row['stopped'] else ''} | {row['config']}")
+    finally:
+        if manager is not None:
+            manager.shutdown()
+    rows.sort(key=lambda r: -(r["best_avg20"] if r["best_avg20"] == r["best_avg20"] else -1e9))
+    print(f"{len(rows)} trials in {time.perf_counter() - start:.0f}s, "
+          f"{sum(1 for r in rows if r['stopped'])} stopped early; results in {results}")
+    return rows
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Grid / random hyperparameter sweep over train_dqn")
+    p.add_argument("--spec", help="JSON sweep spec (default: DEFAULT_SPEC)")
+    p.add_argument("--workers", type=int, help="processes (default: cores // threads-per-worker)")
+    p.add_argument("--threads-per-worker", type=int, default=1)
+    p.add_argument("--out-dir", default="sweep", help="per-trial model files")
+    p.add_argument("--results", default="sweep_results.csv")
+    p.add_argument("--no-median-stop", action="store_true")
+    p.add_argument("--grace", type=int, default=60, help="episodes before a trial can be stopped")
+    p.add_argument("--rung-every", type=int, default=20, help="episodes between median comparisons")
+    p.add_argument("--min-trials", type=int, default=4, help="reports needed at an episode before stopping")
+    p.add_argument("--seed", type=int, default=0, help="random-search sampling seed")
+    args = p.parse_args(argv)
+    spec = None
+    if args.spec:
+        with open(args.spec) as f:
+            spec = json.load(f)
+    sweep(spec, args.workers, args.threads_per_worker, args.out_dir, args.results, not args.no_median_stop,
+          args.grace, args.rung_every, args.min_trials, args.seed)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,204 @@
+# scripts/telemetry.py
+import os, sys, json, time, struct, socket, threading, resource
+from collections import Counter
+
+def _crc32c_table():
+    table = []
+    for i in range(256):
+        c = i
+        for _ in range(8):
+            c = (c >> 1) ^ 0x82F63B78 if c & 1 else c >> 1
+        table.append(c)
+    return table
+
+_CRC32C = _crc32c_table()
+
+def _masked_crc32c(data):
+    c = 0xFFFFFFFF
+    for b in data:
+        c = _CRC32C[(c ^ b) & 0xFF] ^ (c >> 8)
+    c ^= 0xFFFFFFFF
+    return (((c >> 15) | (c << 17)) + 0xA282EAD8) & 0xFFFFFFFF
+
+def _varint(n):
+    out = bytearray()
+    while True:
+        b = n & 0x7F
+        n >>= 7
+        if n:
+            out.append(b | 0x80)
+        else:
+            out.append(b)
+            return bytes(out)
+
+def _field(num, wire, payload):
+    return _varint(num << 3 | wire) + payload
+
+def _bytes_field(num, data):
+    return _field(num, 2, _varint(len(data)) + data)
+
+class EventFileWriter:
+    """
+    Minimal TensorBoard event-file writer for scalars (TFRecord framing around hand-encoded
+    Event/Summary protos), so `tensorboard --logdir` can read training curves without
+    tensorboard or protobuf installed here.
+    """
+    def __init__(self, log_dir):
+        os.makedirs(log_dir, exist_ok=True)
+        name = f"events.out.tfevents.{int(time.time())}.{socket.gethostname()}.{os.getpid()}"
+        self.file = open(os.path.join(log_dir, name), "wb")
+        self._write(_field(1, 1, struct.pack("<d", time.time())) + _bytes_field(3, b"brain.Event:2"))
+
+    def _write(self, event):
+        header = struct.pack("<Q", len(event))
+        self.file.write(header + struct.pack("<I", _masked_crc32c(header)) + event +
+                        struct.pack("<I", _masked_crc32c(event)))
+
+    def add_scalars(self, scalars, step, wall_time=None):
+        values = b"".join(
+            _bytes_field(1, _bytes_field(1, tag.encode()) + _field(2, 5, struct.pack("<f", value)))
+            for tag, value in scalars.items())
+        self._write(_field(1, 1, struct.pack("<d", wall_time or time.time())) +
+                    _field(2, 0, _varint(step)) + _bytes_field(5, values))
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+class SamplingProfiler:
+    """
+    Samples the stack of one thread (the caller's by default) every `interval` seconds from
+    a background thread and counts collapsed stacks ("file:func;file:func ..."), the input
+    format of flamegraph.pl / speedscope. Costs nothing in the sampled thread beyond the GIL
+    hand-offs, so it can stay on for a whole run.
+    """
+    def __init__(self, interval=0.005, thread_id=None, max_depth=32):
+        self.interval, self.max_depth = interval, max_depth
+        self.thread_id = thread_id or threading.get_ident()
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None and len(stack) < self.max_depth:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def top(self, n=10):
+        """Leaf functions by share of samples"""
+        leaves = Counter()
+        for stack, count in self.stacks.items():
+            leaves[stack.rsplit(";", 1)[-1]] += count
+        return [(name, count / max(1, self.samples)) for name, count in leaves.most_common(n)]
+
+    def save(self, path):
+        with open(path, "w") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+class Telemetry:
+    """
+    Training-loop instrumentation. lap(phase) charges the time since the previous lap to
+    `phase`; add(name, value) accumulates scalar means; maybe_emit() writes one JSONL record
+    (and TensorBoard scalars if tb_dir is set) every `every` seconds with per-phase seconds
+    and shares, env steps/s, updates/s, the scalar means and replay size/memory, then resets
+    the window. The checks are a few float ops per step, so it can stay on for real runs;
+    callers report costlier statistics only every `stats_every` updates.
+    """
+    def __init__(self, path=None, tb_dir=None, every=10.0, stats_every=16, profile=None, profile_interval=0.005):
+        self.path, self.every, self.stats_every = path, every, stats_every
+        self.file = open(path, "a") if path else None
+        self.tb = EventFileWriter(tb_dir) if tb_dir else None
+        self.profile_path = profile
+        self.profiler = SamplingProfiler(profile_interval).start() if profile else None
+        self.start = self._last = self._window_start = time.perf_counter()
+        self.phases = {}
+        self.sums, self.counts = {}, {}
+        self.steps = self.updates = self.episodes = 0
+        self._window_steps = self._window_updates = 0
+        self.records = []
+
+    def lap(self, phase):
+        now = time.perf_counter()
+        self.phases[phase] = self.phases.get(phase, 0.0) + now - self._last
+        self._last = now
+
+    def add(self, name, value):
+        self.sums[name] = self.sums.get(name, 0.0) + value
+        self.counts[name] = self.counts.get(name, 0) + 1
+
+    def step(self, updated):
+        self.steps += 1
+        self._window_steps += 1
+        if updated:
+            self.updates += 1
+            self._window_updates += 1
+
+    def episode(self, reward):
+        self.episodes += 1
+        self.add("episode_reward", reward)
+
+    def maybe_emit(self, buffer=None, **extra):
+        if self._last - self._window_start >= self.every:
+            self.emit(buffer, **extra)
+
+    def emit(self, buffer=None, **extra):
+        now = time.perf_counter()
+        window = max(now - self._window_start, 1e-9)
+        timed = sum(self.phases.values())
+        record = {
+            "time": round(now - self.start, 3),
+            "steps": self.steps, "updates": self.updates, "episodes": self.episodes,
+            "env_steps_per_sec": self._window_steps / window,
+            "updates_per_sec": self._window_updates / window,
+            "phase_seconds": {k: round(v, 6) for k, v in self.phases.items()},
+            "phase_share": {k: round(v / timed, 4) for k, v in self.phases.items()} if timed else {},
+            **{k: self.sums[k] / self.counts[k] for k in self.sums},
+            "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+            **extra,
+        }
+        if buffer is not None:
+            record["replay_size"] = len(buffer)
+            record["replay_mb"] = buffer.nbytes() / 2**20
+        self.records.append(record)
+        if self.file:
+            self.file.write(json.dumps(record) + "\n")
+            self.file.flush()
+        if self.tb:
+            scalars = {k: v for k, v in record.items() if isinstance(v, (int, float)) and k != "time"}
+            scalars.update({f"phase_share/{k}": v for k, v in record["phase_share"].items()})
+            self.tb.add_scalars(scalars, self.steps)
+        self.phases, self.sums, self.counts = {}, {}, {}
+        self._window_steps = self._window_updates = 0
+        self._window_start = self._last = time.perf_counter()
+        return record
+
+    def close(self):
+        if self._window_steps:
+            self.emit()
+        if self.profiler is not None:
+            self.profiler.stop()
+            self.profiler.save(self.profile_path)
+            for name, share in self.profiler.top(8):
+                print(f"profile {share:6.1%} {name}")
+        if self.file:
+            self.file.close()
+        if self.tb:
+            self.tb.close()
@@ -0,0 +1,227 @@
+# scripts/train_apex.py
+import os, time, random, queue
+from statistics import mean
+import multiprocessing as mp
+import numpy as np
+import torch, torch.nn as nn, torch.optim as optim
+
+from surfer.core import OBSTACLE_LENGTH
+from surfer.env import SurferEnv
+from agents.dqn import QNetwork
+from agents.qnet_numpy import NumpyQNetwork
+from scripts.train_dqn import set_seed, learn_step
+from surfer.shared_arrays import SharedArrays, SharedWeights
+
+class SharedReplay(SharedArrays):
+    """
+    Replay store shared by actors and the learner. Each actor owns a contiguous partition
+    and is its only writer, so no locks are needed: a slot is written before the actor's
+    counter is bumped, and the learner only samples slots below the published counts.
+    Once a partition wraps, an actor may overwrite a slot the learner is copying; every
+    slot carries a seqlock counter (odd while being written, as in SharedWeights), and
+    sample() redraws rows whose counter was odd or changed during the copy.
+    """
+    def __init__(self, n_actors, capacity, obs_dim, name=None, create=False):
+        self.n_actors, self.part = n_actors, capacity // n_actors
+        cap = self.part * n_actors
+        super().__init__({
+            "obs": ((cap, obs_dim), np.float32),
+            "next_obs": ((cap, obs_dim), np.float32),
+            "actions": ((cap,), np.int64),
+            "rewards": ((cap,), np.float32),
+            "dones": ((cap,), np.float32),
+            "seqs": ((cap,), np.int64),         # per-slot seqlock
+            "counts": ((n_actors,), np.int64),  # transitions ever written by each actor
+        }, name=name, create=create)
+        self.redrawn = 0  # torn rows replaced by this process's sample() calls
+
+    def push(self, rank, obs, action, reward, next_obs, done):
+        n = int(self.counts[rank])
+        i = rank * self.part + n % self.part
+        self.seqs[i] += 1
+        self.obs[i], self.next_obs[i] = obs, next_obs
+        self.actions[i], self.rewards[i], self.dones[i] = action, reward, done
+        self.seqs[i] += 1
+        self.counts[rank] = n + 1
+
+    def __len__(self):
+        return int(np.minimum(self.counts, self.part).sum())
+
+    def _draw(self, n, rng):
+        sizes = np.minimum(self.counts, self.part)
+        cum = np.cumsum(sizes)
+        r = rng.integers(0, cum[-1], size=n)
+        part_id = np.searchsorted(cum, r, side="right")
+        return part_id * self.part + (r - (cum[part_id] - sizes[part_id]))
+
+    def _read(self, idx):
+        """Copies of the rows at idx, and which of them may be torn"""
+        before = self.seqs[idx]
+        rows = [self.obs[idx], self.actions[idx], self.rewards[idx], self.next_obs[idx], self.dones[idx]]
+        return rows, (before % 2 == 1) | (self.seqs[idx] != before)
+
+    def sample(self, batch_size, rng):
+        rows, torn = self._read(self._draw(batch_size, rng))
+        while torn.any():
+            bad = np.flatnonzero(torn)
+            self.redrawn += len(bad)
+            fresh, fresh_torn = self._read(self._draw(len(bad), rng))
+            for col, new in zip(rows, fresh):
+                col[bad] = new
+            torn = np.zeros(batch_size, dtype=bool)
+            torn[bad] = fresh_torn
+        return tuple(torch.from_numpy(col) for col in rows)
+
+def actor_epsilon(rank, n_actors, base=0.4, alpha=7.0):
+    """Ape-X per-actor exploration rate: base^(1 + alpha * rank / (n_actors - 1))"""
+    if n_actors == 1:
+        return base
+    return base ** (1 + alpha * rank / (n_actors - 1))
+
+def _actor(rank, n_actors, seed, epsilon, obs_dim, n_actions, replay_name, capacity,
+           weights_name, n_params, stop, results, sync_every, obstacle_length):
+    torch.set_num_threads(1)
+    set_seed(seed + rank)
+    rng = random.Random(seed + rank)
+    replay = SharedReplay(n_actors, capacity, obs_dim, name=replay_name)
+    weights = SharedWeights(n_params, name=weights_name)
+    qnet = QNetwork(obs_dim, n_actions)
+    qnet.eval()
+    seen = weights.pull(qnet, -1)
+    policy = NumpyQNetwork.from_state_dict(qnet.state_dict())  # acting stays off the torch dispatcher
+    env = SurferEnv(seed=seed + rank, obstacle_length=obstacle_length)
+    steps = 0
+    try:
+        while not stop.is_set():
+            obs = env.reset()
+            done, ep_reward = False, 0.0
+            while not done and not stop.is_set():
+                if rng.random() < epsilon:
+                    action = rng.randrange(n_actions)
+                else:
+                    action = policy.act(obs)
+                next_obs, reward, done, info = env.step(action)
+                replay.push(rank, obs, action, reward, next_obs, done)
+                ep_reward += reward
+                obs = next_obs
+                steps += 1
+                if steps % sync_every == 0:
+                    version = weights.pull(qnet, seen)
+                    if version != seen:
+                        policy.load_state_dict(qnet.state_dict())
+                        seen = version
+            if done:
+                results.put((rank, ep_reward, info["score"]))
+    finally:
+        env.close()
+        replay.close()
+        weights.close()
+
+def train_apex(
+    n_actors=4,
+    total_updates=50_000,
+    batch_size=64,
+    gamma=0.99,
+    lr=1e-3,
+    target_update_steps=1000,     # learner updates
+    replay_capacity=100_000,
+    warmup_steps=2000,
+    grad_clip_norm=5.0,
+    broadcast_every=100,          # learner updates between weight publishes
+    sync_every=400,               # actor steps between weight polls
+    eps_base=0.4,
+    eps_alpha=7.0,
+    seed=0,
+    obstacle_length=None,         # None: this process's OBSTACLE_LENGTH; every actor plays the same game
+    save_path="dqn_agent.pt",
+    log_every=5.0,                # seconds
+):
+    """
+    Ape-X style training: n_actors processes run their own SurferEnv(seed + rank) with a fixed
+    per-actor epsilon and write transitions into a shared-memory replay store, while this
+    process runs Double-DQN updates and periodically publishes QNetwork weights to them.
+    All actors play the same obstacle_length (default: this process's OBSTACLE_LENGTH).
+    """
+    set_seed(seed)
+    obstacle_length = OBSTACLE_LENGTH if obstacle_length is None else obstacle_length
+    obs_dim, n_actions = len(SurferEnv(seed=seed, obstacle_length=obstacle_length).reset()), 3
+
+    qnet = QNetwork(obs_dim, n_actions)
+    target = QNetwork(obs_dim, n_actions)
+    target.load_state_dict(qnet.state_dict())
+    target.eval()
+    optimizer = optim.Adam(qnet.parameters(), lr=lr)
+    loss_fn = nn.SmoothL1Loss(reduction="none")
+    n_params = sum(p.numel() for p in qnet.parameters())
+
+    replay = SharedReplay(n_actors, replay_capacity, obs_dim, create=True)
+    weights = SharedWeights(n_params, create=True)
+    weights.publish(qnet)
+
+    ctx = mp.get_context("spawn")
+    stop, results = ctx.Event(), ctx.Queue()
+    actors = [
+        ctx.Process(target=_actor, daemon=True, args=(
+            rank, n_actors, seed, actor_epsilon(rank, n_actors, eps_base, eps_alpha), obs_dim, n_actions,
+            replay.name, replay_capacity, weights.name, n_params, stop, results, sync_every, obstacle_length))
+        for rank in range(n_actors)
+    ]
+    for p in actors:
+        p.start()
+
+    rng = np.random.default_rng(seed)
+    ep_rewards, updates, best_mean = [], 0, -1e9
+    start = last_log = time.perf_counter()
+    try:
+        while updates < total_updates:
+            try:
+                while True:
+                    rank, ep_reward, score = results.get_nowait()
+                    ep_rewards.append(ep_reward)
+            except queue.Empty:
+                pass
+
+            if len(replay) < max(batch_size, warmup_steps):
+                time.sleep(0.01)
+                continue
+
+            learn_step(qnet, target, optimizer, loss_fn, replay.sample(batch_size, rng), gamma, grad_clip_norm)
+            updates += 1
+            if updates % target_update_steps == 0:
+                target.load_state_dict(qnet.state_dict())
+            if updates % broadcast_every == 0:
+                weights.publish(qnet)
+
+            if len(ep_rewards) >= 20:
+                avg20 = mean(ep_rewards[-20:])
+                if avg20 > best_mean:
+                    best_mean = avg20
+                    torch.save(qnet.state_dict(), save_path)
+
+            now = time.perf_counter()
+            if now - last_log >= log_every:
+                elapsed = now - start
+                recent = ep_rewards[-20:] or [0.0]
+                print(f"upd {updates:7d} | env steps/s {int(replay.counts.sum()) / elapsed:8.0f} | "
+                      f"updates/s {updates / elapsed:6.0f} | episodes {len(ep_rewards):5d} | avg20 {mean(recent):7.1f}")
+                last_log = now
+    finally:
+        stop.set()
+        for p in actors:
+            p.join(timeout=10)
+            if p.is_alive():
+                p.terminate()
+        env_steps, torn_redraws = int(replay.counts.sum()), replay.redrawn
+        replay.close(unlink=True)
+        weights.close(unlink=True)
+
+    elapsed = time.perf_counter() - start
+    if not os.path.exists(save_path):
+        torch.save(qnet.state_dict(), save_path)
+    print(f"Training done. {env_steps} env steps, {updates} updates in {elapsed:.1f}s. Model saved at {save_path}")
+    return {"ep_rewards": ep_rewards, "env_steps": env_steps, "updates": updates, "seconds": elapsed,
+            "env_steps_per_sec": env_steps / elapsed, "updates_per_sec": updates / elapsed,
+            "best_avg20": best_mean, "torn_redraws": torn_redraws, "obstacle_length": obstacle_length}
+
+if __name__ == "__main__":
+    train_apex(n_actors=max(1, (os.cpu_count() or 2) - 1), total_updates=50_000, seed=0)
@@ -1,15 +1,74 @@
 # scripts/train_dqn.py
-import math, random, os
+import math, random, os, time
 from statistics import mean
 import numpy as np
 import torch, torch.nn as nn, torch.optim as optim
 
 from surfer.env import SurferEnv
-from agents.dqn import ReplayBuffer, QNetwork
+from surfer.trajectory import TrajectoryDataset
+from agents.dqn import ReplayBuffer, PrioritizedReplayBuffer, QNetwork
+from agents.qcache import QValueCache, torch_q_fn
+from scripts.telemetry import Telemetry
+from scripts.checkpoint import AsyncCheckpointer, snapshot
+from scripts.background_eval import BackgroundEvaluator
 
 def set_seed(seed=0):
     random.seed(seed); np.random.seed(seed); torch.manual_seed(seed)
 
+def margin_loss(q, actions, margin=0.8):
+    """DQfD large-margin loss: max_a [Q(s,a) + margin * (a != a_E)] - Q(s,a_E), per sample"""
+    q_demo = q.gather(1, actions.unsqueeze(1)).squeeze(1)
+    penalty = torch.full_like(q, margin).scatter_(1, actions.unsqueeze(1), 0.0)
+    return (q + penalty).max(dim=1).values - q_demo
+
+def learn_step(qnet, target, optimizer, loss_fn, batch, gamma, grad_clip_norm, weights=None, device="cpu",
+               margin=None, margin_weight=1.0, stats=None):
+    """
+    One Double-DQN update on a sampled batch; returns (loss, detached TD errors).
+    margin adds the DQfD supervised margin loss, treating the batch actions as demonstrations.
+    A stats dict is filled with Q(s,a) mean/max and the gradient norm.
+    """
+    b_obs, b_act, b_rew, b_next, b_done = (t.to(device) for t in batch)
+
+    # Q(s,a)
+    q_all = qnet(b_obs)
+    q_sa = q_all.gather(1, b_act.unsqueeze(1)).squeeze(1)
+
+    # Double DQN target
+    with torch.no_grad():
+        next_actions = qnet(b_next).argmax(dim=1, keepdim=True)
+        next_q = target(b_next).gather(1, next_actions).squeeze(1)
+        target_q = b_rew + gamma * next_q * (1.0 - b_done)
+
+    losses = loss_fn(q_sa, target_q)  # per-sample Huber
+    if margin is not None:
+        losses = losses + margin_weight * margin_loss(q_all, b_act, margin)
+    loss = (losses * weights.to(device)).mean() if weights is not None else losses.mean()
+    optimizer.zero_grad()
+    loss.backward()
+    grad_norm = nn.utils.clip_grad_norm_(qnet.parameters(), grad_clip_norm)
+    optimizer.step()
+    if stats is not None:
+        q = q_sa.detach()
+        stats["q_mean"], stats["q_max"], stats["grad_norm"] = q.mean().item(), q.max().item(), grad_norm.item()
+    return loss.item(), (target_q - q_sa).detach()
+
+def prefill_buffer(buffer, dataset, limit=None):
+    """
+    Pushes the newest valid transitions of a TrajectoryDataset (or its directory) into a
+    replay buffer, up to its capacity. Rows are grouped by episode so consecutive steps land
+    in adjacent slots and share stored observations.
+    """
+    if isinstance(dataset, str):
+        dataset = TrajectoryDataset(dataset)
+    limit = min(limit or buffer.capacity, buffer.capacity)
+    idx = np.arange(max(0, len(dataset) - limit), len(dataset))
+    idx = idx[dataset.has_next(idx)]
+    idx = idx[np.lexsort((idx, dataset.episode[idx]))]
+    for obs, action, reward, next_obs, done in zip(*dataset.transitions(idx)):
+        buffer.push(obs, action, reward, next_obs, done)
+    return len(idx)
+
 def train_dqn(
     episodes=500,
     batch_size=64,
@@ -22,12 +81,31 @@ def train_dqn(
     replay_capacity=100_000,
     warmup_steps=2000,
     grad_clip_norm=5.0,
+    prioritized=False,            # sum-tree prioritized replay instead of uniform
+    per_alpha=0.6,
+    per_beta_start=0.4,           # importance-sampling exponent, annealed to 1.0
+    per_beta_steps=100_000,
+    stop_avg20=None,              # stop once avg20 reaches this score
+    q_cache_quantum=None,         # act through a QValueCache keyed on obs rounded to this step
+    q_cache_refresh=1,            # learner updates between cache invalidations (stale-tolerant acting if > 1); checkpointed with the cache
+    init_weights=None,            # QNetwork state dict (or path) to start from, e.g. scripts/pretrain.py output
+    prefill=None,                 # TrajectoryDataset (or its directory) whose transitions seed the replay buffer
+    demo_batch=0,                 # > 0: each update also replays this many prefill transitions as demonstrations
+    demo_margin=0.8,              # DQfD margin loss applied to those demonstration rows
+    telemetry=None,               # scripts.telemetry.Telemetry (or a JSONL path) for per-phase timing records
+    checkpoint_path=None,         # full training-state checkpoints (written in the background) go here
+    checkpoint_every=10,          # episodes between checkpoints
+    resume_from=None,             # checkpoint to continue from; the run proceeds exactly as if never stopped
+    eval_every=None,              # episodes between greedy held-out evaluations (background process); they pick the best model
+    eval_episodes=20,             # held-out seeds per evaluation
+    on_episode=None,              # called as on_episode(episode, ep_rewards) after each episode; True stops training
     render=False,
     seed=0,
+    obstacle_length=None,         # None: this process's OBSTACLE_LENGTH (random per interpreter); pin it across processes
     save_path="dqn_agent.pt",
 ):
     set_seed(seed)
-    env = SurferEnv(render=render, target_fps=60, seed=seed)
+    env = SurferEnv(render=render, target_fps=60, seed=seed, obstacle_length=obstacle_length)
     obs = env.reset()
     obs_dim = len(obs)        # should be 6 in your 1-lookahead setup
     n_actions = 3
@@ -35,22 +113,100 @@ def train_dqn(
     device = torch.device("cpu")
 
     qnet = QNetwork(obs_dim, n_actions).to(device)
+    if init_weights is not None:
+        if isinstance(init_weights, str):
+            init_weights = torch.load(init_weights, map_location=device)
+        qnet.load_state_dict(init_weights)
     target = QNetwork(obs_dim, n_actions).to(device)
     target.load_state_dict(qnet.state_dict())
     target.eval()
 
     optimizer = optim.Adam(qnet.parameters(), lr=lr)
-    loss_fn = nn.SmoothL1Loss()  # Huber
+    loss_fn = nn.SmoothL1Loss(reduction="none")  # Huber, weighted per sample for PER
+
+    if prioritized:
+        buffer = PrioritizedReplayBuffer(capacity=replay_capacity, obs_dim=obs_dim, alpha=per_alpha)
+    else:
+        buffer = ReplayBuffer(capacity=replay_capacity, obs_dim=obs_dim)
+    demos = None
+    if prefill is not None:
+        if isinstance(prefill, str):
+            prefill = TrajectoryDataset(prefill)
+        if resume_from is None:  # a resumed run restores the buffer instead
+            prefill_buffer(buffer, prefill)
+        demos = prefill if demo_batch else None
+        demo_rng = np.random.default_rng(seed)
+        margin_weight = torch.cat([torch.zeros(batch_size), torch.ones(demo_batch)])
 
-    buffer = ReplayBuffer(capacity=replay_capacity)
+    q_cache = QValueCache(torch_q_fn(qnet), quantum=q_cache_quantum) if q_cache_quantum is not None else None
+    updates = 0
+
+    tel = Telemetry(telemetry) if isinstance(telemetry, str) else telemetry
+    stats = {}
 
     epsilon = epsilon_start
     step = 0
     ep_rewards = []
     best_mean = -1e9
+    start_time = time.perf_counter()
+    reached = None
+    stopped = None
+    first_ep = 1
+    evals, eval_snapshots, best_eval = [], {}, -1e9
+
+    def training_state():
+        return {
+            "qnet": snapshot(qnet.state_dict()), "target": snapshot(target.state_dict()),
+            "optimizer": snapshot(optimizer.state_dict()), "buffer": buffer.state_dict(),
+            "episode": ep, "step": step, "updates": updates, "epsilon": epsilon,
+            "ep_rewards": list(ep_rewards), "best_mean": best_mean, "best_eval": best_eval,
+            "seconds": time.perf_counter() - start_time, "obstacle_length": env.obstacle_length,
+            "q_cache": q_cache.state_dict() if q_cache is not None else None,
+            "rng": {"python": random.getstate(), "numpy": np.random.get_state(), "torch": torch.get_rng_state(),
+                    "env": env.rand.getstate(), "demo": demo_rng.bit_generator.state if demos is not None else None},
+        }
+
+    if resume_from is not None:
+        state = torch.load(resume_from, map_location=device, weights_only=False)
+        qnet.load_state_dict(state["qnet"])
+        target.load_state_dict(state["target"])
+        optimizer.load_state_dict(state["optimizer"])
+        buffer.load_state_dict(state["buffer"])
+        first_ep, step, updates, epsilon = state["episode"] + 1, state["step"], state["updates"], state["epsilon"]
+        ep_rewards, best_mean, best_eval = state["ep_rewards"], state["best_mean"], state.get("best_eval", -1e9)
+        start_time -= state["seconds"]
+        # stale entries drive acting when q_cache_refresh > 1, so they are restored too; the refresh
+        # phase follows from the restored update count. Older checkpoints resume with a cold cache.
+        if q_cache is not None and state.get("q_cache") is not None:
+            q_cache.load_state_dict(state["q_cache"])
+        env.obstacle_length = state["obstacle_length"]
+        rng = state["rng"]
+        random.setstate(rng["python"]); np.random.set_state(rng["numpy"]); torch.set_rng_state(rng["torch"])
+        env.rand.setstate(rng["env"])
+        if demos is not None and rng["demo"] is not None:
+            demo_rng.bit_generator.state = rng["demo"]
+        print(f"Resumed from {resume_from} at episode {state['episode']} (step {step})")
+
+    # model and checkpoint writes happen on a background thread; the loop only copies state
+    writer = AsyncCheckpointer()
+    evaluator = BackgroundEvaluator(episodes=eval_episodes, obstacle_length=env.obstacle_length) if eval_every else None
+
+    def take_evals(results):
+        """Saves the evaluated snapshot whenever its held-out mean is the best so far"""
+        nonlocal best_eval
+        for r in results:
+            weights = eval_snapshots.pop(r["tag"])
+            for tag in [t for t in eval_snapshots if t < r["tag"]]:  # replaced while waiting
+                del eval_snapshots[tag]
+            evals.append(r)
+            print(f"Eval @ ep {r['tag']:4d} | mean {r['mean']:7.1f} [{r['ci_low']:.1f}, {r['ci_high']:.1f}] "
+                  f"| median {r['median']:7.1f} | {r['seconds']:.1f}s")
+            if r["mean"] > best_eval:
+                best_eval = r["mean"]
+                writer.save(weights, save_path)
 
     try:
-        for ep in range(1, episodes + 1):
+        for ep in range(first_ep, episodes + 1):
             obs = env.reset()
             done = False
             ep_reward = 0.0
@@ -65,59 +221,124 @@ def train_dqn(
                 # Act
                 if random.random() < epsilon:
                     action = random.randrange(n_actions)
+                elif q_cache is not None:
+                    action = q_cache.act(obs)
                 else:
                     with torch.no_grad():
                         q = qnet(torch.tensor(obs, dtype=torch.float32, device=device))
                         action = int(torch.argmax(q).item())
+                if tel is not None: tel.lap("act")
 
                 next_obs, reward, done, info = env.step(action)
+                if tel is not None: tel.lap("env")
                 buffer.push(obs, action, reward, next_obs, done)
                 ep_reward += reward
                 obs = next_obs
+                if tel is not None: tel.lap("replay_push")
 
                 # Learn
-                if len(buffer) >= max(batch_size, warmup_steps):
-                    b_obs, b_act, b_rew, b_next, b_done = buffer.sample(batch_size)
-                    b_obs = b_obs.to(device); b_act = b_act.to(device)
-                    b_rew = b_rew.to(device); b_next = b_next.to(device); b_done = b_done.to(device)
+                learning = len(buffer) >= max(batch_size, warmup_steps)
+                if learning:
+                    if prioritized:
+                        beta = min(1.0, per_beta_start + (1.0 - per_beta_start) * step / per_beta_steps)
+                        b_obs, b_act, b_rew, b_next, b_done, b_w, b_idx = buffer.sample(batch_size, beta)
+                    else:
+                        b_obs, b_act, b_rew, b_next, b_done = buffer.sample(batch_size)
+                    batch = (b_obs, b_act, b_rew, b_next, b_done)
+                    weights = b_w if prioritized else None
+                    if demos is not None:
+                        # DQfD: demonstrations stay in every batch with a margin loss on their actions
+                        demo = (torch.from_numpy(a) for a in demos.sample(demo_batch, demo_rng))
+                        batch = tuple(torch.cat([b, d]) for b, d in zip(batch, demo))
+                        if weights is not None:
+                            weights = torch.cat([weights, torch.ones(demo_batch)])
+                    if tel is not None: tel.lap("sample")
+                    # Q/gradient stats cost a few tensor syncs, so only every stats_every-th update reports them
+                    step_stats = stats if tel is not None and updates % tel.stats_every == 0 else None
+                    if demos is not None:
+                        loss, td = learn_step(qnet, target, optimizer, loss_fn, batch, gamma, grad_clip_norm,
+                                              weights, device, margin=demo_margin, margin_weight=margin_weight, stats=step_stats)
+                        td = td[:batch_size]
+                    else:
+                        loss, td = learn_step(qnet, target, optimizer, loss_fn, batch, gamma, grad_clip_norm, weights, device,
+                                              stats=step_stats)
+                    if tel is not None: tel.lap("learn")
 
-                    # Q(s,a)
-                    q_sa = qnet(b_obs).gather(1, b_act.unsqueeze(1)).squeeze(1)
-
-                    # Double DQN target
-                    with torch.no_grad():
-                        next_actions = qnet(b_next).argmax(dim=1, keepdim=True)
-                        next_q = target(b_next).gather(1, next_actions).squeeze(1)
-                        target_q = b_rew + gamma * next_q * (1.0 - b_done)
-
-                    loss = loss_fn(q_sa, target_q)
-                    optimizer.zero_grad()
-                    loss.backward()
-                    nn.utils.clip_grad_norm_(qnet.parameters(), grad_clip_norm)
-                    optimizer.step()
+                    if prioritized:
+                        buffer.update_priorities(b_idx, td.abs().cpu().numpy())
+                    updates += 1
+                    if q_cache is not None and updates % q_cache_refresh == 0:
+                        q_cache.invalidate()
+                    if tel is not None:
+                        tel.add("loss", loss)
+                        if step_stats is not None:
+                            for k, v in step_stats.items():
+                                tel.add(k, v)
+                        tel.lap("priorities" if prioritized else "learn")
 
                 # Target net sync
                 if step % target_update_steps == 0:
                     target.load_state_dict(qnet.state_dict())
+                    if tel is not None: tel.lap("target_sync")
+                if tel is not None:
+                    tel.step(learning)
+                    tel.maybe_emit(buffer, epsilon=epsilon)
 
             ep_rewards.append(ep_reward)
             recent = ep_rewards[-20:] if len(ep_rewards) >= 20 else ep_rewards
             print(f"Ep {ep:4d} | reward {ep_reward:7.1f} | eps {epsilon:0.2f} | avg20 {mean(recent):7.1f}")
+            if tel is not None:
+                tel.episode(ep_reward)
+                tel.lap("log")
 
-            # Save best
+            # Save best: by held-out greedy evaluation when enabled, else by training avg20
+            if evaluator is not None:
+                if ep % eval_every == 0:
+                    eval_snapshots[ep] = snapshot(qnet.state_dict())
+                    evaluator.submit(eval_snapshots[ep], ep)
+                take_evals(evaluator.poll())
+                if tel is not None: tel.lap("eval")
             if len(ep_rewards) >= 20:
                 avg20 = mean(ep_rewards[-20:])
                 if avg20 > best_mean:
                     best_mean = avg20
-                    torch.save(qnet.state_dict(), save_path)
+                    if evaluator is None:
+                        writer.save(snapshot(qnet.state_dict()), save_path)
                     # print(f"Saved best model to {save_path} (avg20={best_mean:.1f})")
+                    if tel is not None: tel.lap("checkpoint")
+                if stop_avg20 is not None and avg20 >= stop_avg20:
+                    reached = {"episode": ep, "step": step, "seconds": time.perf_counter() - start_time}
+                    break
+
+            if on_episode is not None and on_episode(ep, ep_rewards):
+                stopped = ep
+                break
+
+            if checkpoint_path is not None and ep % checkpoint_every == 0:
+                writer.save(training_state(), checkpoint_path)
+                if tel is not None: tel.lap("checkpoint")
+
+        if evaluator is not None:
+            if first_ep <= episodes and ep % eval_every:
+                eval_snapshots[ep] = snapshot(qnet.state_dict())  # the final weights get a say too
+                evaluator.submit(eval_snapshots[ep], ep)
+            take_evals(evaluator.drain())
     finally:
         env.close()
+        if evaluator is not None:
+            evaluator.close()
+        writer.close()
+        if tel is not None:
+            tel.close()
 
     # Final save
     if not os.path.exists(save_path):
         torch.save(qnet.state_dict(), save_path)
     print(f"Training done. Model saved at {save_path}")
+    return {"ep_rewards": ep_rewards, "steps": step, "updates": updates, "seconds": time.perf_counter() - start_time,
+            "best_avg20": best_mean, "reached": reached, "stopped": stopped,
+            "evals": evals, "best_eval": best_eval if evals else None,
+            "q_cache": q_cache.stats() if q_cache is not None else None}
 
 if __name__ == "__main__":
     # Fast sanity run: drop episodes to e.g. 100 first, then increase.
@@ -0,0 +1,161 @@
+# surfer/async_vec_env.py
+import os, time, traceback, multiprocessing as mp
+import numpy as np
+from .core import OBSTACLE_LENGTH
+from .env import SurferEnv
+from .shared_arrays import SharedArrays
+
+def _specs(n_envs, obs_dim, n_workers):
+    return {"actions": ((n_envs,), np.int64), "obs": ((n_envs, obs_dim), np.float32),
+            "terminal_obs": ((n_envs, obs_dim), np.float32), "reward": ((n_envs,), np.float32),
+            "done": ((n_envs,), np.bool_), "score": ((n_envs,), np.int64), "time": ((n_envs,), np.float64),
+            "latency_last": ((n_workers,), np.float64), "latency_total": ((n_workers,), np.float64),
+            "latency_calls": ((n_workers,), np.int64)}
+
+def _serve(conn, a, envs, lo, worker):
+    hi = lo + len(envs)
+    # this worker's rows; results are gathered in lists and written with one assignment per array
+    actions, obs_out, terminal = a.actions[lo:hi], a.obs[lo:hi], a.terminal_obs[lo:hi]
+    reward, done, score, time_out = a.reward[lo:hi], a.done[lo:hi], a.score[lo:hi], a.time[lo:hi]
+    while True:
+        cmd = conn.recv()
+        if cmd == "close":
+            return
+        start = time.perf_counter()
+        try:
+            if cmd == "step":
+                steps = [env.step(act) for env, act in zip(envs, actions.tolist())]
+                terminal[:] = [s[0] for s in steps]
+                reward[:] = [s[1] for s in steps]
+                done[:] = [s[2] for s in steps]
+                score[:] = [s[3]["score"] for s in steps]
+                time_out[:] = [s[3]["time"] for s in steps]
+                obs_out[:] = [env.reset() if s[2] else s[0] for env, s in zip(envs, steps)]
+            elif cmd == "reset":
+                obs_out[:] = [env.reset() for env in envs]
+            else:
+                raise ValueError(f"unknown command {cmd!r}")
+        except Exception:
+            conn.send(traceback.format_exc())
+            continue
+        elapsed = time.perf_counter() - start
+        a.latency_last[worker] = elapsed
+        a.latency_total[worker] += elapsed
+        a.latency_calls[worker] += 1
+        conn.send(None)
+
+def _worker(conn, shm_name, specs, worker, lo, hi, seed, env_kwargs):
+    arrays = SharedArrays(specs, name=shm_name)
+    envs = []
+    try:
+        envs = [SurferEnv(seed=seed + i, **env_kwargs) for i in range(lo, hi)]
+        conn.send(None)
+        _serve(conn, arrays, envs, lo, worker)  # its slices die with _serve, before arrays.close()
+    except Exception:
+        conn.send(traceback.format_exc())
+    finally:
+        for env in envs:
+            env.close()
+        arrays.close()
+
+class AsyncSurferVecEnv:
+    """
+    N SurferEnv instances (env i seeded seed + i) spread over worker processes, each hosting
+    a contiguous slice. Actions, observations, rewards and done flags live in one shared-
+    memory block; the pipes only carry a command and an ack per step. Same step contract as
+    VecSurferEnv: obs (N, obs_dim) float32, reward (N,) float32, done (N,) bool, finished
+    episodes reset at once with info["terminal_obs"/"score"/"time"]. Returned arrays are
+    copies. env_kwargs go to every SurferEnv (render, target_fps, lookahead, config, ...);
+    obstacle_length defaults to this process's so all workers agree.
+    """
+    def __init__(self, n_envs, seed=0, n_workers=None, start_method="spawn", **env_kwargs):
+        env_kwargs.setdefault("obstacle_length", OBSTACLE_LENGTH)
+        probe = SurferEnv(seed=seed, **{k: v for k, v in env_kwargs.items() if k != "render"})
+        self.obs_dim = len(probe.reset())
+        self.n_envs = n_envs
+        self.n_workers = n_workers = max(1, min(n_envs, n_workers or os.cpu_count() or 1))
+        specs = _specs(n_envs, self.obs_dim, n_workers)
+        self._arrays = SharedArrays(specs, create=True)
+
+        ctx = mp.get_context(start_method)
+        bounds = np.linspace(0, n_envs, n_workers + 1).round().astype(int)
+        self.slices = [(int(bounds[w]), int(bounds[w + 1])) for w in range(n_workers)]
+        self._conns, self._procs = [], []
+        for w, (lo, hi) in enumerate(self.slices):
+            parent, child = ctx.Pipe()
+            proc = ctx.Process(target=_worker, daemon=True,
+                               args=(child, self._arrays.name, specs, w, lo, hi, seed, env_kwargs))
+            proc.start()
+            child.close()
+            self._conns.append(parent)
+            self._procs.append(proc)
+        self._waiting = False
+        self._closed = False
+        try:
+            self._collect()  # workers built their envs
+        except Exception:
+            self.close()
+            raise
+
+    def _collect(self):
+        errors = [msg for msg in (conn.recv() for conn in self._conns) if msg is not None]
+        if errors:
+            raise RuntimeError("worker failed:\n" + errors[0])
+
+    def _command(self, cmd):
+        for conn in self._conns:
+            conn.send(cmd)
+
+    def reset(self):
+        if self._waiting:
+            self.step_wait()
+        self._command("reset")
+        self._collect()
+        return self._arrays.obs.copy()
+
+    def step_async(self, actions):
+        """Starts a step in every worker and returns at once"""
+        if self._waiting:
+            raise RuntimeError("step_async called twice without step_wait")
+        self._arrays.actions[:] = actions
+        self._command("step")
+        self._waiting = True
+
+    def step_wait(self):
+        self._collect()
+        self._waiting = False
+        a = self._arrays
+        info = {"score": a.score.copy(), "time": a.time.copy(), "terminal_obs": a.terminal_obs.copy()}
+        return a.obs.copy(), a.reward.copy(), a.done.copy(), info
+
+    def step(self, actions):
+        self.step_async(actions)
+        return self.step_wait()
+
+    def latency_stats(self):
+        """Per worker: envs hosted, commands served, last and mean time inside the worker per command (ms)"""
+        a = self._arrays
+        return [{"worker": w, "envs": hi - lo, "calls": int(a.latency_calls[w]),
+                 "last_ms": 1e3 * float(a.latency_last[w]),
+                 "mean_ms": 1e3 * float(a.latency_total[w]) / max(1, int(a.latency_calls[w]))}
+                for w, (lo, hi) in enumerate(self.slices)]
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        if self._waiting:
+            try:
+                self._collect()
+            except (RuntimeError, EOFError):
+                pass
+        for conn, proc in zip(self._conns, self._procs):
+            try:
+                conn.send("close")
+            except (BrokenPipeError, OSError):
+                pass
+            proc.join(timeout=5)
+            if proc.is_alive():
+                proc.terminate()
+            conn.close()
+        self._arrays.close(unlink=True)
@@ -1,4 +1,5 @@
-import pygame
+from dataclasses import dataclass
+
 WIDTH, HEIGHT = 480, 720
 PLAYER_WIDTH, PLAYER_HEIGHT = 60, 80
 PLAYER_SPEED = 300
@@ -14,7 +15,57 @@ BASE_LANE_SWITCH_TIME = 0.25
 BASE_OBSTACLE_SPEED = 350
 NO_CLIP = True
 
+@dataclass(frozen=True)
+class EnvConfig:
+    """
+    Immutable settings of one SurferEnv instance, so differently configured envs can share a
+    process; the defaults are the module constants above. obstacle_length=None uses the
+    per-process surfer.core.OBSTACLE_LENGTH. lookahead is the number of nearest upcoming
+    obstacles per lane in the observation; obs_lengths adds their lengths after the TTCs.
+    """
+    width: int = WIDTH
+    height: int = HEIGHT
+    lanes: int = LANES
+    lane_width: int = LANE_WIDTH
+    player_width: int = PLAYER_WIDTH
+    player_height: int = PLAYER_HEIGHT
+    ground_y: int = GROUND_Y
+    obstacle_y: int = OBSTACLE_Y
+    obstacle_length: int = None
+    min_spawn_interval: float = MIN_SPAWN_INTERVAL
+    max_spawn_interval: float = MAX_SPAWN_INTERVAL
+    base_obstacle_speed: float = BASE_OBSTACLE_SPEED
+    max_obstacle_speed: float = MAX_OBSTACLE_SPEED
+    difficulty_scaling: float = DIFFICULTY_SCALING
+    lookahead: int = 1
+    obs_lengths: bool = False
+
+    def __post_init__(self):
+        if self.lanes < 1 or self.lanes * self.lane_width > self.width:
+            raise ValueError(f"{self.lanes} lanes of {self.lane_width}px do not fit in width {self.width}")
+        if self.lookahead < 1:
+            raise ValueError(f"lookahead must be >= 1, got {self.lookahead}")
+        if not 0 < self.min_spawn_interval <= self.max_spawn_interval:
+            raise ValueError(f"bad spawn interval [{self.min_spawn_interval}, {self.max_spawn_interval}]")
+
+    @property
+    def obs_dim(self):
+        """[lane one-hot, K TTCs per lane, (K lengths per lane)]"""
+        return self.lanes * (1 + self.lookahead * (2 if self.obs_lengths else 1))
+
+    @property
+    def schedule_key(self):
+        """The settings the per-frame difficulty tables (surfer.core.StepSchedule) depend on"""
+        return (self.base_obstacle_speed, self.max_obstacle_speed, self.difficulty_scaling,
+                self.min_spawn_interval, self.max_spawn_interval)
+
+_FONTS = None
+
 def make_fonts():
-    pygame.font.init()
-    FONT, SMALL_FONT = pygame.font.Font(None, 74), pygame.font.Font(None, 37)
-    return FONT, SMALL_FONT
+    """(FONT, SMALL_FONT), created once per pygame.font session"""
+    global _FONTS
+    import pygame
+    if _FONTS is None or not pygame.font.get_init():
+        pygame.font.init()
+        _FONTS = pygame.font.Font(None, 74), pygame.font.Font(None, 37)
+    return _FONTS
@@ -1,13 +1,136 @@
-import random, pygame
-from .config import WIDTH, HEIGHT, LANES, LANE_WIDTH
+import math, random
+from .config import WIDTH, HEIGHT, LANES, LANE_WIDTH, EnvConfig
+
+def lround(v):
+    """Rounds half away from zero, the way pygame.Rect stores float coordinates"""
+    if v.__class__ is int:
+        return v
+    f = math.floor(v)
+    d = v - f
+    return f + 1 if d > 0.5 or (d == 0.5 and v > 0) else f
+
+class Box:
+    """
+    Pygame-free stand-in for pygame.Rect: integer x/y/w/h with the same rounding,
+    alignment and colliderect semantics. Behaves as a 4-sequence, so pygame.draw.rect
+    and Rect.colliderect accept it directly.
+    """
+    __slots__ = ("_x", "_y", "w", "h")
+
+    def __init__(self, x, y, w, h):
+        self._x, self._y, self.w, self.h = lround(x), lround(y), lround(w), lround(h)
+
+    @property
+    def x(self): return self._x
+    @x.setter
+    def x(self, v): self._x = lround(v)
+
+    @property
+    def y(self): return self._y
+    @y.setter
+    def y(self, v): self._y = lround(v)
+
+    left, top = x, y
+    width = property(lambda self: self.w)
+    height = property(lambda self: self.h)
+
+    @property
+    def right(self): return self._x + self.w
+    @right.setter
+    def right(self, v): self._x = lround(v) - self.w
+
+    @property
+    def bottom(self): return self._y + self.h
+    @bottom.setter
+    def bottom(self, v): self._y = lround(v) - self.h
+
+    @property
+    def centerx(self): return self._x + self.w // 2
+    @centerx.setter
+    def centerx(self, v): self._x = lround(v) - self.w // 2
+
+    @property
+    def centery(self): return self._y + self.h // 2
+    @centery.setter
+    def centery(self, v): self._y = lround(v) - self.h // 2
+
+    def colliderect(self, other):
+        ox, oy, ow, oh = other
+        if not (self.w and self.h and ow and oh):
+            return False
+        return (self._x < ox + ow and self._y < oy + oh
+                and self._x + self.w > ox and self._y + self.h > oy)
+
+    def copy(self): return Box(self._x, self._y, self.w, self.h)
+    def __len__(self): return 4
+    def __getitem__(self, i): return (self._x, self._y, self.w, self.h)[i]
+    def __iter__(self): return iter((self._x, self._y, self.w, self.h))
+    def __eq__(self, other): return tuple(self) == tuple(other)
+    def __repr__(self): return f"<Box({self._x}, {self._y}, {self.w}, {self.h})>"
+
+class StepSchedule:
+    """
+    Per-frame tables of everything in SurferEnv.step that only depends on how many frames
+    the episode has run: time_survived, score, obstacle speed, spawn-interval bounds and
+    the integer distance obstacles move (shift, with running total cum_shift).
+    Values are accumulated with the same float expressions as the per-frame loop, so they
+    are bit-identical to it; index k is the state after k frames. The spawn timer restarts
+    from 0.0 and adds dt per frame too, so time[j] is also its value j frames after a spawn.
+    An integer y moves to lround(y + d) == y + lround(d) unless frac(d) is ~0.5, where
+    the result depends on y; those frames are listed in `nonuniform`.
+    Speeds and spawn bounds follow an EnvConfig (the module defaults if None).
+    """
+    _cache = {}
+
+    @classmethod
+    def for_fps(cls, target_fps: int, config: EnvConfig = None):
+        """Shared schedule per (fps, difficulty settings); envs only read it"""
+        config = config or EnvConfig()
+        key = (target_fps, config.schedule_key)
+        if key not in cls._cache:
+            cls._cache[key] = cls(1.0 / target_fps, config=config)
+        return cls._cache[key]
+
+    def __init__(self, dt: float, size: int = 4096, config: EnvConfig = None):
+        config = config or EnvConfig()
+        self.dt = dt
+        self.base_speed, self.max_speed, self.scaling, self.min_interval, self.max_interval = config.schedule_key
+        self.time, self.score, self.speed = [0.0], [0], [self.base_speed]
+        self.min_spawn, self.max_spawn = [self.min_interval], [self.max_interval]
+        self.shift, self.cum_shift, self.nonuniform = [0], [0], []
+        self.grow(size)
+
+    def grow(self, size: int):
+        t, score, speed, cum = self.time[-1], self.score[-1], self.speed[-1], self.cum_shift[-1]
+        base_speed, max_speed, scaling = self.base_speed, self.max_speed, self.scaling
+        min_interval, max_interval = self.min_interval, self.max_interval
+        while len(self.time) < size:
+            t += self.dt
+            score += int(t * 2)
+            speed = min(speed + ((t ** 0.5) * scaling), max_speed)
+            diff_mult = speed / base_speed
+            d = speed * self.dt
+            if abs(d - math.floor(d) - 0.5) < 1e-9:
+                self.nonuniform.append(len(self.time))
+            shift = lround(d)
+            cum += shift
+            self.time.append(t); self.score.append(score); self.speed.append(speed)
+            self.min_spawn.append(min(min_interval, min_interval / diff_mult))
+            self.max_spawn.append(min(max_interval, max_interval / diff_mult))
+            self.shift.append(shift); self.cum_shift.append(cum)
+
+    def ensure(self, k: int):
+        if k >= len(self.time):
+            self.grow(max(2 * len(self.time), k + 1))
 
 def compute_lane_centers(screen_width:int, num_lanes:int, lane_width:int):
     """Computes the x coordinates for lanes given total width and lane parameters"""
     margin = (screen_width - (num_lanes * lane_width)) // 2
     return [(margin + lane_width*i + lane_width//2) for i in range(num_lanes)]
 
-def draw_lanes(screen: pygame.Surface, centers: list, lane_width: int, screen_height: int):
+def draw_lanes(screen, centers: list, lane_width: int, screen_height: int):
     """Draws the lanes and separates by lines"""
+    import pygame
     for idx, center in enumerate(centers):
         l_bound = center - lane_width//2
         lane = pygame.Rect(l_bound, 0, lane_width, screen_height)
@@ -16,11 +139,18 @@ def draw_lanes(screen: pygame.Surface, centers: list, lane_width: int, screen_he
             pygame.draw.line(screen, "GREEN", (l_bound, 0), (l_bound, screen_height), width=2)
 
 
-def spawn_obstacle(lane_centers: list, lane_width: int, top_y: int, length: int = random.randint(50, 200)):
-    """Generates and returns a pygame rectangle object in a random lane"""
-    lane_id = random.randrange(len(lane_centers))
+# obstacle length is drawn once per process (it used to be the default argument below)
+OBSTACLE_LENGTH = random.randint(50, 200)
+
+def spawn_obstacle(lane_centers: list, lane_width: int, top_y: int, length: int = OBSTACLE_LENGTH, rng=random):
+    """Generates and returns an obstacle Box in a random lane drawn from rng"""
+    lane_id = rng.randrange(len(lane_centers))
+    return make_obstacle(lane_centers, lane_width, lane_id, top_y, length), lane_id
+
+def make_obstacle(lane_centers: list, lane_width: int, lane_id: int, top_y: int, length: int = OBSTACLE_LENGTH):
+    """Builds the obstacle Box for a given lane and top"""
     width, length = int(lane_width*0.7), length
-    obstacle = pygame.Rect(0,0,width,length)
+    obstacle = Box(0,0,width,length)
     obstacle.centerx = lane_centers[lane_id]
     obstacle.y = top_y
-    return obstacle, lane_id
\ No newline at end of file
+    return obstacle
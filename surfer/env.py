@@ -1,29 +1,28 @@
 # surfer/env.py
-import random, pygame
-from .config import (
-    WIDTH, HEIGHT, PLAYER_WIDTH, PLAYER_HEIGHT, LANES, LANE_WIDTH,
-    GROUND_Y, OBSTACLE_Y, MIN_SPAWN_INTERVAL, MAX_SPAWN_INTERVAL,
-    DIFFICULTY_SCALING, MAX_OBSTACLE_SPEED, BASE_OBSTACLE_SPEED
-)
-from .core import compute_lane_centers, spawn_obstacle
-
-OBS_LOOKAHEAD = 1  # exactly one obstacle per lane
+import random
+from bisect import bisect_left, bisect_right
+from collections import deque
+from dataclasses import replace
+from .config import LANES, EnvConfig
+from .core import Box, OBSTACLE_LENGTH, StepSchedule, compute_lane_centers, make_obstacle, spawn_obstacle
+
+OBS_LOOKAHEAD = 1  # nearest obstacles per lane in the observation
 FAR_TTC_SEC = 5.0  # anything >= this is considered "far"
 
-def extract_state(player, cur_lane, obstacles, obstacle_speed):
+def extract_state(player, cur_lane, obstacles, obstacle_speed, lanes: int = LANES):
     """
-    Observation (length 6):
+    Observation (length 6 with 3 lanes):
       [ lane_one_hot(3), lane0_ttc, lane1_ttc, lane2_ttc ]
     - TTC is time (sec) until obstacle bottom reaches player top.
     - Normalize to [0,1] by clipping to [0, FAR_TTC_SEC] then dividing by FAR_TTC_SEC.
     - If a lane has no upcoming obstacle, its TTC = 1.0 (far).
     """
     # one-hot lane
-    lane_oh = [0, 0, 0]
+    lane_oh = [0] * lanes
     lane_oh[cur_lane] = 1
 
     # find the *closest* upcoming obstacle per lane
-    nearest_ttc = [FAR_TTC_SEC] * LANES
+    nearest_ttc = [FAR_TTC_SEC] * lanes
     for obs, lane_id in obstacles:
         if obs.bottom >= player.top:
             continue  # already passed or overlapping
@@ -34,75 +33,365 @@ def extract_state(player, cur_lane, obstacles, obstacle_speed):
 
     # normalize to [0,1]
     ttcs_norm = [min(FAR_TTC_SEC, t) / FAR_TTC_SEC for t in nearest_ttc]
-    return lane_oh + ttcs_norm  # length = 3 + 3 = 6
+    return lane_oh + ttcs_norm  # length = lanes + lanes
+
+def extract_state_lanes(player, cur_lane, lane_obstacles, obstacle_speed, lookahead: int = OBS_LOOKAHEAD):
+    """
+    Same observation as extract_state, built from per-lane queues ordered oldest (lowest on
+    screen) first. Obstacles in a lane fall at the same speed, so the first upcoming one is
+    the nearest and only the first `lookahead` upcoming ones per lane are read.
+    For lookahead K > 1 the TTC block repeats per rank:
+      [ lane_one_hot, nearest ttc per lane, 2nd nearest per lane, ..., Kth nearest per lane ]
+    """
+    n_lanes = len(lane_obstacles)
+    lane_oh = [0] * n_lanes
+    lane_oh[cur_lane] = 1
+
+    top = player.top
+    speed = max(obstacle_speed, 1e-6)
+    ttcs_norm = [1.0] * (n_lanes * lookahead)
+    for lane_id, lane in enumerate(lane_obstacles):
+        k = lane_id
+        for obs in lane:
+            bottom = obs.bottom
+            if bottom >= top:
+                continue  # already passed or overlapping (only ever at the head)
+            ttcs_norm[k] = min(FAR_TTC_SEC, (top - bottom) / speed) / FAR_TTC_SEC
+            k += n_lanes
+            if k >= len(ttcs_norm):
+                break
+    return lane_oh + ttcs_norm
+
+class ObservationBuilder:
+    """
+    extract_state_lanes for an EnvConfig, written in one pass over the per-lane queues into a
+    preallocated list:
+      [ lane_one_hot(L), ttc rank 1 (L), ..., ttc rank K (L), length rank 1 (L), ..., length rank K (L) ]
+    The length block (obstacle height / screen height, 0.0 for an empty slot) is only there
+    with config.obs_lengths. build() returns a copy, or fills `out` (e.g. a row of a
+    preallocated batch array) and returns it.
+    """
+    def __init__(self, config: EnvConfig):
+        lanes, k = config.lanes, config.lookahead
+        self.lanes, self.lookahead, self.lengths = lanes, k, config.obs_lengths
+        self.ttc_end = lanes + lanes * k
+        self.length_offset = lanes * k
+        self.height = float(config.height)
+        self.template = [0] * lanes + [1.0] * (lanes * k) + ([0.0] * (lanes * k) if config.obs_lengths else [])
+        self.buf = list(self.template)
+        self.dim = len(self.template)
+
+    def build(self, player_top, cur_lane, lane_obstacles, obstacle_speed, out=None):
+        buf = self.buf
+        buf[:] = self.template
+        buf[cur_lane] = 1
+        speed = max(obstacle_speed, 1e-6)
+        step, end, lengths, offset = self.lanes, self.ttc_end, self.lengths, self.length_offset
+        for lane_id, lane in enumerate(lane_obstacles):
+            k = step + lane_id
+            for obs in lane:
+                bottom = obs.bottom
+                if bottom >= player_top:
+                    continue  # already passed or overlapping (only ever at the head)
+                buf[k] = min(FAR_TTC_SEC, (player_top - bottom) / speed) / FAR_TTC_SEC
+                if lengths:
+                    buf[k + offset] = obs.h / self.height
+                k += step
+                if k >= end:
+                    break
+        if out is None:
+            return buf[:]
+        out[:] = buf
+        return out
 
 class SurferEnv:
-    """Actions: 0=stay, 1=left, 2=right"""
-    def __init__(self, seed: int = 0, render: bool = False, target_fps: int = 60):
+    """
+    Actions: 0=stay, 1=left, 2=right
+    Game settings come from an immutable EnvConfig (module defaults if None); the
+    obstacle_length and lookahead arguments override the config's.
+    """
+    def __init__(self, seed: int = 0, render: bool = False, target_fps: int = 60, obstacle_length: int = None,
+                 lookahead: int = None, recorder=None, config: EnvConfig = None):
+        config = config or EnvConfig(lookahead=OBS_LOOKAHEAD)
+        if lookahead is not None and lookahead != config.lookahead:
+            config = replace(config, lookahead=lookahead)
+        self.config = config
         self.rand = random.Random(seed)
+        # defaults to the per-process length; pass it explicitly to match envs across processes
+        if obstacle_length is None:
+            obstacle_length = OBSTACLE_LENGTH if config.obstacle_length is None else config.obstacle_length
+        self.obstacle_length = obstacle_length
         self.render_enabled = render
         self.target_fps = target_fps
+        self.lookahead = config.lookahead
+        self.n_lanes = config.lanes
+        self.observer = ObservationBuilder(config)
+        self.sched = StepSchedule.for_fps(target_fps, config)
+        # per-frame constants, unpacked in one go by _step_frame
+        self._frame_consts = (config.difficulty_scaling, config.max_obstacle_speed, config.base_obstacle_speed,
+                              config.min_spawn_interval, config.max_spawn_interval, config.height)
+        # optional surfer.trajectory.TrajectoryWriter: every step/advance_until_event call
+        # records (obs it acted on, action, reward, done, episode id); VecSurferEnv records with less overhead
+        self.recorder = recorder
 
-        pygame.init()
-        self.screen = pygame.display.set_mode((WIDTH, HEIGHT)) if render else pygame.Surface((WIDTH, HEIGHT))
-        self.clock = pygame.time.Clock()
-        self.lane_centers = compute_lane_centers(WIDTH, LANES, LANE_WIDTH)
-        self.player = pygame.Rect(0, 0, PLAYER_WIDTH, PLAYER_HEIGHT)
+        # headless envs never touch pygame; it is only imported and initialized to render
+        self.screen = self.clock = None
+        if render:
+            import pygame
+            pygame.init()
+            self.screen = pygame.display.set_mode((config.width, config.height))
+            self.clock = pygame.time.Clock()
+        self.lane_centers = compute_lane_centers(config.width, config.lanes, config.lane_width)
+        self.player = Box(0, 0, config.player_width, config.player_height)
         self.reset()
 
     def reset(self):
-        self.obstacle_speed = BASE_OBSTACLE_SPEED
-        self.obstacles = []
+        cfg = self.config
+        self.obstacle_speed = cfg.base_obstacle_speed
+        # per-lane FIFOs, oldest first: obstacles share one speed so each lane stays ordered
+        self.lane_obstacles = [deque() for _ in range(cfg.lanes)]
         self.obstacle_spawn_timer = 0.0
-        self.next_spawn_time = self.rand.uniform(MIN_SPAWN_INTERVAL, MAX_SPAWN_INTERVAL)
-        self.cur_lane = 1
+        self.next_spawn_time = self.rand.uniform(cfg.min_spawn_interval, cfg.max_spawn_interval)
+        self.cur_lane = cfg.lanes // 2
         self.player.centerx = self.lane_centers[self.cur_lane]
-        self.player.centery = GROUND_Y
+        self.player.centery = cfg.ground_y
         self.time_survived = 0.0
         self.score = 0
+        self.steps = 0          # frames played this episode
+        self.spawn_frames = 0   # frames since the last spawn; obstacle_spawn_timer == sched.time[spawn_frames]
         self.done = False
-        return self._obs()
+        obs = self._obs()
+        if self.recorder is not None:
+            self.episode_id, self._last_obs = self.recorder.new_episode(), obs
+        return obs
+
+    def step(self, action: int, repeat: int = 1):
+        """
+        Plays `action` for one frame, then stays in lane for repeat-1 more frames (stopping
+        early if the episode ends). Event-free stretches are jumped over analytically with
+        the same end state, score and time as frame-by-frame stepping.
+        Returns the summed reward; info["frames"] is the number of frames played.
+        """
+        obs, reward, done, info = self._step_frame(action)
+        if repeat > 1 and not done:
+            more_reward, frames = self._fast_forward(repeat - 1)
+            obs, reward, done = self._obs(), reward + more_reward, self.done
+            info = {"score": self.score, "time": self.time_survived, "frames": frames + 1}
+        elif info:
+            info["frames"] = 1
+        if self.recorder is not None and info:  # info is empty when stepping a finished episode
+            self.recorder.record(self._last_obs, action, reward, done, self.episode_id)
+            self._last_obs = obs
+        return obs, reward, done, info
+
+    def advance_until_event(self, max_frames: int = None, min_ttc: float = None):
+        """
+        Stays in lane and fast-forwards to the next decision point: the end of the first frame
+        in which an obstacle spawns or the player collides, the first frame after which the
+        player's lane TTC (normalized, as in the observation) is below min_ttc, or max_frames.
+        At least one frame is played per call, even when the TTC is already below min_ttc.
+        Returns (obs, reward, done, info) like step, with info["frames"].
+        """
+        if self.done:
+            return self._obs(), 0.0, True, {}
+        reward, frames = self._fast_forward(max_frames or float("inf"), min_ttc, stop_at_event=True)
+        obs = self._obs()
+        if self.recorder is not None:
+            self.recorder.record(self._last_obs, 0, reward, self.done, self.episode_id)
+            self._last_obs = obs
+        return obs, reward, self.done, {"score": self.score, "time": self.time_survived, "frames": frames}
 
-    def step(self, action: int):
+    def get_state(self):
+        """
+        Flat, immutable snapshot of the episode, including the spawn RNG:
+          (steps, spawn_frames, next_spawn_time, cur_lane, done, rng_state, lane0, y0, lane1, y1, ...)
+        Time, score, speed and the spawn timer are looked up from the schedule on restore.
+        """
+        state = [self.steps, self.spawn_frames, self.next_spawn_time, self.cur_lane, self.done, self.rand.getstate()]
+        for lane_id, lane in enumerate(self.lane_obstacles):
+            for obs in lane:
+                state += (lane_id, obs.y)
+        return tuple(state)
+
+    def set_state(self, state):
+        """Restores a get_state() snapshot (from this env or one with the same settings)"""
+        steps, spawn_frames, self.next_spawn_time, self.cur_lane, self.done, rng_state = state[:6]
+        s = self.sched
+        s.ensure(steps)
+        self.steps, self.spawn_frames = steps, spawn_frames
+        self.time_survived, self.score, self.obstacle_speed = s.time[steps], s.score[steps], s.speed[steps]
+        self.obstacle_spawn_timer = s.time[spawn_frames]
+        self.rand.setstate(rng_state)
+        self.player.centerx = self.lane_centers[self.cur_lane]
+        self.lane_obstacles = [deque() for _ in range(self.n_lanes)]
+        for i in range(6, len(state), 2):
+            lane_id = state[i]
+            self.lane_obstacles[lane_id].append(
+                make_obstacle(self.lane_centers, self.config.lane_width, lane_id, state[i + 1], self.obstacle_length))
+        if self.recorder is not None:
+            self._last_obs = self._obs()
+
+    def _fast_forward(self, max_frames, min_ttc=None, stop_at_event=False):
+        """Plays up to max_frames 'stay' frames; returns (summed reward, frames played)"""
+        reward, frames = 0.0, 0
+        while frames < max_frames and not self.done:
+            if self.render_enabled:
+                # every frame has to be drawn
+                reward += self._step_frame(0)[1]
+                frames += 1
+                if min_ttc is not None and self.lane_ttc() < min_ttc:
+                    break
+                continue
+
+            to_event, is_spawn_or_hit = self._frames_to_event()
+            n = min(to_event - 1, max_frames - frames)
+            if min_ttc is not None:
+                n = self._frames_to_ttc(min_ttc, n)
+            self._jump(n)
+            reward += n
+            frames += n
+            # n is 0 when the next frame is an event: play it before checking the TTC, so every
+            # call advances at least one frame
+            if frames >= max_frames or (frames and min_ttc is not None and self.lane_ttc() < min_ttc):
+                break
+            if n == to_event - 1:
+                reward += self._step_frame(0)[1]
+                frames += 1
+                if stop_at_event and is_spawn_or_hit:
+                    break
+                if min_ttc is not None and self.lane_ttc() < min_ttc:
+                    break
+        return reward, frames
+
+    def _front_obstacle(self):
+        """First obstacle in the player's lane that has not fully passed it, or None"""
+        player_bottom = self.player.bottom
+        for obs in self.lane_obstacles[self.cur_lane]:
+            if obs.top < player_bottom:
+                return obs
+        return None
+
+    def lane_ttc(self):
+        """Normalized TTC of the player's lane, as in the observation"""
+        top = self.player.top
+        for obs in self.lane_obstacles[self.cur_lane]:
+            if obs.bottom < top:
+                return min(FAR_TTC_SEC, (top - obs.bottom) / max(self.obstacle_speed, 1e-6)) / FAR_TTC_SEC
+        return 1.0
+
+    def _frames_to_event(self):
+        """
+        Frames until (and including) the next frame that must be simulated for real:
+        a spawn, a collision, or a frame whose shift depends on the obstacle's position.
+        Returns (frames, whether that frame is a spawn or collision).
+        """
+        s, k = self.sched, self.steps
+        s.ensure(max(k, self.spawn_frames) + int(self.config.max_spawn_interval + 2) * self.target_fps)
+        to_spawn = bisect_left(s.time, self.next_spawn_time, self.spawn_frames + 1) - self.spawn_frames
+        to_event = to_spawn
+        front = self._front_obstacle()
+        if front is not None:
+            gap = self.player.top - front.bottom  # collides once it has moved more than this
+            to_hit = bisect_right(s.cum_shift, s.cum_shift[k] + gap, k + 1) - k
+            to_event = min(to_event, to_hit)
+        i = bisect_right(s.nonuniform, k)
+        if i < len(s.nonuniform) and s.nonuniform[i] - k < to_event:
+            return s.nonuniform[i] - k, False
+        return to_event, True
+
+    def _frames_to_ttc(self, min_ttc, n_max):
+        """Smallest m <= n_max after which the player's lane TTC is below min_ttc (else n_max)"""
+        s, k, top = self.sched, self.steps, self.player.top
+        front = self._front_obstacle()
+        if front is None or front.bottom >= top:
+            return n_max
+        bottom0, cum0 = front.bottom, s.cum_shift[k]
+
+        def below(m):
+            bottom = bottom0 + s.cum_shift[k + m] - cum0
+            if bottom >= top:
+                return True
+            return min(FAR_TTC_SEC, (top - bottom) / max(s.speed[k + m], 1e-6)) / FAR_TTC_SEC < min_ttc
+
+        if n_max <= 0 or not below(n_max):
+            return n_max
+        lo, hi = 1, n_max
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if below(mid):
+                hi = mid
+            else:
+                lo = mid + 1
+        return lo
+
+    def _jump(self, n):
+        """Advances n event-free 'stay' frames at once"""
+        if n <= 0:
+            return
+        s, k = self.sched, self.steps
+        shift = s.cum_shift[k + n] - s.cum_shift[k]
+        height = self.config.height
+        for lane in self.lane_obstacles:
+            for obs in lane:
+                obs.y += shift
+            while lane and lane[0].top > height:
+                lane.popleft()
+        self.steps = k + n
+        self.spawn_frames += n
+        self.time_survived = s.time[k + n]
+        self.score = s.score[k + n]
+        self.obstacle_speed = s.speed[k + n]
+        self.obstacle_spawn_timer = s.time[self.spawn_frames]
+
+    def _step_frame(self, action: int):
         if self.done:
             return self._obs(), 0.0, True, {}
 
         dt = 1.0 / self.target_fps
+        scaling, max_speed, base_speed, min_interval, max_interval, height = self._frame_consts
 
         prev_lane = self.cur_lane
         if action == 1 and self.cur_lane > 0:
             self.cur_lane -= 1
-        elif action == 2 and self.cur_lane < LANES - 1:
+        elif action == 2 and self.cur_lane < self.n_lanes - 1:
             self.cur_lane += 1
         self.player.centerx = self.lane_centers[self.cur_lane]
 
         # difficulty & spawns
+        self.steps += 1
+        self.spawn_frames += 1
         self.time_survived += dt
         self.score += int(self.time_survived * 2)
-        self.obstacle_speed = min(self.obstacle_speed + ((self.time_survived ** 0.5) * DIFFICULTY_SCALING), MAX_OBSTACLE_SPEED)
+        self.obstacle_speed = min(self.obstacle_speed + ((self.time_survived ** 0.5) * scaling), max_speed)
 
-        diff_mult = self.obstacle_speed / BASE_OBSTACLE_SPEED
-        cur_min_spawn = min(MIN_SPAWN_INTERVAL, MIN_SPAWN_INTERVAL / diff_mult)
-        cur_max_spawn = min(MAX_SPAWN_INTERVAL, MAX_SPAWN_INTERVAL / diff_mult)
+        diff_mult = self.obstacle_speed / base_speed
+        cur_min_spawn = min(min_interval, min_interval / diff_mult)
+        cur_max_spawn = min(max_interval, max_interval / diff_mult)
 
         self.obstacle_spawn_timer += dt
         if self.obstacle_spawn_timer >= self.next_spawn_time:
-            new_obstacle, lane_id = spawn_obstacle(self.lane_centers, LANE_WIDTH, OBSTACLE_Y)
-            self.obstacles.append((new_obstacle, lane_id))
+            new_obstacle, lane_id = spawn_obstacle(self.lane_centers, self.config.lane_width, self.config.obstacle_y,
+                                                   self.obstacle_length, rng=self.rand)
+            self.lane_obstacles[lane_id].append(new_obstacle)
             self.obstacle_spawn_timer = 0.0
+            self.spawn_frames = 0
             self.next_spawn_time = self.rand.uniform(cur_min_spawn, cur_max_spawn)
 
-        # move obstacles & prune
-        rm = []
-        for i, (obs, _) in enumerate(self.obstacles):
-            obs.y += self.obstacle_speed * dt
-            if obs.top > HEIGHT:
-                rm.append(i)
-        for i in reversed(rm):
-            self.obstacles.pop(i)
+        # move obstacles & prune from the front of each lane
+        dy = self.obstacle_speed * dt
+        for lane in self.lane_obstacles:
+            for obs in lane:
+                obs.y += dy
+            while lane and lane[0].top > height:
+                lane.popleft()
 
-        # collision
-        collided = any(self.player.colliderect(obs) for obs, _ in self.obstacles)
+        # collision: only the first obstacle in the player's lane that hasn't passed can overlap
+        collided = False
+        player_bottom = self.player.bottom
+        for obs in self.lane_obstacles[self.cur_lane]:
+            if obs.top < player_bottom:
+                collided = self.player.colliderect(obs)
+                break
 
         # reward shaping (simple)
         reward = 1.0
@@ -112,27 +401,40 @@ class SurferEnv:
             reward -= 100.0
             self.done = True
 
-        if self.render_enabled:
-            for e in pygame.event.get():
-                if e.type == pygame.QUIT:
-                    # End the episode cleanly
-                    try:
-                        if pygame.display.get_surface() is not None:
-                            pygame.display.quit()
-                    finally:
-                        self.done = True
-                    return self._obs(), 0.0, True, {"score": self.score, "time": self.time_survived}
-            self.screen.fill((20,20,20))
-            for obs, _ in self.obstacles:
-                pygame.draw.rect(self.screen, "WHITE", obs)
-            pygame.draw.rect(self.screen, "RED", self.player)
-            pygame.display.flip()
-            self.clock.tick(self.target_fps)
+        if self.render_enabled and not self._render():
+            return self._obs(), 0.0, True, {"score": self.score, "time": self.time_survived}
 
         return self._obs(), reward, self.done, {"score": self.score, "time": self.time_survived}
 
+    def _render(self):
+        """Draws the frame; returns False if the window was closed"""
+        import pygame
+        for e in pygame.event.get():
+            if e.type == pygame.QUIT:
+                # End the episode cleanly
+                try:
+                    if pygame.display.get_surface() is not None:
+                        pygame.display.quit()
+                finally:
+                    self.done = True
+                return False
+        self.screen.fill((20,20,20))
+        for obs, _ in self.obstacles:
+            pygame.draw.rect(self.screen, "WHITE", obs)
+        pygame.draw.rect(self.screen, "RED", self.player)
+        pygame.display.flip()
+        self.clock.tick(self.target_fps)
+        return True
+
+    @property
+    def obstacles(self):
+        """(obstacle, lane_id) pairs, grouped by lane, oldest first"""
+        return [(obs, lane_id) for lane_id, lane in enumerate(self.lane_obstacles) for obs in lane]
+
     def _obs(self):
-        return extract_state(self.player, self.cur_lane, self.obstacles, self.obstacle_speed)
+        return self.observer.build(self.player.top, self.cur_lane, self.lane_obstacles, self.obstacle_speed)
 
     def close(self):
-        pygame.quit()
+        if self.render_enabled:
+            import pygame
+            pygame.quit()
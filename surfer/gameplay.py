@@ -1,4 +1,4 @@
-import sys, random
+import sys, time, random
 import pygame
 from .config import (
     WIDTH, HEIGHT, PLAYER_WIDTH, PLAYER_HEIGHT, LANES, LANE_WIDTH,
@@ -6,9 +6,17 @@ from .config import (
     DIFFICULTY_SCALING, MAX_OBSTACLE_SPEED, BASE_OBSTACLE_SPEED,
     NO_CLIP, make_fonts
 )
-from .core import compute_lane_centers, draw_lanes, spawn_obstacle
+from .core import compute_lane_centers, spawn_obstacle
+from .render import GlyphCache, Label, FrameStats, Renderer
 
-def game_loop(screen: pygame.Surface, clock: pygame.time.Clock):
+TEXT_COLOR = (220, 220, 220)
+PLAYER_COLOR, OBSTACLE_COLOR = pygame.Color("RED"), pygame.Color("WHITE")
+
+def game_loop(screen: pygame.Surface, clock: pygame.time.Clock, show_fps: bool = False, frame_log: str = None):
+    """
+    One session. show_fps starts with the frame-time overlay on (F3 toggles it); frame_log
+    writes per-frame times as CSV.
+    """
     FONT, SMALL_FONT = make_fonts()
 
     player = pygame.Rect(0, 0, PLAYER_WIDTH, PLAYER_HEIGHT)
@@ -30,15 +38,29 @@ def game_loop(screen: pygame.Surface, clock: pygame.time.Clock):
     score = 0
     time_survived = 0.0
 
+    # static lanes are pre-rendered once; text surfaces are rebuilt only when their value changes
+    renderer = Renderer(screen, lane_centers, LANE_WIDTH)
+    glyphs = GlyphCache(SMALL_FONT, TEXT_COLOR)
+    score_label = Label(glyphs, "Score: {}", int(WIDTH * 0.8), int(HEIGHT * 0.1))
+    diff_label = Label(glyphs, "diff: {}", int(WIDTH * 0.8), int(HEIGHT * 0.1 + 20))
+    fps_label = Label(GlyphCache(SMALL_FONT, (120, 255, 120)), "{}", WIDTH // 2, HEIGHT - 30)
+    stats = FrameStats(60, frame_log)
+    work_ms = 0.0
+
     while True:
         dt = clock.tick(60) / 1000.0
+        stats.record(dt * 1000.0, work_ms)
+        work_start = time.perf_counter()
         time_survived += dt
         score += int(time_survived * 2)
 
         for e in pygame.event.get():
             if e.type == pygame.QUIT:
+                stats.close()
                 return False, score
             elif e.type == pygame.KEYDOWN:
+                if e.key == pygame.K_F3:
+                    show_fps = not show_fps
                 if e.key == pygame.K_LEFT and cur_lane > 0:
                     cur_lane -= 1
                 if e.key == pygame.K_RIGHT and cur_lane < LANES - 1:
@@ -84,23 +106,30 @@ def game_loop(screen: pygame.Surface, clock: pygame.time.Clock):
         if not NO_CLIP:
             for obstacle, _ in obstacles:
                 if player.colliderect(obstacle):
+                    stats.close()
                     return True, score
 
-        # render
-        screen.fill((20, 20, 20))
-        draw_lanes(screen, lane_centers, LANE_WIDTH, HEIGHT)
-        pygame.draw.rect(screen, "RED", player)
-        for obstacle, _ in obstacles:
-            pygame.draw.rect(screen, "WHITE", obstacle)
-
-        score_text = SMALL_FONT.render(f"Score: {score}", True, (220, 220, 220))
-        diff_text  = SMALL_FONT.render(f"diff: {round(diff_multiplier, 2)}", True, (220, 220, 220))
-        screen.blit(score_text, (WIDTH * 0.8 - score_text.get_width() // 2, HEIGHT * 0.1))
-        screen.blit(diff_text,  (WIDTH * 0.8 - diff_text.get_width()  // 2, HEIGHT * 0.1 + 20))
-        pygame.display.flip()
+        # render: only the areas that changed since the last frame reach the display
+        rects = [(player, PLAYER_COLOR)] + [(obstacle, OBSTACLE_COLOR) for obstacle, _ in obstacles]
+        labels = [score_label.set(score), diff_label.set(round(diff_multiplier, 2))]
+        if show_fps:
+            labels.append(fps_label.set(stats.summary))
+        renderer.draw(rects, labels)
+        work_ms = (time.perf_counter() - work_start) * 1000.0
 
 def game_over_screen(screen: pygame.Surface, clock: pygame.time.Clock, score: int):
     FONT, SMALL_FONT = make_fonts()
+    # the screen is static: draw it once, then only redraw when the window asks for it
+    screen.fill((40, 40, 40))
+    game_over_text = FONT.render("GAME OVER", True, (255, 255, 255))
+    restart_text   = SMALL_FONT.render("Press SPACE to restart", True, (200, 200, 200))
+    quit_text      = SMALL_FONT.render("Press ESC to quit", True, (200, 200, 200))
+    score_text     = SMALL_FONT.render(f"Score: {score}", True, (220, 220, 220))
+    screen.blit(game_over_text, (screen.get_width()//2 - game_over_text.get_width()//2, screen.get_height()//2 - 100))
+    screen.blit(restart_text,   (screen.get_width()//2 - restart_text.get_width()//2,   screen.get_height()//2 + 40))
+    screen.blit(quit_text,      (screen.get_width()//2 - quit_text.get_width()//2,      screen.get_height()//2 + 10))
+    screen.blit(score_text,     (screen.get_width()//2 - score_text.get_width()//2,     screen.get_height()//2 - 30))
+    pygame.display.flip()
     while True:
         for e in pygame.event.get():
             if e.type == pygame.QUIT:
@@ -110,24 +139,16 @@ def game_over_screen(screen: pygame.Surface, clock: pygame.time.Clock, score: in
                     return True
                 elif e.key == pygame.K_ESCAPE:
                     return False
-        screen.fill((40, 40, 40))
-        game_over_text = FONT.render("GAME OVER", True, (255, 255, 255))
-        restart_text   = SMALL_FONT.render("Press SPACE to restart", True, (200, 200, 200))
-        quit_text      = SMALL_FONT.render("Press ESC to quit", True, (200, 200, 200))
-        score_text     = SMALL_FONT.render(f"Score: {score}", True, (220, 220, 220))
-        screen.blit(game_over_text, (screen.get_width()//2 - game_over_text.get_width()//2, screen.get_height()//2 - 100))
-        screen.blit(restart_text,   (screen.get_width()//2 - restart_text.get_width()//2,   screen.get_height()//2 + 40))
-        screen.blit(quit_text,      (screen.get_width()//2 - quit_text.get_width()//2,      screen.get_height()//2 + 10))
-        screen.blit(score_text,     (screen.get_width()//2 - score_text.get_width()//2,     screen.get_height()//2 - 30))
-        pygame.display.flip()
+            elif e.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+                pygame.display.flip()
         clock.tick(60)
 
-def run_game():
+def run_game(show_fps: bool = False, frame_log: str = None):
     pygame.init()
     screen = pygame.display.set_mode((WIDTH, HEIGHT))
     clock = pygame.time.Clock()
     while True:
-        continue_game, score = game_loop(screen, clock)
+        continue_game, score = game_loop(screen, clock, show_fps, frame_log)
         if not continue_game:
             break
         restart = game_over_screen(screen, clock, score)
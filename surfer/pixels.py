@@ -0,0 +1,124 @@
+# surfer/pixels.py
+import numpy as np
+from .config import WIDTH, HEIGHT, LANES, LANE_WIDTH, PLAYER_WIDTH
+from .core import compute_lane_centers
+from .vec_env import VecSurferEnv, PLAYER_TOP, PLAYER_BOTTOM
+
+# grayscale (ITU-R 601 luma) of the colors the pygame renderer uses
+BG_GRAY, LANE_GRAY, SEPARATOR_GRAY, OBSTACLE_GRAY, PLAYER_GRAY = 20, 173, 150, 255, 76
+
+def _luma_background():
+    """Full-resolution grayscale lanes: the static part of every frame"""
+    bg = np.full((HEIGHT, WIDTH), BG_GRAY, dtype=np.float32)
+    for idx, center in enumerate(compute_lane_centers(WIDTH, LANES, LANE_WIDTH)):
+        left = center - LANE_WIDTH // 2
+        bg[:, left:left + LANE_WIDTH] = LANE_GRAY
+        if idx != 0:
+            bg[:, left - 1:left + 1] = SEPARATOR_GRAY
+    return bg
+
+def _column_masks(height, width, obstacle_width):
+    """Per-lane (W',) masks of downscaled columns at least half covered by a centered object"""
+    edges = np.arange(width + 1) * (WIDTH / width)
+    masks = []
+    for center in compute_lane_centers(WIDTH, LANES, LANE_WIDTH):
+        left, right = center - obstacle_width // 2, center - obstacle_width // 2 + obstacle_width
+        cover = np.clip(np.minimum(edges[1:], right) - np.maximum(edges[:-1], left), 0, None)
+        masks.append(cover >= 0.5 * (WIDTH / width))
+    return masks
+
+class PixelRenderer:
+    """
+    Offscreen grayscale rasterizer for batches of episodes, no pygame involved. Frames are
+    (height, width) uint8 downscaled from the 480x720 playfield: the static lanes are box-
+    filtered once, and obstacles/player are painted on rows whose centers they cover and
+    columns they cover at least half. Renders into one preallocated (N, H', W') array
+    (or (N, frame_stack, H', W') with stacking, oldest frame first); it is reused on every
+    call, so copy it to keep a frame.
+    """
+    def __init__(self, n_envs, height=84, width=56, frame_stack=1):
+        self.n_envs, self.height, self.width, self.frame_stack = n_envs, height, width, frame_stack
+        bg = _luma_background()
+        ys = np.arange(height + 1) * HEIGHT // height
+        xs = np.arange(width + 1) * WIDTH // width
+        rows = np.add.reduceat(bg, ys[:-1], axis=0) / np.diff(ys)[:, None]
+        self.background = np.rint(np.add.reduceat(rows, xs[:-1], axis=1) / np.diff(xs)).astype(np.uint8)
+
+        self.row_centers = (np.arange(height) + 0.5) * (HEIGHT / height)
+        self.obstacle_cols = [np.flatnonzero(m) for m in _column_masks(height, width, int(LANE_WIDTH * 0.7))]
+        self.player_cols = [np.flatnonzero(m) for m in _column_masks(height, width, PLAYER_WIDTH)]
+        covered = (self.row_centers >= PLAYER_TOP) & (self.row_centers < PLAYER_BOTTOM)
+        self.player_rows = slice(int(np.argmax(covered)), int(np.argmax(covered)) + int(covered.sum()))
+
+        self.frames = np.empty((n_envs, height, width), dtype=np.uint8)
+        self.stack = np.empty((n_envs, frame_stack, height, width), dtype=np.uint8) if frame_stack > 1 else None
+
+    def rasterize(self, lane, tops, bottoms, obs_lane, active):
+        """
+        lane (N,) player lanes; tops/bottoms/obs_lane/active (N, M) obstacle slots.
+        Returns the (N, H', W') frame buffer.
+        """
+        out = self.frames
+        out[...] = self.background
+        centers = self.row_centers
+        # (N, M, H') row coverage, reduced to one row mask per lane
+        covered = (active[:, :, None] & (tops[:, :, None] <= centers) & (bottoms[:, :, None] > centers))
+        for lane_id, cols in enumerate(self.obstacle_cols):
+            rows = (covered & (obs_lane == lane_id)[:, :, None]).any(axis=1)
+            if rows.any():
+                block = out[:, :, cols[0]:cols[-1] + 1]
+                np.copyto(block, OBSTACLE_GRAY, where=rows[:, :, None])
+        for lane_id, cols in enumerate(self.player_cols):
+            envs = np.flatnonzero(lane == lane_id)
+            if len(envs):
+                out[envs, self.player_rows, cols[0]:cols[-1] + 1] = PLAYER_GRAY
+        return out
+
+    def render_vec(self, env: VecSurferEnv):
+        return self.rasterize(env.lane, env.obs_y, env.obs_y + env.obs_len, env.obs_lane, env.active)
+
+    def render_envs(self, envs):
+        """Frames for a list of SurferEnv (one per row)"""
+        m = max(1, max(len(e.obstacles) for e in envs))
+        tops = np.zeros((len(envs), m), dtype=np.int64)
+        bottoms = np.zeros_like(tops)
+        obs_lane = np.zeros_like(tops)
+        active = np.zeros((len(envs), m), dtype=bool)
+        for i, env in enumerate(envs):
+            for j, (box, lane_id) in enumerate(env.obstacles):
+                tops[i, j], bottoms[i, j], obs_lane[i, j], active[i, j] = box.top, box.bottom, lane_id, True
+        return self.rasterize(np.array([e.cur_lane for e in envs]), tops, bottoms, obs_lane, active)
+
+    def push(self, frames, reset=None):
+        """Appends frames to the stack; rows in `reset` (indices) are refilled with their new frame"""
+        if self.stack is None:
+            return frames
+        self.stack[:, :-1] = self.stack[:, 1:]
+        self.stack[:, -1] = frames
+        if reset is not None and len(reset):
+            self.stack[reset] = frames[reset, None]
+        return self.stack
+
+class PixelVecEnv:
+    """
+    VecSurferEnv with pixel observations: reset/step return (N, H', W') uint8 frames, or
+    (N, frame_stack, H', W') when stacking, in a reused buffer. The vector observation is
+    kept in info["vector_obs"]; finished episodes auto-reset as in VecSurferEnv.
+    """
+    def __init__(self, n_envs, seed=0, height=84, width=56, frame_stack=1, **env_kwargs):
+        self.env = VecSurferEnv(n_envs, seed=seed, **env_kwargs)
+        self.renderer = PixelRenderer(n_envs, height, width, frame_stack)
+        self.n_envs = n_envs
+
+    def reset(self):
+        self.vector_obs = self.env.reset()
+        return self.renderer.push(self.renderer.render_vec(self.env), np.arange(self.n_envs))
+
+    def step(self, actions):
+        self.vector_obs, reward, done, info = self.env.step(actions)
+        info["vector_obs"] = self.vector_obs
+        frames = self.renderer.render_vec(self.env)
+        return self.renderer.push(frames, np.flatnonzero(done)), reward, done, info
+
+    def close(self):
+        self.env.close()
@@ -0,0 +1,114 @@
+# surfer/render.py
+import time
+import pygame
+from .core import draw_lanes
+
+class GlyphCache:
+    """Per-character surfaces of one font/color; text is composed from them instead of font.render"""
+    def __init__(self, font, color):
+        self.font, self.color = font, color
+        self.glyphs = {}
+
+    def glyph(self, ch):
+        g = self.glyphs.get(ch)
+        if g is None:
+            g = self.glyphs[ch] = self.font.render(ch, True, self.color).convert_alpha()
+        return g
+
+    def render(self, text):
+        glyphs = [self.glyph(ch) for ch in text]
+        surface = pygame.Surface((sum(g.get_width() for g in glyphs), self.font.get_height()), pygame.SRCALPHA)
+        x = 0
+        for g in glyphs:
+            surface.blit(g, (x, 0))
+            x += g.get_width()
+        return surface
+
+class Label:
+    """Text at a fixed anchor (center x, top y); the surface is rebuilt only when the value changes"""
+    def __init__(self, glyphs, fmt, center_x, top):
+        self.glyphs, self.fmt, self.center_x, self.top = glyphs, fmt, center_x, top
+        self.value = self.surface = None
+
+    def set(self, value):
+        if value != self.value or self.surface is None:
+            self.value = value
+            self.surface = self.glyphs.render(self.fmt.format(value))
+        return self
+
+    def draw(self, screen):
+        return screen.blit(self.surface, (self.center_x - self.surface.get_width() // 2, self.top))
+
+class FrameStats:
+    """
+    Frame-time bookkeeping against a budget (1000/fps ms): per-frame total and work (update +
+    render) time, a rolling summary for the overlay, and an optional CSV log
+    (frame, frame_ms, work_ms) for offline checks.
+    """
+    def __init__(self, fps=60, log_path=None, window=0.5):
+        self.budget_ms, self.window = 1000.0 / fps, window
+        self.frames = self.misses = 0
+        self._win_frames, self._win_frame_ms, self._win_work_ms, self._win_worst = 0, 0.0, 0.0, 0.0
+        self._win_start = time.perf_counter()
+        self.summary = "frame -- ms"
+        self.log = open(log_path, "w") if log_path else None
+        if self.log:
+            self.log.write("frame,frame_ms,work_ms\n")
+
+    def record(self, frame_ms, work_ms):
+        self.frames += 1
+        self.misses += frame_ms > self.budget_ms * 1.5  # a dropped frame, not clock jitter
+        self._win_frames += 1
+        self._win_frame_ms += frame_ms
+        self._win_work_ms += work_ms
+        self._win_worst = max(self._win_worst, frame_ms)
+        if self.log:
+            self.log.write(f"{self.frames},{frame_ms:.3f},{work_ms:.3f}\n")
+        now = time.perf_counter()
+        if now - self._win_start >= self.window:
+            n = self._win_frames
+            self.summary = (f"{1000.0 * n / max(self._win_frame_ms, 1e-9):4.0f} fps  frame {self._win_frame_ms / n:4.1f} "
+                            f"max {self._win_worst:4.1f}  work {self._win_work_ms / n:4.2f} ms  drops {self.misses}")
+            self._win_frames, self._win_frame_ms, self._win_work_ms, self._win_worst = 0, 0.0, 0.0, 0.0
+            self._win_start = now
+
+    def close(self):
+        if self.log:
+            self.log.close()
+            self.log = None
+
+class Renderer:
+    """
+    Dirty-rect renderer over a pre-rendered static background (fill + lanes). Each frame
+    erases last frame's rects from the background, draws rects and labels, and pushes only
+    the old and new areas with display.update. The first frame, and any frame after
+    invalidate(), redraws and flips the whole screen.
+    """
+    def __init__(self, screen, lane_centers, lane_width, bg_color=(20, 20, 20)):
+        self.screen = screen
+        self.background = pygame.Surface(screen.get_size()).convert()
+        self.background.fill(bg_color)
+        draw_lanes(self.background, lane_centers, lane_width, screen.get_height())
+        self._prev = []
+        self._full = True
+
+    def invalidate(self):
+        self._full = True
+
+    def draw(self, rects, labels=()):
+        """rects: (rect-like, pygame.Color) pairs, drawn in order, then labels on top"""
+        screen, background = self.screen, self.background
+        if self._full:
+            screen.blit(background, (0, 0))
+        else:
+            for r in self._prev:
+                screen.blit(background, r, r)
+        # draw.rect rather than fill: fill() shifts rects with a negative top down to y=0
+        drawn = [pygame.draw.rect(screen, color, rect) for rect, color in rects]
+        drawn += [label.draw(screen) for label in labels]
+        if self._full:
+            pygame.display.flip()
+            self._full = False
+        else:
+            pygame.display.update(self._prev + drawn)
+        self._prev = drawn
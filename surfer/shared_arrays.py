@@ -0,0 +1,59 @@
+# surfer/shared_arrays.py
+from multiprocessing import shared_memory
+import numpy as np
+
+class SharedArrays:
+    """
+    Named numpy arrays laid out in one shared-memory block. The creating process passes
+    create=True; children attach with the same specs and the block name.
+    """
+    def __init__(self, specs, name=None, create=False):
+        self.specs = specs
+        offsets, size = {}, 0
+        for key, (shape, dtype) in specs.items():
+            offsets[key] = size
+            nbytes = int(np.prod(shape)) * np.dtype(dtype).itemsize
+            size += (nbytes + 63) // 64 * 64
+        self.shm = shared_memory.SharedMemory(name=name, create=create, size=max(size, 1))
+        self.name = self.shm.name
+        for key, (shape, dtype) in specs.items():
+            arr = np.ndarray(shape, dtype=dtype, buffer=self.shm.buf, offset=offsets[key])
+            if create:
+                arr[...] = 0
+            setattr(self, key, arr)
+
+    def close(self, unlink=False):
+        for key in self.specs:
+            setattr(self, key, None)
+        self.shm.close()
+        if unlink:
+            self.shm.unlink()
+
+class SharedWeights(SharedArrays):
+    """
+    Flat QNetwork parameters plus a seqlock version (odd while the learner is writing).
+    torch is only imported by publish/pull, so processes that never touch the weights
+    can share a module with this one without importing it.
+    """
+    def __init__(self, n_params, name=None, create=False):
+        super().__init__({"params": ((n_params,), np.float32), "version": ((1,), np.int64)},
+                         name=name, create=create)
+
+    def publish(self, model):
+        from torch.nn.utils import parameters_to_vector
+        self.version[0] += 1
+        self.params[:] = parameters_to_vector(model.parameters()).detach().cpu().numpy()
+        self.version[0] += 1
+
+    def pull(self, model, seen):
+        """Loads the weights into model if a newer complete version is available"""
+        v = int(self.version[0])
+        if v == seen or v % 2:
+            return seen
+        import torch
+        from torch.nn.utils import vector_to_parameters
+        flat = torch.from_numpy(self.params.copy())
+        if int(self.version[0]) != v:
+            return seen  # torn read, retry on the next poll
+        vector_to_parameters(flat, model.parameters())
+        return v
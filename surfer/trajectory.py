@@ -0,0 +1,224 @@
+# surfer/trajectory.py
+import os, json, struct, itertools
+from array import array
+import numpy as np
+
+MAGIC = b"SURFTRJ1"
+HEADER_SIZE = 64
+_HEADER = struct.Struct("<8s8sq")  # magic, dtype str (e.g. "<f4"), values per row; zero-padded to HEADER_SIZE
+
+# name -> (dtype, matching array typecode); obs has obs_dim values per row, every other column one
+COLUMNS = {
+    "obs": ("<f4", "f"),
+    "action": ("|i1", "b"),
+    "reward": ("<f4", "f"),
+    "done": ("|u1", "B"),
+    "episode": ("<i8", "q"),
+}
+
+def _write_header(f, dtype, width):
+    f.write(_HEADER.pack(MAGIC, dtype.encode(), width).ljust(HEADER_SIZE, b"\0"))
+
+def _read_header(path):
+    with open(path, "rb") as f:
+        magic, dtype, width = _HEADER.unpack(f.read(HEADER_SIZE)[:_HEADER.size])
+    if magic != MAGIC:
+        raise ValueError(f"{path} is not a trajectory column file")
+    return np.dtype(dtype.rstrip(b"\0").decode()), width
+
+def _rows_on_disk(path, dtype, width):
+    return (os.path.getsize(path) - HEADER_SIZE) // (dtype.itemsize * width)
+
+class TrajectoryWriter:
+    """
+    Streams (obs, action, reward, done, episode) rows into append-only column files under
+    `path` (one <column>.bin each, behind a 64-byte header, plus meta.json). Rows collect in
+    memory and go to disk in chunks of `chunk_size` rows. `stride` is the row distance between
+    consecutive steps of one episode: 1 for a SurferEnv, n_envs for a VecSurferEnv recording
+    every sub-env each step. Reopening an existing directory appends to it; episode ids
+    continue from the last one.
+    record_batch (what VecSurferEnv uses) copies rows into preallocated chunk arrays and is the
+    low-overhead way to collect data; record() buffers single rows in lists and costs about
+    0.3 us per SurferEnv step.
+    """
+    def __init__(self, path, obs_dim=6, stride=1, chunk_size=65_536):
+        self.path, self.obs_dim, self.stride, self.chunk_size = path, obs_dim, stride, chunk_size
+        os.makedirs(path, exist_ok=True)
+        meta_path = os.path.join(path, "meta.json")
+        meta = {"obs_dim": obs_dim, "stride": stride, "columns": list(COLUMNS)}
+        if os.path.exists(meta_path):
+            with open(meta_path) as f:
+                old = json.load(f)
+            if (old["obs_dim"], old["stride"]) != (obs_dim, stride):
+                raise ValueError(f"{path} holds obs_dim={old['obs_dim']} stride={old['stride']} trajectories")
+        else:
+            with open(meta_path, "w") as f:
+                json.dump(meta, f)
+
+        # truncate any partially written tail so every column holds the same rows
+        widths = {name: obs_dim if name == "obs" else 1 for name in COLUMNS}
+        files = {name: os.path.join(path, f"{name}.bin") for name in COLUMNS}
+        rows = min((_rows_on_disk(p, np.dtype(COLUMNS[n][0]), widths[n]) if os.path.exists(p) else 0)
+                   for n, p in files.items())
+        self.rows_on_disk = rows
+        self._files = {}
+        for name, file_path in files.items():
+            dtype = np.dtype(COLUMNS[name][0])
+            if os.path.exists(file_path):
+                f = open(file_path, "r+b")
+                f.truncate(HEADER_SIZE + rows * dtype.itemsize * widths[name])
+                f.seek(0, os.SEEK_END)
+            else:
+                f = open(file_path, "wb")
+                _write_header(f, COLUMNS[name][0], widths[name])
+            self._files[name] = f
+
+        self.next_episode = 0
+        if rows:
+            last = np.memmap(files["episode"], dtype="<i8", mode="r", offset=HEADER_SIZE, shape=(rows,))
+            self.next_episode = int(last[-1]) + 1
+            del last
+        # plain lists: appending Python objects is cheaper than typed arrays, which convert per element
+        self._obs, self._action, self._reward, self._done, self._episode = [], [], [], [], []
+        self._chunk, self._batch_rows = None, 0  # record_batch rows, preallocated; written before the lists
+
+    def new_episode(self):
+        episode = self.next_episode
+        self.next_episode += 1
+        return episode
+
+    def record(self, obs, action, reward, done, episode):
+        """One step: the observation the action was taken from, and what it returned"""
+        self._obs.extend(obs)
+        self._action.append(action)
+        self._reward.append(reward)
+        self._done.append(done)
+        self._episode.append(episode)
+        if len(self._action) >= self.chunk_size:
+            self.flush()
+
+    def record_batch(self, obs, actions, rewards, dones, episodes):
+        """N rows at once, e.g. one VecSurferEnv step"""
+        if self._action:
+            self.flush()  # keep row order when single rows were recorded in between
+        if self._chunk is None:
+            self._chunk = [np.empty((self.chunk_size, self.obs_dim) if name == "obs" else self.chunk_size, dtype)
+                           for name, (dtype, _) in COLUMNS.items()]
+        columns = (obs, actions, rewards, dones, episodes)
+        start, n = 0, len(actions)
+        while start < n:
+            m = min(n - start, self.chunk_size - self._batch_rows)
+            for buf, values in zip(self._chunk, columns):
+                buf[self._batch_rows:self._batch_rows + m] = values[start:start + m]
+            self._batch_rows += m
+            start += m
+            if self._batch_rows == self.chunk_size:
+                self.flush()
+
+    def __len__(self):
+        return self.rows_on_disk + self._batch_rows + len(self._action)
+
+    def flush(self):
+        """Writes buffered rows; columns are written in order, so a crash leaves at most a ragged tail"""
+        n = self._batch_rows + len(self._action)
+        if not n:
+            return
+        lists = (self._obs, self._action, self._reward, self._done, self._episode)
+        for i, name in enumerate(COLUMNS):
+            f = self._files[name]
+            if self._batch_rows:
+                self._chunk[i][:self._batch_rows].tofile(f)
+            array(COLUMNS[name][1], lists[i]).tofile(f)
+            del lists[i][:]
+            f.flush()
+        self._batch_rows = 0
+        self.rows_on_disk += n
+
+    def close(self):
+        if self._files:
+            self.flush()
+            for f in self._files.values():
+                f.close()
+            self._files = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class TrajectoryDataset:
+    """
+    Read-only memory-mapped view of a TrajectoryWriter directory. Columns are np.memmap
+    arrays (obs (N, obs_dim), action, reward, done, episode), so opening is O(1) and indexing
+    only pages in the rows it touches. A ragged tail from an interrupted writer is ignored.
+    """
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, "meta.json")) as f:
+            meta = json.load(f)
+        self.obs_dim, self.stride = meta["obs_dim"], meta["stride"]
+        files = {name: os.path.join(path, f"{name}.bin") for name in COLUMNS}
+        headers = {name: _read_header(p) for name, p in files.items()}
+        self.n = min(_rows_on_disk(files[name], dtype, width) for name, (dtype, width) in headers.items())
+        for name, (dtype, width) in headers.items():
+            shape = (self.n, width) if name == "obs" else (self.n,)
+            col = np.memmap(files[name], dtype=dtype, mode="r", offset=HEADER_SIZE, shape=shape) if self.n else \
+                np.empty(shape, dtype=dtype)
+            setattr(self, name, col)
+
+    def __len__(self):
+        return self.n
+
+    def __getitem__(self, idx):
+        return self.obs[idx], self.action[idx], self.reward[idx], self.done[idx], self.episode[idx]
+
+    def has_next(self, idx):
+        """True where row idx is a usable transition: terminal, or followed by its episode's next step"""
+        idx = np.asarray(idx)
+        nxt = np.minimum(idx + self.stride, self.n - 1)
+        return (self.done[idx] != 0) | ((idx + self.stride < self.n) & (self.episode[nxt] == self.episode[idx]))
+
+    def transitions(self, idx):
+        """(obs, action, reward, next_obs, done) arrays for rows idx (see has_next); next_obs of terminal rows is obs"""
+        idx = np.asarray(idx)
+        done = self.done[idx].astype(np.float32)
+        nxt = np.where(done > 0, idx, np.minimum(idx + self.stride, self.n - 1))
+        return (np.asarray(self.obs[idx]), self.action[idx].astype(np.int64), np.asarray(self.reward[idx]),
+                np.asarray(self.obs[nxt]), done)
+
+    def sample(self, batch_size, rng):
+        """Uniform batch of valid transitions; rng is a np.random.Generator"""
+        idx = rng.integers(0, self.n, size=batch_size)
+        bad = ~self.has_next(idx)
+        while bad.any():
+            idx[bad] = rng.integers(0, self.n, size=int(bad.sum()))
+            bad = ~self.has_next(idx)
+        return self.transitions(idx)
+
+    def iter_chunks(self, chunk_size=65_536):
+        """Sequential (start, obs, action, reward, done, episode) slices, for streaming passes"""
+        for start in range(0, self.n, chunk_size):
+            yield (start,) + self[start:start + chunk_size]
+
+def convert_csv(csv_path="data/traj.csv", out_path="data/traj", chunk_rows=65_536):
+    """
+    One-shot conversion of an `f0..f5,action` CSV. The CSV carries no rewards or episode
+    boundaries, so rows get reward 0, done 0 and episode 0 (fine for behaviour cloning).
+    """
+    with open(csv_path) as f:
+        header = f.readline().strip().split(",")
+        obs_dim = len(header) - 1
+        with TrajectoryWriter(out_path, obs_dim=obs_dim, chunk_size=chunk_rows) as writer:
+            while True:
+                lines = list(itertools.islice(f, chunk_rows))
+                if not lines:
+                    break
+                rows = np.loadtxt(lines, delimiter=",", dtype=np.float32, ndmin=2)
+                n = len(rows)
+                writer.record_batch(rows[:, :obs_dim], rows[:, obs_dim].astype(np.int8),
+                                    np.zeros(n, np.float32), np.zeros(n, np.uint8), np.zeros(n, np.int64))
+    return out_path
+
+if __name__ == "__main__":
+    print(convert_csv())
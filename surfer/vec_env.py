@@ -0,0 +1,151 @@
+# surfer/vec_env.py
+import random
+import numpy as np
+from .config import (
+    HEIGHT, PLAYER_HEIGHT, LANES, GROUND_Y, OBSTACLE_Y,
+    MIN_SPAWN_INTERVAL, MAX_SPAWN_INTERVAL
+)
+from .core import OBSTACLE_LENGTH, StepSchedule
+from .env import FAR_TTC_SEC
+
+MAX_OBSTACLES = 16  # initial per-episode slots, doubled if ever full; fewer than ~6 are usually on screen
+PLAYER_TOP = GROUND_Y - PLAYER_HEIGHT // 2
+PLAYER_BOTTOM = PLAYER_TOP + PLAYER_HEIGHT
+
+def round_half_away(x):
+    """Rounds like pygame.Rect coordinate assignment (C lround), exactly."""
+    f = np.floor(x)
+    frac = x - f
+    return (f + ((frac > 0.5) | ((frac == 0.5) & (x > 0)))).astype(np.int64)
+
+class _Schedule(StepSchedule):
+    """StepSchedule with NumPy views of the tables, indexed by per-env step counts"""
+    def grow(self, size: int):
+        super().grow(size)
+        self.time_arr = np.array(self.time, dtype=np.float64)
+        self.score_arr = np.array(self.score, dtype=np.int64)
+        self.speed_arr = np.array(self.speed, dtype=np.float64)
+        self.disp = self.speed_arr * self.dt
+
+class VecSurferEnv:
+    """
+    N independent SurferEnv episodes stepped together with array operations.
+    Sub-env i reproduces SurferEnv(seed=seed + i) step for step (same actions -> same
+    observations, rewards, scores), including across auto-resets.
+    Actions: 0=stay, 1=left, 2=right
+    """
+    def __init__(self, n_envs: int, seed: int = 0, target_fps: int = 60, obstacle_length: int = None,
+                 recorder=None):
+        self.n_envs = n_envs
+        # optional surfer.trajectory.TrajectoryWriter with stride=n_envs: each step records
+        # one row per sub-env, so an episode's consecutive steps are n_envs rows apart
+        if recorder is not None and recorder.stride != n_envs:
+            raise ValueError(f"recorder stride {recorder.stride} != n_envs {n_envs}")
+        self.recorder = recorder
+        self.episode_ids = np.zeros(n_envs, dtype=np.int64)
+        self.rands = [random.Random(seed + i) for i in range(n_envs)]
+        self.sched = _Schedule(1.0 / target_fps)
+        self.lane = np.ones(n_envs, dtype=np.int64)
+        self.steps = np.zeros(n_envs, dtype=np.int64)
+        self.spawn_timer = np.zeros(n_envs, dtype=np.float64)
+        self.next_spawn = np.zeros(n_envs, dtype=np.float64)
+        self.obs_y = np.zeros((n_envs, MAX_OBSTACLES), dtype=np.int64)
+        self.obstacle_length = OBSTACLE_LENGTH if obstacle_length is None else obstacle_length
+        self.obs_len = np.full((n_envs, MAX_OBSTACLES), self.obstacle_length, dtype=np.int64)
+        self.obs_lane = np.zeros((n_envs, MAX_OBSTACLES), dtype=np.int64)
+        self.active = np.zeros((n_envs, MAX_OBSTACLES), dtype=bool)
+        self._rows = np.arange(n_envs)
+        self.reset()
+
+    def reset(self):
+        self._reset_envs(self._rows)
+        obs = self._obs()
+        if self.recorder is not None:
+            self._last_obs = obs.copy()
+        return obs
+
+    def _reset_envs(self, idx):
+        self.lane[idx] = 1
+        self.steps[idx] = 0
+        self.spawn_timer[idx] = 0.0
+        self.active[idx] = False
+        for i in idx:
+            self.next_spawn[i] = self.rands[i].uniform(MIN_SPAWN_INTERVAL, MAX_SPAWN_INTERVAL)
+        if self.recorder is not None:
+            for i in idx:
+                self.episode_ids[i] = self.recorder.new_episode()
+
+    def step(self, actions):
+        """
+        actions: (N,) ints. Returns obs (N, 6) float32, reward (N,) float32, done (N,) bool, info.
+        Finished episodes are reset immediately; their final observation, score and time are
+        in info["terminal_obs"], info["score"] and info["time"].
+        """
+        actions = np.asarray(actions)
+        prev_lane = self.lane
+        self.lane = prev_lane - ((actions == 1) & (prev_lane > 0)) + ((actions == 2) & (prev_lane < LANES - 1))
+
+        self.steps += 1
+        k = self.steps
+        self.sched.ensure(int(k.max()))
+
+        # spawns are rare (one every ~50-150 steps per episode), so draw them per env
+        self.spawn_timer += self.sched.dt
+        spawning = np.flatnonzero(self.spawn_timer >= self.next_spawn)
+        for i in spawning:
+            rng, ki = self.rands[i], k[i]
+            if self.active[i].all():
+                self._grow_slots()
+            slot = int(np.argmin(self.active[i]))
+            self.obs_lane[i, slot] = rng.randrange(LANES)
+            self.obs_y[i, slot] = OBSTACLE_Y
+            self.active[i, slot] = True
+            self.next_spawn[i] = rng.uniform(self.sched.min_spawn[ki], self.sched.max_spawn[ki])
+        self.spawn_timer[spawning] = 0.0
+
+        # move & prune
+        self.obs_y = round_half_away(self.obs_y + self.sched.disp[k][:, None])
+        self.active &= self.obs_y <= HEIGHT
+
+        # collision: only obstacles in the player's lane can overlap it horizontally
+        bottom = self.obs_y + self.obs_len
+        in_lane = self.active & (self.obs_lane == self.lane[:, None])
+        collided = (in_lane & (self.obs_y < PLAYER_BOTTOM) & (bottom > PLAYER_TOP)).any(axis=1)
+
+        reward = np.ones(self.n_envs, dtype=np.float32)
+        reward[self.lane != prev_lane] -= 0.01
+        reward[collided] -= 100.0
+
+        obs = self._obs()
+        info = {"score": self.sched.score_arr[k], "time": self.sched.time_arr[k], "terminal_obs": obs.copy()}
+        if self.recorder is not None:
+            self.recorder.record_batch(self._last_obs, actions, reward, collided, self.episode_ids)
+        done_idx = np.flatnonzero(collided)
+        if len(done_idx):
+            self._reset_envs(done_idx)
+            obs[done_idx] = self._obs()[done_idx]
+        if self.recorder is not None:
+            self._last_obs = obs.copy()
+        return obs, reward, collided, info
+
+    def _grow_slots(self):
+        """Doubles the obstacle slots of every env, so a spawn never overwrites a live obstacle"""
+        grow = lambda a, fill: np.concatenate([a, np.full_like(a, fill)], axis=1)
+        self.obs_y, self.obs_lane = grow(self.obs_y, 0), grow(self.obs_lane, 0)
+        self.obs_len, self.active = grow(self.obs_len, self.obstacle_length), grow(self.active, False)
+
+    def _obs(self):
+        """Batched extract_state: [lane_one_hot(LANES), lane ttcs(LANES)] normalized to [0,1]."""
+        bottom = self.obs_y + self.obs_len
+        ahead = self.active & (bottom < PLAYER_TOP)
+        speed = np.maximum(self.sched.speed_arr[self.steps], 1e-6)
+        ttc = np.where(ahead, (PLAYER_TOP - bottom) / speed[:, None], FAR_TTC_SEC)
+        obs = np.zeros((self.n_envs, 2 * LANES), dtype=np.float32)
+        obs[self._rows, self.lane] = 1.0
+        for lane_id in range(LANES):
+            nearest = np.where(self.obs_lane == lane_id, ttc, FAR_TTC_SEC).min(axis=1)
+            obs[:, LANES + lane_id] = np.minimum(FAR_TTC_SEC, nearest) / FAR_TTC_SEC
+        return obs
+
+    def close(self):
+        pass
@@ -0,0 +1,17 @@
+# tests/test_env.py
+from surfer.env import SurferEnv
+
+def test_advance_until_event_below_min_ttc_always_advances():
+    # seed 55 reaches a state whose lane TTC is already below 0.3 with an event on the next frame
+    env, ref = SurferEnv(seed=55, obstacle_length=110), SurferEnv(seed=55, obstacle_length=110)
+    env.reset()
+    ref.reset()
+    for _ in range(300):
+        obs, reward, done, info = env.advance_until_event(min_ttc=0.3)
+        assert info["frames"] >= 1
+        for _ in range(info["frames"]):
+            ref.step(0)
+        assert env.get_state() == ref.get_state()
+        if done:
+            break
+    assert done
@@ -0,0 +1,14 @@
+# tests/test_eval.py
+import math
+from statistics import mean, median
+from scripts.eval_engine import summarize
+from scripts.eval_stats import RunningStats
+
+def test_summarize_is_the_running_stats_summary():
+    scores = [12, 40, 7, 95, 40, 3, 61, 28, 55]
+    summary = summarize([{"score": s} for s in scores])
+    assert summary == RunningStats().extend(scores).summary()
+    assert summary["episodes"] == len(scores) and summary["best"] == 95 and summary["worst"] == 3
+    assert math.isclose(summary["mean"], mean(scores))
+    assert abs(summary["median"] - median(scores)) <= 0.01 * median(scores)
+    assert summary["ci_low"] < summary["mean"] < summary["ci_high"]
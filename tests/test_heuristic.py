@@ -0,0 +1,31 @@
+# tests/test_heuristic.py
+import numpy as np
+import pytest
+from agents.heuristic import heuristic_policy, heuristic_policy_batch
+
+def dense_grid(levels=40):
+    """Every lane x every TTC triple on a (levels+1)^3 grid, plus the threshold values and their neighbours"""
+    edges = np.array([0.2, 0.45, 0.55, 0.65])
+    grid = np.unique(np.concatenate([np.arange(levels + 1) / levels, edges, np.nextafter(edges, 0), np.nextafter(edges, 1)]))
+    q0, q1, q2 = np.meshgrid(grid, grid, grid, indexing="ij")
+    ttcs = np.stack([q0.ravel(), q1.ravel(), q2.ravel()], axis=1)
+    obs = np.zeros((3 * len(ttcs), 6))
+    for lane in range(3):
+        obs[lane * len(ttcs):(lane + 1) * len(ttcs), lane] = 1.0
+        obs[lane * len(ttcs):(lane + 1) * len(ttcs), 3:] = ttcs
+    return obs
+
+def scalar_actions(obs):
+    return np.array([heuristic_policy([int(v) for v in row[:3]] + row[3:]) for row in obs.tolist()])
+
+@pytest.mark.parametrize("dtype", [np.float64, np.float32])
+def test_batch_matches_scalar_on_dense_grid(dtype):
+    obs = dense_grid().astype(dtype)
+    assert np.array_equal(heuristic_policy_batch(obs), scalar_actions(obs))
+
+def test_batch_matches_scalar_on_random_ttcs():
+    rng = np.random.default_rng(0)
+    obs = np.zeros((50_000, 6))
+    obs[np.arange(len(obs)), rng.integers(0, 3, len(obs))] = 1.0
+    obs[:, 3:] = rng.random((len(obs), 3))
+    assert np.array_equal(heuristic_policy_batch(obs), scalar_actions(obs))
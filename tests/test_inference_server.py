@@ -0,0 +1,52 @@
+# tests/test_inference_server.py
+import time
+import numpy as np
+import pytest
+import torch
+from agents.dqn import QNetwork
+from scripts.inference_server import InferenceServer
+
+def local_actions(model, obs):
+    with torch.no_grad():
+        return model(torch.from_numpy(obs)).argmax(dim=1).tolist()
+
+@pytest.fixture
+def nets():
+    torch.manual_seed(0)
+    a, b = QNetwork(6, 3), QNetwork(6, 3)
+    obs = np.random.default_rng(0).random((64, 6), dtype=np.float32)
+    assert local_actions(a, obs) != local_actions(b, obs)
+    return a, b, obs
+
+def test_served_actions_match_local_and_follow_hot_swaps(nets):
+    a, b, obs = nets
+    server = InferenceServer(2, state_dict=a.state_dict(), max_delay_ms=0.5)
+    try:
+        client = server.client(0)
+        assert [client.act(o) for o in obs] == local_actions(a, obs)
+        server.publish(b.state_dict())
+        assert [client.act(o) for o in obs] == local_actions(b, obs)
+        client.close()
+        metrics = server.metrics()
+        assert metrics["requests"] == 2 * len(obs) and metrics["weight_swaps"] == 1
+    finally:
+        server.close()
+
+def test_late_answer_after_timeout_is_skipped(nets):
+    a, _, obs = nets
+    expected = local_actions(a, obs)
+    i, j = next((i, j) for i in range(len(obs)) for j in range(len(obs)) if expected[i] != expected[j])
+    server = InferenceServer(1, state_dict=a.state_dict())
+    try:
+        client = server.client(0)
+        client.act(obs[0])  # server is up
+        client.timeout = 0.0
+        with pytest.raises(TimeoutError):
+            client.act(obs[i])
+        time.sleep(0.2)  # the abandoned request is answered and leaves a permit behind
+        client.timeout = 10.0
+        assert client.act(obs[j]) == expected[j]
+        assert [client.act(o) for o in obs] == expected
+        client.close()
+    finally:
+        server.close()
@@ -0,0 +1,13 @@
+# tests/test_planner.py
+from surfer.config import EnvConfig
+from surfer.env import SurferEnv
+from agents.planner import LookaheadPlanner
+
+def test_planner_follows_env_config():
+    planner = LookaheadPlanner(depth=1, max_samples=2)
+    for config in (EnvConfig(), EnvConfig(lanes=5, width=600)):
+        env = SurferEnv(seed=1, obstacle_length=100, config=config)
+        env.reset()
+        for _ in range(20):
+            env.step(planner.act(env), repeat=planner.frames_per_decision)
+        assert planner.sim.config == config and planner.sim.n_lanes == config.lanes
@@ -0,0 +1,119 @@
+# tests/test_replay.py
+import numpy as np
+from surfer.env import SurferEnv
+from agents.dqn import ReplayBuffer, SumTree, PrioritizedReplayBuffer
+
+def _transitions(n, seed=0, episode_len=37):
+    """SurferEnv transitions under random actions; episodes are cut at episode_len steps"""
+    env, rng = SurferEnv(seed=seed), np.random.default_rng(seed)
+    obs, out = env.reset(), []
+    for step in range(n):
+        action = int(rng.integers(3))
+        next_obs, reward, done, _ = env.step(action)
+        done = done or step % episode_len == episode_len - 1
+        out.append((obs, action, reward, next_obs, done))
+        obs = env.reset() if done else next_obs
+    env.close()
+    return out
+
+def _rows(batch):
+    obs, actions, rewards, next_obs, dones = (t.numpy() for t in batch)
+    return obs, actions, rewards, next_obs, dones
+
+def _expected(transitions):
+    return [np.array([t[i] for t in transitions], dtype=dt)
+            for i, dt in enumerate((np.float32, np.int64, np.float32, np.float32, np.float32))]
+
+def test_slots_hold_pushed_transitions_across_wrap():
+    capacity = 50
+    transitions = _transitions(173)
+    assert sum(t[4] for t in transitions) >= 2  # episode ends inside the stored window
+    buf = ReplayBuffer(capacity)
+    for t in transitions:
+        buf.push(*t)
+    assert len(buf) == capacity and buf.pos == 173 % capacity
+    slots = np.arange(capacity)
+    kept = [transitions[173 - capacity + ((i - buf.pos) % capacity)] for i in slots]
+    for got, want in zip(_rows(buf._gather(slots)), _expected(kept)):
+        assert np.array_equal(got, want)
+
+def test_sample_matches_pushed_transitions():
+    transitions = _transitions(120, seed=1)
+    buf = ReplayBuffer(64)
+    for t in transitions:
+        buf.push(*t)
+    np.random.seed(0)
+    got = _rows(buf.sample(256))
+    want = _expected(transitions[-64:])
+    for j in range(256):
+        matches = [k for k in range(64) if all(np.array_equal(got[c][j], want[c][k]) for c in range(5))]
+        assert matches, f"sampled row {j} is not a stored transition"
+
+def test_state_dict_round_trip_and_nbytes():
+    transitions = _transitions(90, seed=2)
+    buf = ReplayBuffer(32)
+    for t in transitions:
+        buf.push(*t)
+    restored = ReplayBuffer(32)
+    restored.load_state_dict(buf.state_dict())
+    slots = np.arange(32)
+    for a, b in zip(_rows(buf._gather(slots)), _rows(restored._gather(slots))):
+        assert np.array_equal(a, b)
+    assert buf.nbytes() == sum(v.nbytes for v in buf.state_dict().values() if isinstance(v, np.ndarray))
+
+def test_sum_tree_batched_update_with_duplicates():
+    tree = SumTree(10)
+    rng = np.random.default_rng(0)
+    tree.update(np.arange(10), rng.random(10))
+    idx = np.array([3, 7, 3, 0, 7, 7])
+    priorities = rng.random(len(idx))
+    tree.update(idx, priorities)
+    leaves = tree.tree[tree.n_leaves:tree.n_leaves + 10]
+    assert leaves[3] == priorities[2] and leaves[7] == priorities[5] and leaves[0] == priorities[3]
+    assert np.isclose(tree.total(), leaves.sum())
+    for pos in range(1, tree.n_leaves):  # every parent is the sum of its children
+        assert np.isclose(tree.tree[pos], tree.tree[2 * pos] + tree.tree[2 * pos + 1])
+
+def test_sum_tree_find_at_prefix_sum_boundaries():
+    priorities = np.array([1.0, 0.5, 2.0, 0.25, 3.0])
+    tree = SumTree(len(priorities))
+    tree.update(np.arange(len(priorities)), priorities)
+    bounds = np.concatenate(([0.0], np.cumsum(priorities)[:-1]))
+    assert np.array_equal(tree.find(bounds), np.arange(5))  # a boundary belongs to the leaf it opens
+    assert np.array_equal(tree.find(np.nextafter(bounds[1:], 0)), np.arange(4))
+    assert tree.find([np.nextafter(priorities.sum(), 0)])[0] == 4
+
+def test_prioritized_sample_weights():
+    buf = PrioritizedReplayBuffer(64)
+    for t in _transitions(100, seed=3):
+        buf.push(*t)
+    buf.update_priorities(np.arange(64), np.random.default_rng(0).random(64) * 5)
+    np.random.seed(1)
+    *batch, weights, idx = buf.sample(32)
+    weights = weights.numpy()
+    assert (weights <= 1.0).all() and weights.max() == 1.0
+    assert ((idx >= 0) & (idx < len(buf))).all()
+    want = _expected(_transitions(100, seed=3)[-64:])
+    slots = (idx - buf.pos) % 64
+    for got, w in zip(_rows(batch), want):
+        assert np.array_equal(got, w[slots])
+
+def test_shared_replay_redraws_slots_being_written():
+    from scripts.train_apex import SharedReplay
+    replay = SharedReplay(2, 40, 6, create=True)
+    try:
+        for t in _transitions(60, seed=4):
+            for rank in range(2):
+                replay.push(rank, *t)
+        stored = {(tuple(o), a) for o, a in zip(replay.obs.tolist(), replay.actions.tolist())}
+        busy = np.array([3, 4, 25])  # an actor is mid-write: seqlock odd, half-written garbage
+        replay.seqs[busy] += 1
+        replay.obs[busy], replay.actions[busy] = -1.0, 7
+        rng = np.random.default_rng(0)
+        for _ in range(50):
+            obs, actions, *_ = replay.sample(32, rng)
+            assert (actions.numpy() != 7).all() and (obs.numpy() != -1.0).any(axis=1).all()
+            assert all((tuple(o), a) in stored for o, a in zip(obs.tolist(), actions.tolist()))
+        assert replay.redrawn > 0
+    finally:
+        replay.close(unlink=True)
@@ -0,0 +1,19 @@
+# tests/test_train_dqn.py
+import torch
+from scripts.train_dqn import train_dqn
+
+def _run(tmp_path, name, episodes, **kw):
+    return train_dqn(episodes=episodes, batch_size=16, warmup_steps=32, replay_capacity=2000,
+                     epsilon_decay_steps=200, target_update_steps=50, q_cache_quantum=0.05, q_cache_refresh=50,
+                     seed=3, obstacle_length=4, save_path=str(tmp_path / f"{name}.pt"), **kw)
+
+def test_resume_matches_uninterrupted_run_with_q_cache(tmp_path):
+    full = _run(tmp_path, "full", 4)
+    ckpt = str(tmp_path / "ckpt.pt")
+    _run(tmp_path, "first", 2, checkpoint_path=ckpt, checkpoint_every=2)
+    resumed = _run(tmp_path, "resumed", 4, resume_from=ckpt)
+    assert resumed["ep_rewards"] == full["ep_rewards"]
+    assert resumed["updates"] == full["updates"]
+    assert resumed["q_cache"] == full["q_cache"]
+    final = torch.load(str(tmp_path / "full.pt")), torch.load(str(tmp_path / "resumed.pt"))
+    assert all(torch.equal(final[0][k], final[1][k]) for k in final[0])
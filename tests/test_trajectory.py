@@ -0,0 +1,29 @@
+# tests/test_trajectory.py
+import numpy as np
+from surfer.trajectory import TrajectoryWriter, TrajectoryDataset
+
+def test_round_trip_across_chunks(tmp_path):
+    rng = np.random.default_rng(0)
+    rows = []
+    with TrajectoryWriter(str(tmp_path), obs_dim=6, chunk_size=10) as writer:
+        for step in range(12):
+            if step % 4 == 3:  # single rows in between keep their place
+                row = (rng.random(6).astype(np.float32), 1, 0.5, True, 99)
+                writer.record(row[0].tolist(), *row[1:])
+                rows.append(row)
+                continue
+            n = 7
+            obs = rng.random((n, 6)).astype(np.float32)
+            actions, rewards = rng.integers(0, 3, n), rng.random(n).astype(np.float32)
+            dones, episodes = rng.random(n) < 0.2, np.full(n, step)
+            writer.record_batch(obs, actions, rewards, dones, episodes)
+            rows += list(zip(obs, actions, rewards, dones, episodes))
+        assert len(writer) == len(rows)
+    ds = TrajectoryDataset(str(tmp_path))
+    assert len(ds) == len(rows)
+    expected = [np.array([r[i] for r in rows]) for i in range(5)]
+    assert np.array_equal(ds.obs, expected[0])
+    assert np.array_equal(ds.action, expected[1])
+    assert np.array_equal(ds.reward, expected[2].astype(np.float32))
+    assert np.array_equal(ds.done, expected[3])
+    assert np.array_equal(ds.episode, expected[4])
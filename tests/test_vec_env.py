@@ -0,0 +1,33 @@
+# tests/test_vec_env.py
+import numpy as np
+import surfer.vec_env as vec_env
+from surfer.env import SurferEnv
+from surfer.vec_env import VecSurferEnv
+
+def run_side_by_side(n_envs=8, steps=3000, seed=5, obstacle_length=120):
+    vec = VecSurferEnv(n_envs, seed=seed, obstacle_length=obstacle_length)
+    envs = [SurferEnv(seed=seed + i, obstacle_length=obstacle_length) for i in range(n_envs)]
+    obs = vec.reset()
+    assert np.array_equal(obs, np.array([env.reset() for env in envs], dtype=np.float32))
+    rng = np.random.default_rng(seed)
+    resets = 0
+    for _ in range(steps):
+        actions = rng.integers(0, 3, n_envs)
+        obs, reward, done, info = vec.step(actions)
+        for i, env in enumerate(envs):
+            o, r, d, inf = env.step(int(actions[i]))
+            assert np.array_equal(info["terminal_obs"][i], np.float32(o))
+            assert reward[i] == np.float32(r) and done[i] == d
+            if d:
+                assert info["score"][i] == inf["score"]
+                o = env.reset()
+                resets += 1
+            assert np.array_equal(obs[i], np.float32(o))
+    return resets
+
+def test_matches_surfer_env_across_resets():
+    assert run_side_by_side() > 0
+
+def test_full_slots_grow_instead_of_overwriting(monkeypatch):
+    monkeypatch.setattr(vec_env, "MAX_OBSTACLES", 1)
+    assert run_side_by_side(n_envs=4, steps=1500) > 0